@@ -0,0 +1,28 @@
+"""add_processing_crawl_status
+
+Revision ID: 5f2b9c1d7e43
+Revises: a1742e8d21a4
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2b9c1d7e43'
+down_revision: Union[str, None] = 'a1742e8d21a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # ALTER TYPE ... ADD VALUE không chạy được trong transaction
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE crawl_status ADD VALUE IF NOT EXISTS 'processing' AFTER 'pending'")
+
+def downgrade():
+    # PostgreSQL không hỗ trợ xóa giá trị enum, chỉ trả các bản ghi đang claim về pending
+    op.execute("UPDATE crawl_tracker SET status = 'pending' WHERE status = 'processing'")
@@ -0,0 +1,61 @@
+"""add_crawl_tracker_indexes
+
+Revision ID: 8c4e1a6b2f90
+Revises: 5f2b9c1d7e43
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e1a6b2f90'
+down_revision: Union[str, None] = '5f2b9c1d7e43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Gộp tracker trùng (document_type, document_id) trước khi tạo unique index:
+    # giữ bản ghi 'success' nếu có, sau đó đến id nhỏ nhất
+    op.execute("""
+        CREATE TEMP TABLE crawl_tracker_dups AS
+        SELECT id, keep_id FROM (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY document_type, document_id
+                       ORDER BY (status = 'success') DESC, id
+                   ) AS keep_id
+            FROM crawl_tracker
+        ) t
+        WHERE id <> keep_id
+    """)
+    op.execute("""
+        UPDATE process_tracker p SET crawl_tracker_id = d.keep_id
+        FROM crawl_tracker_dups d
+        WHERE p.crawl_tracker_id = d.id
+    """)
+    op.execute("DELETE FROM crawl_tracker c USING crawl_tracker_dups d WHERE c.id = d.id")
+    op.execute("DROP TABLE crawl_tracker_dups")
+
+    # Tạo index CONCURRENTLY để không khóa ghi trên bảng lớn
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_crawl_tracker_type_doc_id', 'crawl_tracker',
+            ['document_type', 'document_id'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_crawl_tracker_pending', 'crawl_tracker',
+            ['document_type', 'created_at', 'retry_count'],
+            postgresql_where=sa.text("status IN ('pending', 'failed', 'processing')"),
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    op.drop_index('ix_crawl_tracker_pending', table_name='crawl_tracker')
+    op.drop_index('ux_crawl_tracker_type_doc_id', table_name='crawl_tracker')
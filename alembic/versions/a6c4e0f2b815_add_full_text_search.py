@@ -0,0 +1,122 @@
+"""add_full_text_search
+
+Revision ID: a6c4e0f2b815
+Revises: f5b2d8e3a617
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c4e0f2b815'
+down_revision: Union[str, None] = 'f5b2d8e3a617'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Số dòng cập nhật search_vector mỗi transaction khi backfill
+BACKFILL_BATCH = 2000
+
+# Bỏ dấu tiếng Việt bằng translate(): không cần extension unaccent và là IMMUTABLE.
+# Chữ hoa được đưa về chữ thường (lower() không xử lý chữ có dấu khi LC_CTYPE=C),
+# các dấu tổ hợp (văn bản dạng NFD) bị xóa.
+VN_UNACCENT = """
+    CREATE OR REPLACE FUNCTION vn_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+        SELECT translate(
+            $1,
+            'àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ'
+            'ÀÁẢÃẠĂẰẮẲẴẶÂẦẤẨẪẬÈÉẺẼẸÊỀẾỂỄỆÌÍỈĨỊÒÓỎÕỌÔỒỐỔỖỘƠỜỚỞỠỢÙÚỦŨỤƯỪỨỬỮỰỲÝỶỸỴĐ'
+            || U&'\\0300\\0301\\0302\\0303\\0306\\0309\\031B\\0323',
+            'aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyyd'
+            'aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyyd'
+        )
+    $$
+"""
+
+# tsvector (cấu hình 'simple', không stemming - tiếng Việt là ngôn ngữ đơn lập)
+# tính từ một dòng của bảng. Trọng số: A số hiệu/tên, B loại văn bản/cơ quan,
+# D nội dung. Nội dung được cắt bớt để không vượt giới hạn kích thước của tsvector.
+SEARCH_VECTORS = {
+    'legal_documents': (
+        ['document_number', 'document_type', 'issuing_authority', 'content_text'],
+        """
+        setweight(to_tsvector('simple', vn_unaccent(coalesce(r.document_number, ''))), 'A')
+        || setweight(to_tsvector('simple', vn_unaccent(concat_ws(' ', r.document_type, r.issuing_authority))), 'B')
+        || setweight(to_tsvector('simple', vn_unaccent(left(coalesce(r.content_text, ''), 500000))), 'D')
+        """
+    ),
+    'judgments': (
+        ['case_number', 'case_name', 'issuing_authority', 'trial_level', 'field', 'keywords', 'content_text'],
+        """
+        setweight(to_tsvector('simple', vn_unaccent(concat_ws(' ', r.case_number, r.case_name))), 'A')
+        || setweight(to_tsvector('simple', vn_unaccent(
+               concat_ws(' ', r.issuing_authority, r.trial_level, r.field, r.keywords::text)
+           )), 'B')
+        || setweight(to_tsvector('simple', vn_unaccent(left(coalesce(r.content_text, ''), 500000))), 'D')
+        """
+    ),
+}
+
+
+def upgrade():
+    op.execute(VN_UNACCENT)
+
+    for table, (columns, expression) in SEARCH_VECTORS.items():
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), comment='Chỉ mục tìm kiếm toàn văn (trigger tự cập nhật)'))
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector(r {table}) RETURNS tsvector
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ SELECT {expression} $$
+        """)
+        # Trigger tính lại search_vector khi thêm mới hoặc sửa các cột được index
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.search_vector := {table}_search_vector(NEW);
+                RETURN NEW;
+            END
+            $$
+        """)
+        op.execute(f"""
+            CREATE TRIGGER trg_{table}_search_vector
+            BEFORE INSERT OR UPDATE OF {', '.join(columns)} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """)
+
+    # Backfill theo lô nhỏ và tạo index CONCURRENTLY để không khóa ghi lâu.
+    # Duyệt theo khoảng id (dùng primary key) để mỗi lô không phải quét lại bảng;
+    # dòng thêm sau khi đọc max(id) đã có search_vector nhờ trigger
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for table in SEARCH_VECTORS:
+            max_id = bind.execute(sa.text(f"SELECT coalesce(max(id), 0) FROM {table}")).scalar()
+            for last_id in range(0, max_id, BACKFILL_BATCH):
+                bind.execute(sa.text(f"""
+                    UPDATE {table} SET search_vector = {table}_search_vector({table})
+                    WHERE id > :last_id AND id <= :last_id + :batch AND search_vector IS NULL
+                """), {'last_id': last_id, 'batch': BACKFILL_BATCH})
+            op.create_index(
+                f'ix_{table}_search_vector', table, ['search_vector'],
+                postgresql_using='gin',
+                postgresql_concurrently=True
+            )
+        # Lọc theo khoảng ngày kết hợp (BitmapAnd) với index tìm kiếm
+        op.create_index('ix_legal_documents_issue_date', 'legal_documents', ['issue_date'], postgresql_concurrently=True)
+        op.create_index('ix_judgments_judgment_date', 'judgments', ['judgment_date'], postgresql_concurrently=True)
+
+
+def downgrade():
+    op.drop_index('ix_judgments_judgment_date', table_name='judgments')
+    op.drop_index('ix_legal_documents_issue_date', table_name='legal_documents')
+    for table in SEARCH_VECTORS:
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_search_vector ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector_update()")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector({table})")
+        op.drop_column(table, 'search_vector')
+    op.execute("DROP FUNCTION IF EXISTS vn_unaccent(text)")
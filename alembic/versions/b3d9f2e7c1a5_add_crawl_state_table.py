@@ -0,0 +1,33 @@
+"""add_crawl_state_table
+
+Revision ID: b3d9f2e7c1a5
+Revises: 8c4e1a6b2f90
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9f2e7c1a5'
+down_revision: Union[str, None] = '8c4e1a6b2f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        'crawl_state',
+        sa.Column('document_type', postgresql.ENUM('law', 'judgment', name='doc_type', create_type=False), nullable=False),
+        sa.Column('last_seen_id', sa.String(length=255), nullable=False, comment='ID mới nhất ở đầu danh sách'),
+        sa.Column('last_crawled_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('document_type')
+    )
+
+
+def downgrade():
+    op.drop_table('crawl_state')
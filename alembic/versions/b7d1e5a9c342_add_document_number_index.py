@@ -0,0 +1,31 @@
+"""add_document_number_index
+
+Revision ID: b7d1e5a9c342
+Revises: a6c4e0f2b815
+Create Date: 2026-10-18 21:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d1e5a9c342'
+down_revision: Union[str, None] = 'a6c4e0f2b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # GET /documents/{doc_id} tra cứu theo số hiệu văn bản
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_legal_documents_document_number', 'legal_documents',
+            ['document_number'],
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    op.drop_index('ix_legal_documents_document_number', table_name='legal_documents')
@@ -0,0 +1,31 @@
+"""add_judgments_case_number_index
+
+Revision ID: c2f8a4d6e913
+Revises: b7d1e5a9c342
+Create Date: 2026-10-18 23:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f8a4d6e913'
+down_revision: Union[str, None] = 'b7d1e5a9c342'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Tra theo số bản án: claim_statement tìm bản án cũ chưa có source_id khi lưu,
+    # tìm kiếm luôn xếp hạng bản án có số bản án đúng bằng chuỗi tìm kiếm
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_judgments_case_number', 'judgments',
+            ['case_number'],
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    op.drop_index('ix_judgments_case_number', table_name='judgments')
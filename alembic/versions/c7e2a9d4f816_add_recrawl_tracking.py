@@ -0,0 +1,41 @@
+"""add_recrawl_tracking
+
+Revision ID: c7e2a9d4f816
+Revises: b3d9f2e7c1a5
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2a9d4f816'
+down_revision: Union[str, None] = 'b3d9f2e7c1a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column('crawl_tracker', sa.Column('content_hash', sa.String(length=64), comment='SHA-256 của nội dung/metadata đã chuẩn hóa'))
+    op.add_column('crawl_tracker', sa.Column('last_checked_at', sa.DateTime()))
+    op.add_column('crawl_tracker', sa.Column('next_check_at', sa.DateTime()))
+    op.add_column('crawl_tracker', sa.Column('change_count', sa.Integer(), server_default='0'))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_crawl_tracker_next_check', 'crawl_tracker',
+            ['document_type', 'next_check_at'],
+            postgresql_where=sa.text("status = 'success'"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    op.drop_index('ix_crawl_tracker_next_check', table_name='crawl_tracker')
+    op.drop_column('crawl_tracker', 'change_count')
+    op.drop_column('crawl_tracker', 'next_check_at')
+    op.drop_column('crawl_tracker', 'last_checked_at')
+    op.drop_column('crawl_tracker', 'content_hash')
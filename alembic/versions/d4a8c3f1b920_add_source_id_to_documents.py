@@ -0,0 +1,37 @@
+"""add_source_id_to_documents
+
+Revision ID: d4a8c3f1b920
+Revises: c7e2a9d4f816
+Create Date: 2026-10-18 13:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8c3f1b920'
+down_revision: Union[str, None] = 'c7e2a9d4f816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Trang nguồn không lưu ID trong bản ghi cũ nên không backfill được: chúng giữ
+    # source_id NULL (unique index cho phép nhiều NULL). Lần lưu đầu tiên sau khi
+    # crawl lại nhận bản ghi cũ theo số hiệu/ngày/nơi ban hành (xem claim_statement)
+    op.add_column('legal_documents', sa.Column('source_id', sa.String(length=255), comment='ID văn bản trên trang nguồn (CrawlTracker.document_id)'))
+    op.add_column('judgments', sa.Column('source_id', sa.String(length=255), comment='ID bản án trên trang nguồn (CrawlTracker.document_id)'))
+
+    with op.get_context().autocommit_block():
+        op.create_index('ux_legal_documents_source_id', 'legal_documents', ['source_id'], unique=True, postgresql_concurrently=True)
+        op.create_index('ux_judgments_source_id', 'judgments', ['source_id'], unique=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    op.drop_index('ux_judgments_source_id', table_name='judgments')
+    op.drop_index('ux_legal_documents_source_id', table_name='legal_documents')
+    op.drop_column('judgments', 'source_id')
+    op.drop_column('legal_documents', 'source_id')
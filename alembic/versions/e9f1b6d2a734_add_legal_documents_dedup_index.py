@@ -0,0 +1,40 @@
+"""add_legal_documents_dedup_index
+
+Revision ID: e9f1b6d2a734
+Revises: d4a8c3f1b920
+Create Date: 2026-10-18 14:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9f1b6d2a734'
+down_revision: Union[str, None] = 'd4a8c3f1b920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Biểu thức phải trùng với LegalDocument.dedup_key
+    with op.get_context().autocommit_block():
+        op.execute(r"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_legal_documents_dedup_key ON legal_documents (
+                upper(regexp_replace(document_number, '\s+', '', 'g')),
+                coalesce(issue_date, DATE '1900-01-01'),
+                coalesce(lower(regexp_replace(btrim(issuing_authority), '\s+', ' ', 'g')), ''),
+                id
+            )
+        """)
+        # FK trỏ đến legal_documents: cần index để gộp/xóa văn bản không quét cả bảng
+        op.create_index('ix_judgment_doc_rel_document_id', 'judgment_document_relations', ['document_id'], postgresql_concurrently=True)
+        op.create_index('ix_processed_articles_document_id', 'processed_articles', ['document_id'], postgresql_concurrently=True)
+
+
+def downgrade():
+    op.drop_index('ix_processed_articles_document_id', table_name='processed_articles')
+    op.drop_index('ix_judgment_doc_rel_document_id', table_name='judgment_document_relations')
+    op.drop_index('ix_legal_documents_dedup_key', table_name='legal_documents')
@@ -0,0 +1,53 @@
+"""add_process_tracker_unique_document
+
+Revision ID: f5b2d8e3a617
+Revises: e9f1b6d2a734
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b2d8e3a617'
+down_revision: Union[str, None] = 'e9f1b6d2a734'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Gộp tracker trùng (document_id, document_type) trước khi tạo unique index:
+    # giữ bản ghi 'success' nếu có, sau đó đến id lớn nhất (lần xử lý gần nhất)
+    op.execute("""
+        CREATE TEMP TABLE process_tracker_dups AS
+        SELECT id, keep_id FROM (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY document_id, document_type
+                       ORDER BY (status = 'success') DESC, id DESC
+                   ) AS keep_id
+            FROM process_tracker
+        ) t
+        WHERE id <> keep_id
+    """)
+    op.execute("""
+        UPDATE processed_articles a SET process_tracker_id = d.keep_id
+        FROM process_tracker_dups d
+        WHERE a.process_tracker_id = d.id
+    """)
+    op.execute("DELETE FROM process_tracker p USING process_tracker_dups d WHERE p.id = d.id")
+    op.execute("DROP TABLE process_tracker_dups")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_process_tracker_doc_id_type', 'process_tracker',
+            ['document_id', 'document_type'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    op.drop_index('ux_process_tracker_doc_id_type', table_name='process_tracker')
@@ -1,14 +1,129 @@
-from fastapi import FastAPI, Depends
-from core.database import get_db
+import os
+import time
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from core.async_database import async_engine, get_async_db
+from core.cache import make_cache, cache_key, listen_for_changes, Invalidations
 from core.models import LegalDocument
-from typing import List
+from core.models.legal_document import canonical_order
+from core.search import search_async, KINDS, MAX_PAGE_SIZE
+from core.api.schemas import Document, DocumentSummary, DocumentPage, HEAVY_FIELDS
+from datetime import date
+from typing import List, Optional
 
-app = FastAPI()
+# Cache response của GET /documents/{doc_id}, bị xóa khi crawler ghi văn bản (xem core/cache.py)
+cache = make_cache()
+invalidations = Invalidations()
 
-@app.get("/documents", response_model=List[LegalDocument])
-async def get_documents(skip: int = 0, limit: int = 100, db=Depends(get_db)):
-    return db.query(LegalDocument).offset(skip).limit(limit).all()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    listener = None
+    if os.getenv('API_CACHE_INVALIDATION', 'on') != 'off':
+        dsn = async_engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+        listener = asyncio.create_task(listen_for_changes(cache, invalidations, dsn))
+    yield
+    if listener is not None:
+        listener.cancel()
+    # Đóng các kết nối trong pool khi tắt server
+    await async_engine.dispose()
 
-@app.get("/documents/{doc_id}")
-async def get_document(doc_id: str, db=Depends(get_db)):
-    return db.query(LegalDocument).filter(LegalDocument.document_number == doc_id).first()
\ No newline at end of file
+app = FastAPI(lifespan=lifespan)
+
+MAX_LIST_LIMIT = 500
+SUMMARY_COLUMNS = [getattr(LegalDocument, name) for name in DocumentSummary.model_fields]
+DOCUMENT_COLUMNS = [getattr(LegalDocument, name) for name in Document.model_fields]
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """`fields=content_text,metadata_html` -> danh sách cột nội dung cần trả về"""
+    requested = [name.strip() for name in (fields or '').split(',') if name.strip()]
+    unknown = [name for name in requested if name not in HEAVY_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {unknown}, expected any of {list(HEAVY_FIELDS)}"
+        )
+    return list(dict.fromkeys(requested))
+
+@app.get("/documents", response_model=DocumentPage, response_model_exclude_unset=True)
+async def get_documents(
+    cursor: Optional[int] = Query(None, description="next_cursor của trang trước (bỏ trống để lấy trang đầu)"),
+    limit: int = Query(100, ge=1, le=MAX_LIST_LIMIT),
+    fields: Optional[str] = Query(None, description=f"Cột nội dung cần lấy thêm: {', '.join(HEAVY_FIELDS)}"),
+    db=Depends(get_async_db)
+):
+    # Phân trang keyset theo id (khóa chính): trang sâu cũng chỉ là một lần quét index
+    columns = SUMMARY_COLUMNS + [getattr(LegalDocument, name) for name in parse_fields(fields)]
+    stmt = select(*columns).order_by(LegalDocument.id).limit(limit + 1)
+    if cursor is not None:
+        stmt = stmt.where(LegalDocument.id > cursor)
+    rows = (await db.execute(stmt)).all()
+
+    items = [dict(row._mapping) for row in rows[:limit]]
+    return DocumentPage(
+        items=items,
+        limit=limit,
+        next_cursor=items[-1]['id'] if len(rows) > limit else None
+    )
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """So khớp header If-None-Match (có thể là danh sách hoặc "*") với ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+# Số hiệu văn bản có dấu "/" (VD: 12/2020/QH14)
+@app.get("/documents/{doc_id:path}", response_model=Document, responses={304: {"description": "Not Modified"}})
+async def get_document(doc_id: str, request: Request, db=Depends(get_async_db)):
+    key = cache_key(LegalDocument.__tablename__, doc_id)
+    cached = await cache.get(key)
+    if cached is None:
+        read_at = time.monotonic()
+        # Số hiệu có thể trùng (xem scripts/check_duplicated.py): chọn cố định bản ghi
+        # theo canonical_order như khi gộp để body và ETag không đổi giữa các request
+        row = (await db.execute(
+            select(*DOCUMENT_COLUMNS)
+            .where(LegalDocument.document_number == doc_id)
+            .order_by(*canonical_order(LegalDocument.source_id, LegalDocument.content_text, LegalDocument.id))
+            .limit(1)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
+        body = Document.model_validate(dict(row._mapping)).model_dump_json().encode('utf-8')
+        # Lưu ETag cùng body để lần sau không phải băm lại: b'"etag"\n' + body
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        cached = etag.encode() + b'\n' + body
+        # Văn bản đổi trong lúc đọc: trả bản vừa đọc nhưng không lưu, tránh giữ bản cũ cả TTL
+        if not invalidations.stale(key, read_at):
+            await cache.set(key, cached)
+
+    etag, _, body = cached.partition(b'\n')
+    headers = {'ETag': etag.decode(), 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+@app.get("/search")
+async def search_documents(
+    q: str = Query(..., min_length=2, description="Từ khóa, có dấu hoặc không dấu"),
+    type: Optional[str] = Query(None, description=f"Loại tài liệu: {', '.join(KINDS)}"),
+    document_type: Optional[str] = Query(None, description="Loại văn bản, VD: Luật, Nghị định"),
+    authority: Optional[str] = Query(None, description="Cơ quan ban hành / tòa án"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db=Depends(get_async_db)
+):
+    try:
+        return await search_async(
+            db, q, kind=type, document_type=document_type, authority=authority,
+            date_from=date_from, date_to=date_to, page=page, page_size=page_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=503, detail=f"{e}, try a more specific query")
@@ -0,0 +1,36 @@
+from datetime import date, datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict
+
+class DocumentSummary(BaseModel):
+    """Metadata của một văn bản (không gồm các cột nội dung lớn)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    source_id: Optional[str] = None
+    document_number: str
+    document_type: Optional[str] = None
+    issuing_authority: Optional[str] = None
+    signer: Optional[str] = None
+    issue_date: Optional[date] = None
+    effective_date: Optional[str] = None
+    gazette_date: Optional[date] = None
+    gazette_number: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class Document(DocumentSummary):
+    """Văn bản kèm các cột nội dung, chỉ có mặt khi được yêu cầu qua `fields=`"""
+    metadata_html: Optional[str] = None
+    content_html: Optional[str] = None
+    content_text: Optional[str] = None
+
+class DocumentPage(BaseModel):
+    """Một trang kết quả; gửi `next_cursor` làm `cursor` để lấy trang tiếp theo"""
+    items: List[Document]
+    limit: int
+    next_cursor: Optional[int] = None
+
+# Cột nội dung có thể yêu cầu qua `fields=`
+HEAVY_FIELDS = tuple(name for name in Document.model_fields if name not in DocumentSummary.model_fields)
@@ -0,0 +1,38 @@
+import os
+import logging
+from typing import AsyncGenerator
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Engine asyncpg cho API. Crawler và script vẫn dùng engine đồng bộ trong
+# core/database.py nên module này chỉ được import khi chạy API.
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    # Số kết nối giữ sẵn cho mỗi worker uvicorn, cộng thêm tối đa max_overflow lúc cao điểm
+    pool_size=int(os.getenv('API_DB_POOL_SIZE', 10)),
+    max_overflow=int(os.getenv('API_DB_MAX_OVERFLOW', 10)),
+    # Request chờ kết nối rảnh tối đa pool_timeout giây rồi báo lỗi thay vì treo
+    pool_timeout=float(os.getenv('API_DB_POOL_TIMEOUT', 10)),
+    pool_recycle=int(os.getenv('API_DB_POOL_RECYCLE', 1800)),
+    pool_pre_ping=True,
+    connect_args={
+        'server_settings': {
+            'application_name': 'crawl-law-api',
+            # Truy vấn của API ngắn, chi phí biên dịch JIT chỉ làm tăng độ trễ
+            'jit': 'off',
+        }
+    },
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency cho FastAPI: một AsyncSession cho mỗi request"""
+    async with AsyncSessionLocal() as session:
+        yield session
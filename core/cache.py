@@ -0,0 +1,213 @@
+import os
+import json
+import asyncio
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from typing import Iterable, Optional
+from sqlalchemy import select, func
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Kênh LISTEN/NOTIFY báo cho API biết document nào vừa được ghi
+CHANNEL = 'document_changed'
+# Bảng được API cache -> cột dùng làm khóa cache (tham số trong URL)
+CACHE_KEYS = {'legal_documents': 'document_number'}
+# Payload của NOTIFY tối đa 8000 byte
+MAX_PAYLOAD_BYTES = 7000
+
+def cache_key(table: str, key: str) -> str:
+    return f"{table}:{key}"
+
+class TTLCache:
+    """Cache LRU trong process, giới hạn theo tổng dung lượng, mỗi mục hết hạn sau `ttl` giây
+
+    Mặc định cho một worker API; cũng là bản thay thế khi chạy local không có Redis.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._items: OrderedDict = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        self._remove(key)
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._items)))
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._remove(key)
+
+    async def clear(self):
+        self._items.clear()
+        self.size = 0
+
+    def _remove(self, key: str):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+class Invalidations:
+    """Thời điểm (time.monotonic) mỗi khóa được báo thay đổi
+
+    Handler đọc DB trước khi nhận thông báo nhưng lưu cache sau khi listener đã
+    xóa khóa sẽ ghi lại bản cũ. Handler ghi nhận lúc bắt đầu đọc và bỏ qua việc
+    lưu nếu `stale(key, since)`. Chỉ giữ mốc trong `horizon` giây; lần đọc cũ hơn
+    luôn bị coi là stale.
+    """
+
+    def __init__(self, horizon: float = 300.0):
+        self.horizon = horizon
+        self._times: OrderedDict = OrderedDict()
+        self._cleared_at = float('-inf')
+
+    def mark(self, *keys: str):
+        now = time.monotonic()
+        for key in keys:
+            self._times[key] = now
+            self._times.move_to_end(key)
+        while self._times and next(iter(self._times.values())) < now - self.horizon:
+            self._times.popitem(last=False)
+
+    def mark_all(self):
+        self._cleared_at = time.monotonic()
+        self._times.clear()
+
+    def stale(self, key: str, since: float) -> bool:
+        """True nếu khóa bị báo thay đổi từ thời điểm `since` (time.monotonic) trở đi"""
+        if since < time.monotonic() - self.horizon:
+            return True
+        return max(self._cleared_at, self._times.get(key, float('-inf'))) >= since
+
+class RedisCache:
+    """Cache dùng chung giữa các worker/máy chạy API (cần package `redis`)"""
+
+    def __init__(self, url: str, ttl: float, prefix: str = 'api:'):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes):
+        await self.redis.set(self.prefix + key, value, ex=int(self.ttl))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.redis.delete(*[self.prefix + key for key in keys])
+
+    async def clear(self):
+        async for key in self.redis.scan_iter(match=f"{self.prefix}*", count=1000):
+            await self.redis.delete(key)
+
+def make_cache():
+    """Chọn backend theo API_CACHE_URL: 'memory' (mặc định) hoặc redis://host:port/db"""
+    url = os.getenv('API_CACHE_URL', 'memory')
+    ttl = float(os.getenv('API_CACHE_TTL', 600))
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        logger.info(f"API cache: redis ({url.split('@')[-1]}), ttl {ttl}s")
+        return RedisCache(url, ttl)
+    max_mb = float(os.getenv('API_CACHE_MAX_MB', 256))
+    logger.info(f"API cache: memory ({max_mb} MB), ttl {ttl}s")
+    return TTLCache(int(max_mb * 1024 * 1024), ttl)
+
+def notify_changed(session, records: Iterable):
+    """Gửi NOTIFY với khóa cache của các bản ghi vừa ghi, trong transaction hiện tại
+
+    Postgres chỉ phát thông báo khi transaction commit, nên API không bỏ cache
+    của một bản ghi mà cuối cùng bị rollback.
+    """
+    changed = defaultdict(list)
+    for record in records:
+        column = CACHE_KEYS.get(getattr(record, '__tablename__', None))
+        value = getattr(record, column, None) if column else None
+        if value:
+            changed[record.__tablename__].append(value)
+
+    for table, keys in changed.items():
+        notify_keys(session, table, keys)
+
+def notify_keys(session, table: str, keys: Iterable[str]):
+    """Gửi NOTIFY cho các khóa cache (giá trị cột CACHE_KEYS[table]), chia nhỏ theo MAX_PAYLOAD_BYTES
+
+    Dùng khi không có bản ghi ORM, VD: khóa cũ của văn bản đổi số hiệu, văn bản bị xóa.
+    """
+    chunk, size = [], 0
+    for key in dict.fromkeys(key for key in keys if key):
+        length = len(json.dumps(key, ensure_ascii=False).encode('utf-8')) + 2
+        if chunk and size + length > MAX_PAYLOAD_BYTES:
+            _notify(session, table, chunk)
+            chunk, size = [], 0
+        chunk.append(key)
+        size += length
+    if chunk:
+        _notify(session, table, chunk)
+
+def _notify(session, table: str, keys: list):
+    payload = json.dumps({'table': table, 'keys': keys}, ensure_ascii=False)
+    session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+async def listen_for_changes(cache, invalidations: Invalidations, dsn: str, reconnect_delay: float = 5.0):
+    """LISTEN trên CHANNEL và xóa các khóa được báo khỏi cache (chạy nền trong API)
+
+    Khi mất kết nối có thể đã lỡ thông báo, nên cache được xóa hết mỗi lần kết nối lại.
+    """
+    import asyncpg
+
+    # Giữ tham chiếu đến task xóa khóa để không bị garbage collect khi chưa chạy xong
+    pending = set()
+
+    def on_notify(connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+            keys = [cache_key(message['table'], key) for key in message['keys']]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignored malformed {CHANNEL} payload: {payload[:200]}")
+            return
+        invalidations.mark(*keys)
+        task = asyncio.ensure_future(cache.delete(*keys))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            invalidations.mark_all()
+            await cache.clear()
+            await connection.add_listener(CHANNEL, on_notify)
+            logger.info(f"Listening for cache invalidations on {CHANNEL}")
+            await closed.wait()
+            logger.warning("Cache invalidation listener disconnected")
+        except asyncio.CancelledError:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener failed: {str(e)}")
+        await asyncio.sleep(reconnect_delay)
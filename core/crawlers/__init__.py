@@ -2,4 +2,5 @@ from .law_crawler import LawCrawler
 from .qa_crawler import QACrawler
 from .judgment_crawler import JudgmentCrawler
 from .crawl_manager import CrawlProcessingService
-from .search_crawler import SearchCrawler
\ No newline at end of file
+from .search_crawler import SearchCrawler
+from .recrawl_scheduler import RecrawlScheduler
\ No newline at end of file
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+class TokenBucket:
+    """Giới hạn tốc độ request (token/giây) cho một host"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Chờ đến khi có đủ 1 token"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncFetcher:
+    """Tải trang bằng aiohttp với semaphore giới hạn concurrency và token bucket theo host
+
+    Nếu truyền `cache` (DiskCache) thì dùng chung cache trên đĩa với HttpClient,
+    theo cùng quy ước `cache_mode` ('revalidate' hoặc 'offline').
+    """
+
+    def __init__(self, concurrency: int = 8, rate_per_host: float = 1.0, timeout: int = 30, headers: dict = None,
+                 cache=None, cache_mode: str = 'revalidate'):
+        self.cache = cache
+        self.cache_mode = cache_mode
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.timeout = timeout
+        self.headers = headers or DEFAULT_HEADERS
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._session = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._session.close()
+
+    def _get_bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate_per_host)
+        return self._buckets[host]
+
+    async def fetch_text(self, url: str) -> str:
+        """GET một URL và trả về nội dung text
+
+        Các thao tác DiskCache (đọc/ghi file, nén, evict) chạy trong thread pool
+        mặc định của event loop để không chặn các request khác.
+        """
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self.cache.get, url) if self.cache is not None else None
+        if entry is not None and self.cache_mode == 'offline':
+            return self._decode(entry.body, entry.meta.get('encoding'))
+
+        headers = self.cache.conditional_headers(entry) if entry is not None else {}
+        async with self._semaphore:
+            await self._get_bucket(url).acquire()
+            async with self._session.get(url, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    await loop.run_in_executor(None, self.cache.touch, url, response.headers)
+                    return self._decode(entry.body, entry.meta.get('encoding'))
+
+                response.raise_for_status()
+                body = await response.read()
+                encoding = response.get_encoding()
+                if self.cache is not None:
+                    await loop.run_in_executor(None, self.cache.put, url, body, response.headers, encoding)
+                return self._decode(body, encoding)
+
+    @staticmethod
+    def _decode(body: bytes, encoding: Optional[str]) -> str:
+        return body.decode(encoding or 'utf-8', errors='replace')
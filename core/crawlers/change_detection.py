@@ -0,0 +1,85 @@
+import os
+import re
+import json
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# HTML thô thay đổi theo giao diện trang (quảng cáo, script...) nên không đưa vào hash
+VOLATILE_FIELDS = {'content_html', 'metadata_html'}
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Khoảng kiểm tra ban đầu theo tuổi văn bản: (tuổi tối đa - ngày, khoảng kiểm tra - ngày)
+AGE_INTERVALS = ((30, 1), (365, 7), (5 * 365, 30))
+DEFAULT_INTERVAL_DAYS = 90
+
+MIN_INTERVAL_DAYS = float(os.getenv('RECRAWL_MIN_DAYS', 1))
+MAX_INTERVAL_DAYS = float(os.getenv('RECRAWL_MAX_DAYS', 180))
+
+def _normalize(value):
+    if isinstance(value, str):
+        return WHITESPACE_RE.sub(' ', value).strip()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+def content_hash(data: dict) -> str:
+    """SHA-256 của content_text và metadata đã chuẩn hóa (bỏ HTML thô, gộp khoảng trắng)"""
+    normalized = {k: _normalize(v) for k, v in data.items() if k not in VOLATILE_FIELDS}
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def document_date(data: dict) -> Optional[date]:
+    """Ngày ban hành (văn bản) hoặc ngày tuyên án (bản án)"""
+    value = data.get('issue_date') or data.get('judgment_date')
+    if isinstance(value, datetime):
+        return value.date()
+    return value if isinstance(value, date) else None
+
+def refresh_interval(published: Optional[date], previous: Optional[timedelta], changed: bool) -> timedelta:
+    """Khoảng thời gian đến lần kiểm tra tiếp theo
+
+    Lần đầu dựa vào tuổi văn bản: văn bản mới hay được sửa đổi, đổi tình trạng
+    hơn văn bản cũ. Các lần sau giảm một nửa nếu vừa thay đổi, gấp đôi nếu không.
+    """
+    if previous is None:
+        age = (date.today() - published).days if published else None
+        days = next(
+            (interval for max_age, interval in AGE_INTERVALS if age is not None and age < max_age),
+            DEFAULT_INTERVAL_DAYS
+        )
+    else:
+        previous_days = previous.total_seconds() / 86400
+        days = previous_days / 2 if changed else previous_days * 2
+
+    return timedelta(days=min(MAX_INTERVAL_DAYS, max(MIN_INTERVAL_DAYS, days)))
+
+def record_check(tracker, new_hash: Optional[str], published: Optional[date] = None, changed: bool = False,
+                 failed: bool = False):
+    """Cập nhật hash và lịch kiểm tra lại trên CrawlTracker (chưa commit)
+
+    `failed=True`: lần kiểm tra lỗi không cho biết văn bản có ổn định hay không,
+    nên giữ nguyên khoảng kiểm tra trước đó (chưa có thì thử lại sau MIN_INTERVAL_DAYS)
+    thay vì gấp đôi.
+    """
+    now = datetime.now()
+    previous = None
+    if tracker.last_checked_at and tracker.next_check_at:
+        previous = tracker.next_check_at - tracker.last_checked_at
+
+    if new_hash is not None:
+        tracker.content_hash = new_hash
+    if changed:
+        tracker.change_count = (tracker.change_count or 0) + 1
+    tracker.last_checked_at = now
+    if failed:
+        tracker.next_check_at = now + (previous or timedelta(days=MIN_INTERVAL_DAYS))
+    else:
+        tracker.next_check_at = now + refresh_interval(published, previous, changed)
@@ -1,22 +1,28 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List
 from multiprocessing import Pool, cpu_count
 from functools import partial
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select, update, and_, or_
 from sqlalchemy.orm import sessionmaker
 from core.database import DATABASE_URL
 from core.crawlers import JudgmentCrawler, LawCrawler
 from core.models import CrawlTracker
+from core.crawlers.write_buffer import WriteBehindBuffer
+from core.crawlers.change_detection import content_hash, document_date
 
 logger = logging.getLogger(__name__)
 
 class CrawlProcessingService:
-    def __init__(self, doc_type: str, batch_size=100, max_retries=3, num_processes=None):
+    def __init__(self, doc_type: str, batch_size=100, max_retries=3, num_processes=None,
+                 flush_size=50, flush_interval=30.0, lease_timeout=1800):
         self.doc_type = doc_type
+        self.lease_timeout = lease_timeout
         self.batch_size = batch_size
         self.max_retries = max_retries
         self.num_processes = num_processes or cpu_count()
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
         
         # Tạo engine mới với SSL configuration
         self.engine = create_engine(
@@ -34,29 +40,118 @@ class CrawlProcessingService:
         pending_ids = self._get_pending_ids()
         logger.info(f"Starting processing {len(pending_ids)} {self.doc_type} documents with {self.num_processes} processes")
 
-        # Tạo worker function với các tham số cần thiết
+        # Mỗi task là một nhóm ID, buffer của worker được flush khi kết thúc nhóm.
+        # Nhóm không lớn hơn flush_size và đủ nhỏ để chia đều cho các process.
+        chunk_size = max(1, min(self.flush_size, -(-len(pending_ids) // self.num_processes)))
+        chunks = [
+            pending_ids[i:i + chunk_size]
+            for i in range(0, len(pending_ids), chunk_size)
+        ]
         process_func = partial(
-            self._process_single_worker,
-            doc_type=self.doc_type,
-            db_url=DATABASE_URL,
-            max_retries=self.max_retries
+            self._process_chunk_worker,
+            doc_type=self.doc_type
         )
 
         with Pool(
             processes=self.num_processes,
             initializer=self._init_worker,
-            initargs=(DATABASE_URL, self.doc_type)
+            initargs=(DATABASE_URL, self.doc_type, self.max_retries, self.flush_size, self.flush_interval)
         ) as pool:
-            results = pool.map(process_func, pending_ids)
+            results = pool.map(process_func, chunks)
 
         success_count = sum(results)
         logger.info(f"Processing completed. Total success: {success_count}/{len(pending_ids)}")
         return success_count
 
+    def consume(self):
+        """Chế độ hàng đợi: mỗi worker tự claim từng lô bằng SELECT ... FOR UPDATE SKIP LOCKED
+
+        Các lô được đánh dấu 'processing' ngay khi claim nên nhiều tiến trình
+        `process --queue` (kể cả trên nhiều máy) có thể chạy song song trên cùng
+        backlog mà không xử lý trùng. Worker dừng khi không còn gì để claim.
+        Lô 'processing' quá `lease_timeout` giây (worker chết giữa chừng) được claim lại.
+        """
+        logger.info(f"Starting queue consumers for {self.doc_type} with {self.num_processes} processes")
+
+        consume_func = partial(
+            self._consume_worker,
+            doc_type=self.doc_type,
+            max_retries=self.max_retries,
+            claim_size=self.flush_size,
+            lease_timeout=self.lease_timeout
+        )
+
+        with Pool(
+            processes=self.num_processes,
+            initializer=self._init_worker,
+            initargs=(DATABASE_URL, self.doc_type, self.max_retries, self.flush_size, self.flush_interval)
+        ) as pool:
+            results = pool.map(consume_func, range(self.num_processes), chunksize=1)
+
+        success_count = sum(results)
+        logger.info(f"Queue drained. Total success: {success_count}")
+        return success_count
+
+    @staticmethod
+    def _claim_batch(session, doc_type: str, limit: int, max_retries: int, lease_timeout: int) -> List[int]:
+        """Claim nguyên tử tối đa `limit` tracker và chuyển sang 'processing', trả về danh sách id"""
+        now = datetime.now()
+        claimable = select(CrawlTracker.id).where(
+            CrawlTracker.document_type == doc_type,
+            or_(
+                and_(
+                    CrawlTracker.status.in_(['pending', 'failed']),
+                    CrawlTracker.retry_count < max_retries
+                ),
+                and_(
+                    CrawlTracker.status == 'processing',
+                    CrawlTracker.last_attempt < now - timedelta(seconds=lease_timeout)
+                )
+            )
+        ).order_by(CrawlTracker.created_at).limit(limit).with_for_update(skip_locked=True)
+
+        try:
+            claimed = session.execute(
+                update(CrawlTracker)
+                .where(CrawlTracker.id.in_(claimable.scalar_subquery()))
+                .values(status='processing', last_attempt=now)
+                .returning(CrawlTracker.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            session.commit()
+            return claimed
+        except Exception:
+            session.rollback()
+            raise
+
     @staticmethod
-    def _init_worker(db_url, doc_type):
-        # Khởi tạo engine và session riêng cho mỗi worker
-        global worker_engine, worker_session, worker_crawler
+    def _consume_worker(_, doc_type: str, max_retries: int, claim_size: int, lease_timeout: int) -> int:
+        """Claim và xử lý từng lô cho đến khi hàng đợi rỗng"""
+        session = worker_session
+        committed_before = worker_buffer.committed
+        try:
+            while True:
+                tracker_ids = CrawlProcessingService._claim_batch(
+                    session, doc_type, claim_size, max_retries, lease_timeout
+                )
+                if not tracker_ids:
+                    break
+
+                trackers = session.query(CrawlTracker).filter(
+                    CrawlTracker.id.in_(tracker_ids)
+                ).order_by(CrawlTracker.created_at).all()
+                for tracker in trackers:
+                    CrawlProcessingService._crawl_into_buffer(tracker, doc_type)
+                worker_buffer.flush()
+        finally:
+            worker_buffer.flush()
+            worker_crawler.http.log_connection_stats()
+        return worker_buffer.committed - committed_before
+
+    @staticmethod
+    def _init_worker(db_url, doc_type, max_retries=3, flush_size=50, flush_interval=30.0):
+        # Khởi tạo engine, session và write buffer riêng cho mỗi worker
+        global worker_engine, worker_session, worker_crawler, worker_buffer
         worker_engine = create_engine(
             db_url,
             connect_args={
@@ -68,6 +163,12 @@ class CrawlProcessingService:
         )
         worker_session = sessionmaker(bind=worker_engine)()
         worker_crawler = LawCrawler() if doc_type == 'law' else JudgmentCrawler()
+        worker_buffer = WriteBehindBuffer(
+            worker_session,
+            flush_size=flush_size,
+            flush_interval=flush_interval,
+            max_retries=max_retries
+        )
 
     def _get_pending_ids(self) -> List[str]:
         """Lấy danh sách ID từ database sử dụng connection riêng"""
@@ -84,50 +185,51 @@ class CrawlProcessingService:
             session.close()
 
     @staticmethod
-    def _process_single_worker(doc_id: str, doc_type: str, db_url: str, max_retries: int) -> int:
-        """Xử lý một document trong worker process"""
+    def _process_chunk_worker(doc_ids: List[str], doc_type: str) -> int:
+        """Xử lý một nhóm document, luôn flush buffer khi kết thúc (kể cả khi lỗi)"""
+        committed_before = worker_buffer.committed
         try:
-            session = worker_session
-            crawler = worker_crawler
+            for doc_id in doc_ids:
+                CrawlProcessingService._process_single_worker(doc_id, doc_type)
+        finally:
+            worker_buffer.flush()
+            worker_crawler.http.log_connection_stats()
+        return worker_buffer.committed - committed_before
+
+    @staticmethod
+    def _process_single_worker(doc_id: str, doc_type: str):
+        """Tìm tracker theo document_id rồi crawl vào write buffer của worker"""
+        session = worker_session
 
+        try:
             doc = session.query(CrawlTracker).filter_by(
                 document_id=doc_id,
                 document_type=doc_type
             ).first()
-
-            if not doc:
-                return 0
-
-            logger.info(f"Processing {doc_type} {doc_id} (attempt {doc.retry_count+1})")
-            
-            try:
-                # Thực hiện crawl và lưu dữ liệu
-                result = crawler.crawl(doc_id, saving=True)
-                
-                # Cập nhật trạng thái thành công
-                doc.status = 'success'
-                doc.last_attempt = datetime.now()
-                doc.retry_count = 0
-                doc.error_log = None
-                session.commit()
-                return 1
-                
-            except Exception as e:
-                # Xử lý lỗi và rollback transaction
-                session.rollback()
-                doc.retry_count += 1
-                doc.last_attempt = datetime.now()
-                doc.error_log = str(e)[:500]
-                doc.status = 'failed' if doc.retry_count >= max_retries else 'pending'
-                session.commit()
-                logger.error(f"Failed processing {doc_id}: {str(e)}")
-                return 0
-
         except Exception as e:
             logger.error(f"Critical error in worker: {str(e)}")
             session.rollback()
-            return 0
-        finally:
-            # Đóng session và reset connection
-            session.close()
-            worker_engine.dispose()
\ No newline at end of file
+            return
+
+        if not doc:
+            return
+
+        CrawlProcessingService._crawl_into_buffer(doc, doc_type)
+
+    @staticmethod
+    def _crawl_into_buffer(doc: CrawlTracker, doc_type: str):
+        """Crawl document của một tracker và đưa kết quả vào write buffer"""
+        crawler = worker_crawler
+        logger.info(f"Processing {doc_type} {doc.document_id} (attempt {doc.retry_count+1})")
+        
+        try:
+            # Crawl và đưa bản ghi vào buffer, việc ghi DB diễn ra khi flush
+            data = crawler.crawl(doc.document_id)
+            # Hash lần crawl đầu làm mốc cho RecrawlScheduler, được gán lúc flush. Tính trước
+            # build_record vì build_record sửa `data` (VD: gazette_date chuỗi -> datetime),
+            # còn RecrawlScheduler hash kết quả parse chưa qua build_record
+            new_hash, published = content_hash(data), document_date(data)
+            worker_buffer.add_success(doc, crawler.build_record(data), new_hash, published)
+        except Exception as e:
+            worker_buffer.add_failure(doc, e)
+            logger.error(f"Failed processing {doc.document_id}: {str(e)}")
@@ -0,0 +1,167 @@
+import os
+import json
+import zlib
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    def __init__(self, body: bytes, meta: dict):
+        self.body = body
+        self.meta = meta
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.meta.get('etag')
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.meta.get('last_modified')
+
+class DiskCache:
+    """Cache HTML thô trên đĩa, khóa theo sha256 của URL, nén zlib
+
+    Mỗi entry gồm `<key>.z` (body nén) và `<key>.json` (ETag, Last-Modified,
+    encoding...). Thời điểm truy cập được ghi vào mtime của file body; khi
+    tổng dung lượng vượt `max_bytes` các entry lâu không dùng nhất bị xóa (LRU).
+    Có thể gọi từ nhiều thread (AsyncFetcher chạy cache trong thread pool).
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        self.directory = directory or os.getenv('HTTP_CACHE_DIR', 'cache/http')
+        self.max_bytes = max_bytes or int(float(os.getenv('HTTP_CACHE_MAX_MB', 2048)) * 1024 * 1024)
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = self._scan_size()
+        self._size_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        folder = os.path.join(self.directory, key[:2])
+        return folder, os.path.join(folder, f"{key}.z"), os.path.join(folder, f"{key}.json")
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        _, body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = zlib.decompress(f.read())
+            os.utime(body_path)  # Đánh dấu vừa được dùng cho LRU
+            return CacheEntry(body, meta)
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def put(self, url: str, body: bytes, headers: Dict[str, str], encoding: Optional[str] = None):
+        folder, body_path, meta_path = self._paths(url)
+        os.makedirs(folder, exist_ok=True)
+        meta = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': headers.get('Content-Type'),
+            'encoding': encoding,
+            'stored_at': time.time()
+        }
+        compressed = zlib.compress(body, 6)
+        old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+
+        # Ghi ra file tạm rồi rename để các process khác không đọc phải file dở dang
+        self._atomic_write(folder, body_path, compressed)
+        self._atomic_write(folder, meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+        with self._size_lock:
+            self._size += len(compressed) - old_size
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def touch(self, url: str, headers: Dict[str, str]):
+        """Cập nhật metadata sau khi server trả 304"""
+        _, _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            meta['etag'] = headers.get('ETag') or meta.get('etag')
+            meta['last_modified'] = headers.get('Last-Modified') or meta.get('last_modified')
+            meta['validated_at'] = time.time()
+            self._atomic_write(os.path.dirname(meta_path), meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def evict(self):
+        """Xóa các entry ít được dùng gần đây nhất cho đến khi còn 90% max_bytes"""
+        # Chỉ một thread evict tại một thời điểm, các thread khác bỏ qua
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            self._evict()
+        finally:
+            self._evict_lock.release()
+
+    def _evict(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.z'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        with self._size_lock:
+            self._size = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if self._size <= target:
+                break
+            for p in (path, path[:-2] + '.json'):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            with self._size_lock:
+                self._size -= size
+            removed += 1
+        if removed:
+            logger.info(f"HTTP cache evicted {removed} entries, size now {self._size / 1024 / 1024:.1f} MB")
+
+    def _scan_size(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.z'):
+                    try:
+                        total += os.path.getsize(os.path.join(root, name))
+                    except OSError:
+                        pass
+        return total
+
+    @staticmethod
+    def _atomic_write(folder: str, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
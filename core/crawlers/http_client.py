@@ -0,0 +1,141 @@
+import os
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+from core.crawlers.http_cache import DiskCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+class HttpClient:
+    """HTTP client dùng chung cho các crawler: connection pool, keep-alive, retry/backoff
+
+    Cấu hình mặc định lấy từ biến môi trường HTTP_POOL_SIZE, HTTP_TIMEOUT,
+    HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR.
+
+    cache_mode (HTTP_CACHE_MODE):
+        - 'revalidate': dùng cache trên đĩa, gửi If-None-Match/If-Modified-Since
+        - 'offline': trả thẳng bản trong cache nếu có, không gọi mạng
+        - 'off': không dùng cache
+    """
+
+    def __init__(self, pool_size=None, timeout=None, max_retries=None, backoff_factor=None, headers=None,
+                 log_every=100, cache_mode=None, cache=None):
+        self.pool_size = pool_size or int(os.getenv('HTTP_POOL_SIZE', 10))
+        self.timeout = timeout or float(os.getenv('HTTP_TIMEOUT', 30))
+        self.log_every = log_every
+        self._request_count = 0
+        self.cache_mode = cache_mode or get_cache_mode()
+        self.cache = cache or (DiskCache() if self.cache_mode != 'off' else None)
+        self.cache_hits = 0
+
+        retry = Retry(
+            total=max_retries if max_retries is not None else int(os.getenv('HTTP_MAX_RETRIES', 3)),
+            backoff_factor=backoff_factor if backoff_factor is not None else float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5)),
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET qua session dùng chung (tái sử dụng kết nối keep-alive), có cache trên đĩa"""
+        kwargs.setdefault('timeout', self.timeout)
+        entry = self.cache.get(url) if self.cache is not None else None
+
+        if entry is not None and self.cache_mode == 'offline':
+            self.cache_hits += 1
+            return self._cached_response(url, entry)
+
+        if entry is not None:
+            headers = dict(kwargs.pop('headers', None) or {})
+            headers.update(self.cache.conditional_headers(entry))
+            kwargs['headers'] = headers
+
+        response = self.session.get(url, **kwargs)
+
+        self._request_count += 1
+        if self.log_every and self._request_count % self.log_every == 0:
+            self.log_connection_stats()
+
+        if self.cache is not None:
+            if response.status_code == 304 and entry is not None:
+                self.cache.touch(url, response.headers)
+                self.cache_hits += 1
+                return self._cached_response(url, entry)
+            if response.status_code == 200:
+                self.cache.put(url, response.content, response.headers, response.encoding)
+        return response
+
+    @staticmethod
+    def _cached_response(url: str, entry) -> requests.Response:
+        """Dựng lại Response từ entry trong cache"""
+        response = requests.Response()
+        response._content = entry.body
+        response.status_code = 200
+        response.from_cache = True  # 304 hoặc offline: nội dung không đổi so với cache
+        response.url = url
+        response.encoding = entry.meta.get('encoding')
+        if entry.meta.get('content_type'):
+            response.headers['Content-Type'] = entry.meta['content_type']
+        return response
+
+    def connection_stats(self) -> dict:
+        """Thống kê số kết nối mới so với số request để tính tỷ lệ tái sử dụng kết nối"""
+        pools = self.adapter.poolmanager.pools
+        new_connections = 0
+        total_requests = 0
+        for key in pools.keys():
+            pool = pools[key]
+            new_connections += pool.num_connections
+            total_requests += pool.num_requests
+
+        return {
+            'requests': total_requests,
+            'new_connections': new_connections,
+            'reuse_rate': 1 - new_connections / total_requests if total_requests else 0.0,
+            'cache_hits': self.cache_hits
+        }
+
+    def log_connection_stats(self):
+        stats = self.connection_stats()
+        logger.info(
+            f"HTTP connection reuse: {stats['reuse_rate']:.1%} "
+            f"({stats['new_connections']} new connections / {stats['requests']} requests), "
+            f"cache hits: {stats['cache_hits']}"
+        )
+
+    def close(self):
+        self.session.close()
+
+def get_cache_mode() -> str:
+    return os.getenv('HTTP_CACHE_MODE', 'revalidate')
+
+_clients = {}
+
+def get_http_client() -> HttpClient:
+    """Trả về HttpClient dùng chung trong process hiện tại
+
+    Mỗi process (kể cả worker của multiprocessing.Pool) có client riêng để
+    không chia sẻ socket qua fork.
+    """
+    pid = os.getpid()
+    if pid not in _clients:
+        _clients[pid] = HttpClient()
+    return _clients[pid]
@@ -1,6 +1,6 @@
-import requests
-from bs4 import BeautifulSoup
 from core.database import DatabaseManager
+from core.crawlers.http_client import get_http_client
+from core.utils.html_parser import make_soup, get_parser_backend
 from core.models import Judgment
 import logging
 from datetime import datetime
@@ -13,34 +13,20 @@ class JudgmentCrawler:
     def __init__(self):
         self.base_url = "https://thuvienphapluat.vn/banan/ban-an/x"
         self.db = DatabaseManager()
+        self.http = get_http_client()
+        self.parser_backend = get_parser_backend()
+
+    def url_for(self, judgment_id: str) -> str:
+        return f"{self.base_url}-{judgment_id}"
 
     def crawl(self, judgment_id: str, saving = False):
         try:
-            url = f"{self.base_url}-{judgment_id}"
-            response = requests.get(url)
+            url = self.url_for(judgment_id)
+            response = self.http.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Lấy metadata từ ul.list-group.detail-item
-            metadata_section = soup.find("ul", class_="list-group detail-item")
-            
-            # Lấy nội dung chính từ div#vanban_content
-            content_div = soup.find("div", id="vanban_content")
-            
-            data = {
-                'case_name': self._extract_metadata(metadata_section, 'Tên bản án:'),
-                'case_number': self._extract_metadata(metadata_section, 'Số hiệu:'),
-                'issuing_authority': self._extract_authority(metadata_section),
-                'trial_level': self._extract_metadata(metadata_section, 'Cấp xét xử:'),
-                'field': self._extract_metadata(metadata_section, 'Lĩnh vực:'),
-                'judgment_date': self._extract_date(metadata_section),
-                'keywords': self._extract_keywords(metadata_section),
-                'metadata_html': str(metadata_section) if metadata_section else None,  # Lưu metadata raw
-                'content_html': str(content_div) if content_div else None,  # Lưu content raw
-                'content_text': self._clean_content(content_div),
-                'related_parties': self._extract_parties(soup)
-            }
+            data = self.parse(response.content)
+            data['source_id'] = judgment_id
             
             if saving:
                 self._save_to_db(data)
@@ -51,6 +37,30 @@ class JudgmentCrawler:
             logger.error(f"Failed to crawl judgment {judgment_id}: {str(e)}")
             raise
 
+    def parse(self, html) -> dict:
+        """Trích xuất dữ liệu bản án từ HTML trang chi tiết"""
+        soup = make_soup(html, self.parser_backend)
+        
+        # Lấy metadata từ ul.list-group.detail-item
+        metadata_section = soup.find("ul", class_="list-group detail-item")
+        
+        # Lấy nội dung chính từ div#vanban_content
+        content_div = soup.find("div", id="vanban_content")
+        
+        return {
+            'case_name': self._extract_metadata(metadata_section, 'Tên bản án:'),
+            'case_number': self._extract_metadata(metadata_section, 'Số hiệu:'),
+            'issuing_authority': self._extract_authority(metadata_section),
+            'trial_level': self._extract_metadata(metadata_section, 'Cấp xét xử:'),
+            'field': self._extract_metadata(metadata_section, 'Lĩnh vực:'),
+            'judgment_date': self._extract_date(metadata_section),
+            'keywords': self._extract_keywords(metadata_section),
+            'metadata_html': str(metadata_section) if metadata_section else None,  # Lưu metadata raw
+            'content_html': str(content_div) if content_div else None,  # Lưu content raw
+            'content_text': self._clean_content(content_div),
+            'related_parties': self._extract_parties(soup)
+        }
+
     def _extract_metadata(self, metadata_section, label: str) -> str:
         """Trích xuất metadata với cơ chế tìm kiếm chính xác"""
         if not metadata_section:
@@ -129,12 +139,16 @@ class JudgmentCrawler:
         
         return parties
         
+    def build_record(self, data: dict) -> Judgment:
+        """Tạo Judgment từ dữ liệu crawl (chưa lưu)"""
+        return Judgment(**data)
+
     def _save_to_db(self, data: dict):
         """Lưu dữ liệu vào database"""
         with DatabaseManager() as db:
             try:
-                judgment = Judgment(**data)
-                db.insert_data(judgment)
+                judgment = self.build_record(data)
+                db.upsert_data(judgment)
                 db.commit()
                 logger.info("Data saved to database successfully")
             except Exception as e:
@@ -1,46 +1,38 @@
 # core/crawlers/law_crawler.py
-import requests
-from bs4 import BeautifulSoup
 from core.database import DatabaseManager
+from core.crawlers.http_client import get_http_client
+from core.utils.html_parser import make_soup, get_parser_backend
 from core.models import LegalDocument
 import logging
 from datetime import datetime
 from typing import Optional
+import copy
 import re
 
 logger = logging.getLogger(__name__)
 
+GAZETTE_LABELS = ('Ngày công báo:', 'Số công báo:')
+WHITESPACE_RE = re.compile(r'\s+')
+DATE_RE = re.compile(r"\d{2}/\d{2}/\d{4}")
+
 class LawCrawler:
     def __init__(self):
         self.base_url = "https://thuvienphapluat.vn/van-ban/Xay-dung-Do-thi/x"  # URL gốc cho văn bản pháp luật
         self.db = DatabaseManager()
+        self.http = get_http_client()
+        self.parser_backend = get_parser_backend()
+
+    def url_for(self, document_id: str) -> str:
+        return f"{self.base_url}-{document_id}.aspx"
 
     def crawl(self, document_id: str, saving=False):
         try:
-            url = f"{self.base_url}-{document_id}.aspx"
-            response = requests.get(url)
+            url = self.url_for(document_id)
+            response = self.http.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Lấy các phần chính
-            metadata_section = soup.find("div", {"id" : "divThuocTinh"})
-            content_div = soup.find("div", class_ = "content1")
-
-            data = {
-                'document_number': self._extract_metadata(metadata_section, 'Số hiệu:'),
-                'document_type': self._extract_metadata(metadata_section, 'Loại văn bản:'),
-                'issuing_authority': self._extract_metadata(metadata_section, 'Nơi ban hành:'),
-                'signer': self._extract_metadata(metadata_section, 'Người ký:'),
-                'issue_date': self._extract_date(metadata_section, 'Ngày ban hành:'),
-                'effective_date': self._extract_effective_date(metadata_section),
-                'gazette_date': self._extract_gazette_info(metadata_section, 'date'),
-                'gazette_number': self._extract_gazette_info(metadata_section, 'number'),
-                'status': self._extract_status(metadata_section),
-                'content_html': str(content_div) if content_div else None,
-                'content_text': self._clean_content(content_div),
-                'metadata_html': str(metadata_section) if metadata_section else None,
-            }
+            data = self.parse(response.content)
+            data['source_id'] = document_id
 
             if saving:
                 self._save_to_db(data)
@@ -52,46 +44,92 @@ class LawCrawler:
             logger.error(f"Failed to crawl document {document_id}: {str(e)}")
             raise
 
-    def _extract_metadata(self, metadata_section, label: str) -> str:
-        """Trích xuất metadata từ bảng thuộc tính - Phiên bản đã sửa"""
-        if not metadata_section:
-            return ""
+    def parse(self, html) -> dict:
+        """Trích xuất dữ liệu văn bản từ HTML trang chi tiết"""
+        soup = make_soup(html, self.parser_backend)
         
+        # Lấy các phần chính
+        metadata_section = soup.find("div", {"id" : "divThuocTinh"})
+        content_div = soup.find("div", class_ = "content1")
+
+        # Duyệt bảng thuộc tính một lần, các trường bên dưới chỉ đọc từ map
+        properties = self._build_property_map(metadata_section)
+
+        data = {
+            'document_number': self._extract_metadata(properties, 'Số hiệu:'),
+            'document_type': self._extract_metadata(properties, 'Loại văn bản:'),
+            'issuing_authority': self._extract_metadata(properties, 'Nơi ban hành:'),
+            'signer': self._extract_metadata(properties, 'Người ký:'),
+            'issue_date': self._extract_date(properties, 'Ngày ban hành:'),
+            'effective_date': self._extract_effective_date(properties),
+            'gazette_date': self._extract_gazette_info(properties, 'date'),
+            'gazette_number': self._extract_gazette_info(properties, 'number'),
+            'status': self._extract_status(properties),
+            'content_html': str(content_div) if content_div else None,
+            'content_text': self._clean_content(content_div),
+            'metadata_html': str(metadata_section) if metadata_section else None,
+        }
+        return data
+
+    def _build_property_map(self, metadata_section) -> dict:
+        """Duyệt bảng thuộc tính (divThuocTinh) một lần thành map label -> giá trị
+
+        - Label dạng <b>Số hiệu:</b>: giá trị là ô <td> kế tiếp, bỏ qua text trong
+          span/a/div. Giữ lần xuất hiện đầu tiên của mỗi label.
+        - Label công báo dạng <td>Ngày công báo:</td>: lưu với khóa chữ thường
+          không có dấu ':' ('ngày công báo', 'số công báo').
+        Cây HTML không bị thay đổi nên metadata_html giữ nguyên bản gốc.
+        """
+        properties = {}
+        if not metadata_section:
+            return properties
+
         try:
-            # Tìm thẻ <b> chứa label chính xác
-            label_b = metadata_section.find('b', string=lambda t: t and t.strip() == label)
-            
-            if label_b:
-                # Đi đến thẻ <td> cha chứa label
-                label_td = label_b.find_parent('td')
-                
-                if label_td:
-                    # Di chuyển đến ô giá trị liền kề (td kế tiếp)
-                    value_td = label_td.find_next_sibling('td')
-                    
+            for tag in metadata_section.find_all(['b', 'td']):
+                label = tag.string.strip() if tag.string else None
+                if not label:
+                    continue
+
+                if tag.name == 'b':
+                    if label in properties:
+                        continue
+                    label_td = tag.find_parent('td')
+                    value_td = label_td.find_next_sibling('td') if label_td else None
+                    properties[label] = self._metadata_value(value_td) if value_td else ""
+
+                if tag.name == 'td' and label in GAZETTE_LABELS:
+                    value_td = tag.find_next_sibling('td')
                     if value_td:
-                        # Lọc các element con không cần thiết
-                        for element in value_td.find_all(['span', 'a', 'div']):
-                            element.decompose()
-                        
-                        # Lấy text và làm sạch
-                        text = value_td.get_text(" ", strip=True)
-                        
-                        # Xử lý các trường hợp đặc biệt
-                        if any(x in text for x in ["Đang cập nhật", "Chưa xác định"]):
-                            return ""
-                        
-                        return re.sub(r'\s+', ' ', text).strip()
-            
-            return ""
-        
+                        value = value_td.get_text(" ", strip=True)
+                        key = tag.get_text(strip=True).replace(':', '').lower()
+                        properties[key] = value if value not in ["Đang cập nhật", "Chưa công bố"] else ""
         except Exception as e:
-            logger.error(f"Lỗi trích xuất metadata '{label}': {str(e)}", exc_info=True)
+            logger.error(f"Lỗi đọc bảng thuộc tính: {str(e)}", exc_info=True)
+
+        return properties
+
+    @staticmethod
+    def _metadata_value(value_td) -> str:
+        """Lấy text của ô giá trị, bỏ qua span/a/div mà không decompose cây gốc"""
+        value_td = copy.copy(value_td)
+        for element in value_td.find_all(['span', 'a', 'div']):
+            element.decompose()
+        
+        text = value_td.get_text(" ", strip=True)
+        
+        # Xử lý các trường hợp đặc biệt
+        if any(x in text for x in ["Đang cập nhật", "Chưa xác định"]):
             return ""
+        
+        return WHITESPACE_RE.sub(' ', text).strip()
+
+    def _extract_metadata(self, properties: dict, label: str) -> str:
+        """Đọc giá trị metadata theo label từ map thuộc tính"""
+        return properties.get(label, "")
 
-    def _extract_date(self, metadata_section, label: str) -> Optional[datetime]:
+    def _extract_date(self, properties: dict, label: str) -> Optional[datetime]:
         """Trích xuất ngày tháng từ định dạng dd/mm/yyyy"""
-        date_str = self._extract_metadata(metadata_section, label)
+        date_str = self._extract_metadata(properties, label)
         
         # Xử lý các trường hợp đặc biệt
         if not date_str or date_str.lower() in ["đang cập nhật", "không xác định"]:
@@ -103,50 +141,29 @@ class LawCrawler:
             logger.warning(f"Định dạng ngày không hợp lệ: {date_str}")
             return None
 
-    def _extract_effective_date(self, metadata_section) -> Optional[datetime]:
+    def _extract_effective_date(self, properties: dict) -> Optional[datetime]:
         """Trích xuất ngày hiệu lực theo cấu trúc mới"""
-        effective_str = self._extract_metadata(metadata_section, 'Ngày hiệu lực:')
+        effective_str = self._extract_metadata(properties, 'Ngày hiệu lực:')
         
         # Xử lý giá trị mặc định
         if effective_str in ["Đã biết", "Liên hệ"]:
             return None
         
         # Trích xuất từ các định dạng phức tạp
-        match = re.search(r"\d{2}/\d{2}/\d{4}", effective_str)
+        match = DATE_RE.search(effective_str)
         return datetime.strptime(match.group(), "%d/%m/%Y") if match else None
 
-    def _extract_gazette_info(self, metadata_section, info_type: str) -> str:
-        """Trích xuất thông tin công báo phiên bản mới - Cập nhật cho cấu trúc HTML mới"""
-        try:
-            # Tìm tất cả các thẻ td chứa label
-            tds = metadata_section.find_all('td', string=lambda t: t and t.strip() in ['Ngày công báo:', 'Số công báo:'])
-            
-            info_map = {}
-            
-            for td in tds:
-                label = td.get_text(strip=True).replace(':', '').lower()
-                value_td = td.find_next_sibling('td')
-                
-                if value_td:
-                    # Làm sạch dữ liệu
-                    value = value_td.get_text(" ", strip=True)
-                    info_map[label] = value if value not in ["Đang cập nhật", "Chưa công bố"] else ""
-            
-            # Xử lý theo info_type yêu cầu
-            if info_type == 'date':
-                return info_map.get('ngày công báo', "")
-            elif info_type == 'number':
-                return info_map.get('số công báo', "")
-            
-            return ""
-        
-        except Exception as e:
-            logger.error(f"Lỗi trích xuất thông tin công báo: {str(e)}", exc_info=True)
-            return ""
+    def _extract_gazette_info(self, properties: dict, info_type: str) -> str:
+        """Đọc thông tin công báo từ map thuộc tính"""
+        if info_type == 'date':
+            return properties.get('ngày công báo', "")
+        elif info_type == 'number':
+            return properties.get('số công báo', "")
+        return ""
 
-    def _extract_status(self, metadata_section) -> str:
+    def _extract_status(self, properties: dict) -> str:
         """Phân loại trạng thái hiệu lực theo tiêu chí mới"""
-        status_str = self._extract_metadata(metadata_section, 'Tình trạng:').lower()
+        status_str = self._extract_metadata(properties, 'Tình trạng:').lower()
         
         status_map = {
             'còn hiệu lực': 'valid',
@@ -181,22 +198,26 @@ class LawCrawler:
         
         return '\n\n'.join(cleaned_lines)
 
+    def build_record(self, data: dict) -> LegalDocument:
+        """Chuẩn hóa dữ liệu crawl và tạo LegalDocument (chưa lưu)"""
+        # Xử lý dữ liệu ngày tháng
+        date_fields = ['issue_date', 'effective_date', 'gazette_date']
+        for field in date_fields:
+            if isinstance(data.get(field), str):
+                data[field] = self._parse_flexible_date(data[field])
+        
+        # Xử lý giá trị mặc định
+        data.setdefault('status', 'unknown')
+        data['gazette_number'] = data.get('gazette_number') or ""
+        
+        return LegalDocument(**data)
+
     def _save_to_db(self, data: dict):
         """Phiên bản cải tiến xử lý lưu dữ liệu"""
         with DatabaseManager() as db:
             try:
-                # Xử lý dữ liệu ngày tháng
-                date_fields = ['issue_date', 'effective_date', 'gazette_date']
-                for field in date_fields:
-                    if isinstance(data.get(field), str):
-                        data[field] = self._parse_flexible_date(data[field])
-                
-                # Xử lý giá trị mặc định
-                data.setdefault('status', 'unknown')
-                data['gazette_number'] = data.get('gazette_number') or ""
-                
-                document = LegalDocument(**data)
-                db.insert_data(document)
+                document = self.build_record(data)
+                db.upsert_data(document)
                 logger.info(f"Đã lưu văn bản {data['document_number']}")
                 
             except Exception as e:
@@ -0,0 +1,86 @@
+import threading
+from typing import List, Optional
+
+# Giới hạn an toàn số trang khi không chỉ định end_page
+DEFAULT_MAX_PAGES = 50000
+
+class PageScheduler:
+    """Cấp phát trang danh sách cho các worker theo lô nhỏ từ một bộ đếm chung
+
+    Worker rảnh lấy lô tiếp theo nên không process nào bị bỏ trống khi process
+    khác còn dở. Khi thấy `max_empty_pages` trang trống liên tiếp thì dừng toàn
+    cục: không cấp thêm trang sau chuỗi trang trống đó. Trang lỗi (HTTP 404/5xx,
+    timeout) nằm sau trang cuối cùng có ID (frontier) cũng được tính vào chuỗi,
+    vì trang quá cuối danh sách thường trả lỗi thay vì trang trống.
+    `end_page=None` là crawl đến khi hết danh sách, tối đa `max_pages` trang.
+
+    `state`/`lock` mặc định là dict/Lock trong process (dùng cho chế độ async);
+    chế độ pool truyền `Manager().dict()`/`Manager().Lock()` để chia sẻ giữa các process.
+    """
+
+    def __init__(self, start_page: int = 1, end_page: Optional[int] = None, max_empty_pages: int = 3,
+                 batch_size: int = 2, state=None, lock=None, max_pages: int = DEFAULT_MAX_PAGES):
+        self.start_page = start_page
+        self.max_empty_pages = max_empty_pages
+        self.batch_size = max(1, batch_size)
+        self.state = state if state is not None else {}
+        self.lock = lock or threading.Lock()
+        self.state.update({
+            'next_page': start_page,
+            'stop_page': end_page + 1 if end_page is not None else start_page + max_pages,
+            'empty_pages': [],
+            'frontier': start_page - 1
+        })
+
+    def next_batch(self) -> List[int]:
+        """Lấy lô trang tiếp theo, trả về [] khi đã hết trang cần crawl"""
+        with self.lock:
+            start = self.state['next_page']
+            end = min(start + self.batch_size, self.state['stop_page'])
+            if end <= start:
+                return []
+            self.state['next_page'] = end
+            return list(range(start, end))
+
+    def is_stopped(self, page: int) -> bool:
+        """Trang nằm sau điểm dừng (đã cấp trước khi phát hiện chuỗi trang trống)"""
+        return page >= self.state['stop_page']
+
+    def mark_found(self, page: int):
+        """Ghi nhận trang có ID: lỗi ở các trang trước đó không còn được tính là hết danh sách"""
+        with self.lock:
+            self.state['frontier'] = max(self.state['frontier'], page)
+
+    def mark_failed(self, page: int):
+        """Ghi nhận trang lỗi; chỉ tính như trang trống nếu nằm sau frontier"""
+        if page > self.state['frontier']:
+            self.mark_empty(page)
+
+    def mark_empty(self, page: int):
+        """Ghi nhận trang trống; đặt điểm dừng nếu tạo thành chuỗi đủ dài"""
+        with self.lock:
+            empty_pages = set(self.state['empty_pages'])
+            empty_pages.add(page)
+            self.state['empty_pages'] = sorted(empty_pages)
+
+            run_start = page
+            while run_start - 1 in empty_pages:
+                run_start -= 1
+            run_end = page
+            while run_end + 1 in empty_pages:
+                run_end += 1
+
+            run_length = run_end - run_start + 1
+
+        if run_length >= self.max_empty_pages:
+            self.stop_after(run_end)
+
+    def stop_after(self, page: int):
+        """Không cấp thêm trang nào sau `page`"""
+        with self.lock:
+            self.state['stop_page'] = min(self.state['stop_page'], page + 1)
+
+    @property
+    def last_page(self) -> int:
+        """Trang cuối cùng đã được cấp"""
+        return self.state['next_page'] - 1
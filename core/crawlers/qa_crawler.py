@@ -1,6 +1,6 @@
-import requests
-from bs4 import BeautifulSoup
+from core.utils.html_parser import make_soup
 from core.database import DatabaseManager
+from core.crawlers.http_client import get_http_client
 from core.models import LegalQA
 import logging
 
@@ -10,14 +10,15 @@ class QACrawler:
     def __init__(self):
         self.base_url = "https://thuvienphapluat.vn/hoidap"
         self.db = DatabaseManager()
+        self.http = get_http_client()
 
     def crawl(self, question_id: str):
         try:
             url = f"{self.base_url}/{question_id}"
-            response = requests.get(url)
+            response = self.http.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
             
             data = {
                 'question_html': self._extract_question(soup),
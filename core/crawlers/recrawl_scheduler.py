@@ -0,0 +1,106 @@
+import time
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import List
+from sqlalchemy import or_
+from core.database import SessionLocal
+from core.models import CrawlTracker
+from core.crawlers.law_crawler import LawCrawler
+from core.crawlers.judgment_crawler import JudgmentCrawler
+from core.crawlers.write_buffer import WriteBehindBuffer
+from core.crawlers.change_detection import content_hash, document_date, record_check
+
+logger = logging.getLogger(__name__)
+
+class RecrawlScheduler:
+    """Kiểm tra lại các document đã crawl theo lịch, chỉ ghi DB khi nội dung thay đổi
+
+    Mỗi tracker 'success' có next_check_at (xem change_detection.refresh_interval).
+    Trang được tải bằng conditional GET qua cache HTTP: 304 nghĩa là không đổi nên
+    không cần parse. Nếu tải về nội dung mới thì so hash đã chuẩn hóa với
+    content_hash đã lưu; chỉ document có hash khác mới được ghi qua WriteBehindBuffer.
+    """
+
+    def __init__(self, doc_type: str, batch_size: int = 100, flush_size: int = 50, delay: float = 1.0):
+        self.doc_type = doc_type
+        self.batch_size = batch_size
+        self.flush_size = flush_size
+        self.delay = delay
+        self.crawler = LawCrawler() if doc_type == 'law' else JudgmentCrawler()
+
+    def run(self, limit: int = None) -> dict:
+        """Kiểm tra các document đến hạn (tối đa `limit`), trả về thống kê theo kết quả"""
+        stats = Counter()
+        seen = set()
+        session = SessionLocal()
+        buffer = WriteBehindBuffer(session, flush_size=self.flush_size)
+
+        try:
+            while limit is None or stats['checked'] < limit:
+                size = self.batch_size if limit is None else min(self.batch_size, limit - stats['checked'])
+                # Tracker đã kiểm tra trong lần chạy này (VD: lô bị rollback) không lấy lại
+                trackers = [t for t in self._due(session, size) if t.id not in seen]
+                if not trackers:
+                    break
+
+                for tracker in trackers:
+                    seen.add(tracker.id)
+                    time.sleep(self.delay)
+                    stats[self._check(tracker, buffer)] += 1
+                    stats['checked'] += 1
+
+                # Commit cả lịch kiểm tra của các tracker không đổi
+                buffer.flush()
+                session.commit()
+        finally:
+            buffer.flush()
+            session.close()
+            self.crawler.http.log_connection_stats()
+
+        logger.info(f"Recrawl {self.doc_type} completed: {dict(stats)}")
+        return dict(stats)
+
+    def _due(self, session, limit: int) -> List[CrawlTracker]:
+        return session.query(CrawlTracker).filter(
+            CrawlTracker.document_type == self.doc_type,
+            CrawlTracker.status == 'success',
+            or_(
+                CrawlTracker.next_check_at.is_(None),
+                CrawlTracker.next_check_at <= datetime.now()
+            )
+        ).order_by(CrawlTracker.next_check_at.asc().nullsfirst()).limit(limit).all()
+
+    def _check(self, tracker: CrawlTracker, buffer: WriteBehindBuffer) -> str:
+        """Kiểm tra một document, trả về 'not_modified', 'unchanged', 'baseline', 'changed' hoặc 'failed'"""
+        try:
+            response = self.crawler.http.get(self.crawler.url_for(tracker.document_id))
+            response.raise_for_status()
+
+            if getattr(response, 'from_cache', False) and tracker.content_hash:
+                record_check(tracker, None)
+                return 'not_modified'
+
+            data = self.crawler.parse(response.content)
+            data['source_id'] = tracker.document_id
+            new_hash = content_hash(data)
+            published = document_date(data)
+
+            if tracker.content_hash is None:
+                # Document crawl trước khi có hash: chỉ lưu mốc để so sánh lần sau
+                record_check(tracker, new_hash, published)
+                return 'baseline'
+            if new_hash == tracker.content_hash:
+                record_check(tracker, new_hash, published)
+                return 'unchanged'
+
+            logger.info(f"{self.doc_type} {tracker.document_id} changed, saving new version")
+            buffer.add_success(tracker, self.crawler.build_record(data), new_hash, published, changed=True)
+            return 'changed'
+
+        except Exception as e:
+            logger.error(f"Failed to recheck {tracker.document_id}: {str(e)}")
+            tracker.last_attempt = datetime.now()
+            tracker.error_log = str(e)[:500]
+            record_check(tracker, None, failed=True)
+            return 'failed'
@@ -1,12 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
-from core.database import DatabaseManager, SessionLocal
-from core.models import CrawlTracker
+from core.utils.html_parser import make_soup
+from core.database import DatabaseManager, SessionLocal, engine
+from core.models import CrawlTracker, CrawlState
+from sqlalchemy.dialects.postgresql import insert
+from core.crawlers.http_client import get_http_client
+from core.crawlers.page_scheduler import PageScheduler, DEFAULT_MAX_PAGES
 import logging
 from datetime import datetime
 from typing import List
-from multiprocessing import Pool, cpu_count
+from multiprocessing import Pool, Manager, cpu_count
 from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import time
 
 logger = logging.getLogger(__name__)
@@ -25,118 +29,270 @@ class SearchCrawler:
             'judgment': "https://thuvienphapluat.vn/banan/tim-ban-an?type_q=0&sortType=1&Category=0&page={page}"
         }[self.doc_type]
 
-    def crawl_ids(self, start_page=1, end_page=None, max_empty_pages=3, delay=2, num_processes=None):
+    def crawl_ids(self, start_page=1, end_page=None, max_empty_pages=3, delay=2, num_processes=None, batch_size=2,
+                  incremental=False, max_pages=DEFAULT_MAX_PAGES):
+        """Crawl ID bằng multiprocessing.Pool
+
+        Các process lấy lô `batch_size` trang từ PageScheduler dùng chung và dừng
+        khi gặp `max_empty_pages` trang trống (hoặc lỗi sau trang cuối có ID) liên tiếp.
+        `end_page=None` là crawl đến khi hết danh sách, tối đa `max_pages` trang.
+
+        incremental=True: dừng ở trang đầu tiên chỉ gồm ID đã biết hoặc chứa
+        high-water mark của lần chạy trước (danh sách sắp mới nhất trước).
+        """
         num_processes = num_processes or cpu_count()
-        page_ranges = self._split_page_range(start_page, end_page, num_processes)
+        mark = self._load_high_water_mark() if incremental else None
         
         logger.info(f"Starting crawling with {num_processes} processes")
         
-        with Pool(
-            processes=num_processes,
-            initializer=self._init_worker,
-            initargs=(self.doc_type,)
-        ) as pool:
-            results = pool.map(
-                partial(
-                    self._process_page_range,
-                    max_empty_pages=max_empty_pages,
-                    delay=delay
-                ),
-                page_ranges
+        with Manager() as manager:
+            scheduler = PageScheduler(
+                start_page, end_page, max_empty_pages, batch_size,
+                state=manager.dict(), lock=manager.Lock(), max_pages=max_pages
             )
+            with Pool(
+                processes=num_processes,
+                initializer=self._init_worker,
+                initargs=(self.doc_type,)
+            ) as pool:
+                results = pool.map(
+                    partial(
+                        self._process_pages,
+                        scheduler=scheduler,
+                        delay=delay,
+                        incremental=incremental,
+                        mark=mark
+                    ),
+                    range(num_processes)
+                )
+            last_page = scheduler.last_page
+            newest_id = scheduler.state.get('newest_id')
+
+        if incremental:
+            self._save_high_water_mark(start_page, newest_id)
         
         total_new = sum(results)
+        logger.info(f"Crawling completed at page {last_page}. Total new IDs added: {total_new}")
+        return total_new
+
+    def crawl_ids_async(self, start_page=1, end_page=None, max_empty_pages=3, delay=2, concurrency=8, rate=None,
+                        incremental=False, max_pages=DEFAULT_MAX_PAGES):
+        """Crawl ID bằng một event loop asyncio thay vì Pool
+
+        Mặc định rate = concurrency / delay request/giây cho mỗi host,
+        tương đương số request của `concurrency` process ở chế độ pool.
+        """
+        rate = rate or concurrency / delay
+        mark = self._load_high_water_mark() if incremental else None
+        logger.info(f"Starting async crawling with concurrency={concurrency}, rate={rate:.2f} req/s")
+
+        total_new = asyncio.run(
+            self._crawl_ids_async(start_page, end_page, max_empty_pages, concurrency, rate, incremental, mark, max_pages)
+        )
         logger.info(f"Crawling completed. Total new IDs added: {total_new}")
         return total_new
 
-    def _split_page_range(self, start, end, num_chunks):
-        if end is None:
-            end = start + 100  # Default max pages to crawl
-        
-        pages = list(range(start, end + 1))
-        chunk_size = max(1, (end - start + 1) // num_chunks)
-        return [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+    async def _crawl_ids_async(self, start_page, end_page, max_empty_pages, concurrency, rate, incremental, mark,
+                               max_pages=DEFAULT_MAX_PAGES):
+        from core.crawlers.async_fetcher import AsyncFetcher
+        from core.crawlers.http_cache import DiskCache
+        from core.crawlers.http_client import get_cache_mode
+
+        loop = asyncio.get_running_loop()
+        # Session không thread-safe nên mọi thao tác DB chạy tuần tự trên 1 thread
+        db_executor = ThreadPoolExecutor(max_workers=1)
+        session = SessionLocal()
+        scheduler = PageScheduler(start_page, end_page, max_empty_pages, batch_size=1, max_pages=max_pages)
+        state = {'total_new': 0}
+
+        def _save(ids):
+            try:
+                return self._save_ids(session, ids)
+            except Exception:
+                session.rollback()
+                raise
+
+        async def _worker(fetcher):
+            while True:
+                batch = scheduler.next_batch()
+                if not batch:
+                    break
+                page = batch[0]
+                try:
+                    html = await fetcher.fetch_text(self.base_url.format(page=page))
+                except Exception as e:
+                    logger.error(f"Error fetching page {page}: {str(e)}")
+                    scheduler.mark_failed(page)
+                    continue
+
+                try:
+                    ids = self._parse_ids(html)
+                    logger.debug(f"Found {len(ids)} IDs on page {page}")
+
+                    if not ids:
+                        scheduler.mark_empty(page)
+                        continue
+
+                    scheduler.mark_found(page)
+                    new_ids = await loop.run_in_executor(db_executor, _save, ids)
+                    state['total_new'] += new_ids
+                    if incremental:
+                        self._check_incremental(scheduler, mark, page, ids, new_ids)
+                    logger.debug(f"Added {new_ids} new IDs from page {page}")
+
+                except Exception as e:
+                    logger.error(f"Error processing page {page}: {str(e)}")
+
+        try:
+            cache_mode = get_cache_mode()
+            async with AsyncFetcher(
+                concurrency=concurrency,
+                rate_per_host=rate,
+                headers=self.headers,
+                cache=DiskCache() if cache_mode != 'off' else None,
+                cache_mode=cache_mode
+            ) as fetcher:
+                await asyncio.gather(*[_worker(fetcher) for _ in range(concurrency)])
+        finally:
+            await loop.run_in_executor(db_executor, session.close)
+            db_executor.shutdown()
+
+        if incremental:
+            self._save_high_water_mark(start_page, scheduler.state.get('newest_id'))
+        return state['total_new']
 
     @staticmethod
     def _init_worker(doc_type):
         global worker_db, worker_headers, worker_doc_type
+        # Bỏ các kết nối kế thừa từ process cha qua fork, mỗi worker tự mở kết nối mới
+        engine.dispose(close=False)
         worker_db = SessionLocal()
         worker_headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         worker_doc_type = doc_type
 
-    def _process_page_range(self, page_range, max_empty_pages, delay):
+    def _process_pages(self, worker_index, scheduler, delay, incremental=False, mark=None):
         local_db = worker_db
+        http = get_http_client()
         total_new = 0
-        empty_count = 0
         base_url = self._get_base_url()
 
-        for page in page_range:
-            try:
-                time.sleep(delay)
-                url = base_url.format(page=page)
-                logger.debug(f"Processing page {page}")
-
-                response = requests.get(url, headers=worker_headers, timeout=30)
-                response.raise_for_status()
-                
-                ids = self._parse_ids(response.text)
-                logger.debug(f"Found {len(ids)} IDs on page {page}")
-
-                if not ids:
-                    empty_count += 1
-                    if empty_count >= max_empty_pages:
-                        break
+        while True:
+            batch = scheduler.next_batch()
+            if not batch:
+                break
+
+            for page in batch:
+                if scheduler.is_stopped(page):
+                    break
+                try:
+                    time.sleep(delay)
+                    url = base_url.format(page=page)
+                    logger.debug(f"Worker {worker_index} processing page {page}")
+
+                    response = http.get(url, headers=worker_headers, timeout=30)
+                    response.raise_for_status()
+                except Exception as e:
+                    logger.error(f"Error fetching page {page}: {str(e)}")
+                    scheduler.mark_failed(page)
                     continue
 
-                empty_count = 0
-                new_ids = self._save_ids(local_db, ids)
-                total_new += new_ids
-                logger.debug(f"Added {new_ids} new IDs from page {page}")
+                try:
+                    ids = self._parse_ids(response.text)
+                    logger.debug(f"Found {len(ids)} IDs on page {page}")
+
+                    if not ids:
+                        scheduler.mark_empty(page)
+                        continue
 
-            except Exception as e:
-                logger.error(f"Error processing page {page}: {str(e)}")
-                local_db.rollback()
+                    scheduler.mark_found(page)
+                    new_ids = self._save_ids(local_db, ids)
+                    total_new += new_ids
+                    if incremental:
+                        self._check_incremental(scheduler, mark, page, ids, new_ids)
+                    logger.debug(f"Added {new_ids} new IDs from page {page}")
+
+                except Exception as e:
+                    logger.error(f"Error processing page {page}: {str(e)}")
+                    local_db.rollback()
 
         local_db.close()
+        http.log_connection_stats()
         return total_new
 
+    def _check_incremental(self, scheduler, mark, page, ids, new_ids):
+        """Chế độ incremental: ghi nhận ID mới nhất, dừng ở trang không còn gì mới"""
+        if page == scheduler.start_page:
+            scheduler.state['newest_id'] = ids[0]
+        if new_ids == 0 or (mark is not None and mark.last_seen_id in ids):
+            logger.info(f"Reached known IDs on page {page}, stopping incremental crawl")
+            scheduler.stop_after(page)
+
+    def _load_high_water_mark(self):
+        with SessionLocal() as session:
+            mark = session.get(CrawlState, self.doc_type)
+            if mark is not None:
+                session.expunge(mark)
+                logger.info(f"Last crawl of {self.doc_type}: newest ID {mark.last_seen_id} at {mark.last_crawled_at}")
+            return mark
+
+    def _save_high_water_mark(self, start_page, newest_id):
+        """Lưu ID đầu danh sách; chỉ có nghĩa khi crawl bắt đầu từ trang 1"""
+        if start_page != 1 or newest_id is None:
+            return
+        stmt = insert(CrawlState).values(
+            document_type=self.doc_type,
+            last_seen_id=newest_id,
+            last_crawled_at=datetime.now()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['document_type'],
+            set_={'last_seen_id': stmt.excluded.last_seen_id, 'last_crawled_at': stmt.excluded.last_crawled_at}
+        )
+        with SessionLocal() as session:
+            session.execute(stmt)
+            session.commit()
+
     def _parse_ids(self, html: str) -> List[str]:
-        soup = BeautifulSoup(html, 'html.parser')
-        if worker_doc_type == 'law':
-            return list(set([
+        """Trả về ID theo thứ tự trên trang danh sách (mới nhất trước)"""
+        soup = make_soup(html)
+        if self.doc_type == 'law':
+            return list(dict.fromkeys(
                 item['lawid'].strip() 
                 for item in soup.select('p.nqTitle[lawid]') 
                 if item['lawid'].strip()
-            ]))
-        elif worker_doc_type == 'judgment':
-            return list(set([
+            ))
+        elif self.doc_type == 'judgment':
+            return list(dict.fromkeys(
                 a['href'].split('-')[-1].split('/')[0]  # Lấy phần cuối cùng sau dấu - và trước dấu /
                 for a in soup.select('a.h5.font-weight-bold[href*="/ban-an/"]')  # Cập nhật selector chính xác hơn
                 if a['href']
-            ]))
+            ))
         return []
 
     def _save_ids(self, session, ids: List[str]) -> int:
-        existing = session.query(CrawlTracker.document_id).filter(
-            CrawlTracker.document_id.in_(ids),
-            CrawlTracker.document_type == worker_doc_type
-        ).all()
-        
-        existing_ids = {x[0] for x in existing}
-        new_ids = [x for x in ids if x not in existing_ids]
-        
-        if new_ids:
-            records = [
-                CrawlTracker(
-                    document_id=doc_id,
-                    document_type=worker_doc_type,
-                    status='pending',
-                    created_at=datetime.now()
-                ) for doc_id in new_ids
-            ]
-            session.bulk_save_objects(records)
-            session.commit()
-        
-        return len(new_ids)
\ No newline at end of file
+        """Thêm ID mới bằng một câu INSERT ... ON CONFLICT DO NOTHING, trả về số ID thực sự mới
+
+        Dựa vào unique index (document_type, document_id) nên an toàn khi nhiều
+        worker cùng ghi một ID.
+        """
+        if not ids:
+            return 0
+
+        now = datetime.now()
+        stmt = insert(CrawlTracker).values([
+            {
+                'document_id': doc_id,
+                'document_type': self.doc_type,
+                'status': 'pending',
+                'created_at': now,
+                'retry_count': 0
+            } for doc_id in ids
+        ]).on_conflict_do_nothing(
+            index_elements=['document_type', 'document_id']
+        ).returning(CrawlTracker.id)
+
+        inserted = session.execute(stmt).scalars().all()
+        session.commit()
+        return len(inserted)
@@ -0,0 +1,119 @@
+import time
+import logging
+from datetime import date, datetime
+from typing import List, Tuple, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from core.database import upsert_record
+from core.cache import notify_changed
+from core.crawlers.change_detection import record_check
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer:
+    """Gom bản ghi đã crawl và cập nhật CrawlTracker để ghi trong một transaction
+
+    Buffer được flush khi đủ `flush_size` document hoặc sau `flush_interval`
+    giây kể từ lần flush trước. Thay đổi trên tracker chỉ được gán lúc flush,
+    nên nếu transaction lỗi có thể ghi lại từng document một mà không mất trạng thái.
+    """
+
+    def __init__(self, session, flush_size: int = 50, flush_interval: float = 30.0, max_retries: int = 3):
+        self.session = session
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.committed = 0
+        # (tracker, record, lỗi, tham số record_check hoặc None)
+        self._pending: List[Tuple[object, Optional[object], Optional[str], Optional[tuple]]] = []
+        self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add_success(self, tracker, record, new_hash: Optional[str] = None, published: Optional[date] = None,
+                    changed: bool = False):
+        """Thêm document crawl thành công (record là LegalDocument/Judgment chưa lưu)
+
+        `new_hash`/`published`/`changed` được truyền cho record_check lúc flush,
+        cùng transaction với record, nên không mất khi lô bị rollback và ghi lại từng cái.
+        """
+        check = (new_hash, published, changed) if new_hash is not None else None
+        self._pending.append((tracker, record, None, check))
+        self._maybe_flush()
+
+    def add_failure(self, tracker, error: Exception):
+        """Ghi nhận document crawl lỗi"""
+        self._pending.append((tracker, None, str(error)[:500], None))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if (len(self._pending) >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """Ghi toàn bộ buffer trong một transaction, trả về số document lưu thành công"""
+        batch, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+
+        try:
+            changed = [record for tracker, record, error, check in batch if self._apply(tracker, record, error, check)]
+            # Một NOTIFY cho cả batch để API bỏ cache các văn bản vừa ghi
+            notify_changed(self.session, changed)
+            self.session.commit()
+            saved = sum(1 for _, record, _, _ in batch if record is not None)
+            logger.info(f"Flushed {len(batch)} tracker updates ({saved} documents) in one transaction")
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            logger.error(f"Batch flush failed, retrying one by one: {str(e)}")
+            saved = self._flush_one_by_one(batch)
+
+        self.committed += saved
+        return saved
+
+    def _flush_one_by_one(self, batch) -> int:
+        saved = 0
+        for tracker, record, error, check in batch:
+            try:
+                if self._apply(tracker, record, error, check):
+                    notify_changed(self.session, [record])
+                self.session.commit()
+                if record is not None:
+                    saved += 1
+            except SQLAlchemyError as e:
+                self.session.rollback()
+                if record is None:
+                    logger.error(f"Failed to update tracker {tracker.document_id}: {str(e)}")
+                    continue
+                # Không lưu được document: đánh dấu tracker lỗi
+                try:
+                    self._apply(tracker, None, str(e)[:500])
+                    self.session.commit()
+                except SQLAlchemyError as e2:
+                    self.session.rollback()
+                    logger.error(f"Failed to update tracker {tracker.document_id}: {str(e2)}")
+        return saved
+
+    def _apply(self, tracker, record, error: Optional[str], check: Optional[tuple] = None) -> bool:
+        """Gán trạng thái tracker và ghi record, trả về True nếu record được ghi/thay đổi"""
+        tracker.last_attempt = datetime.now()
+        written = False
+        if record is not None:
+            if getattr(record, 'source_id', None):
+                # Upsert theo source_id: crawl lại chỉ cập nhật cột thay đổi
+                written = upsert_record(self.session, record)
+            else:
+                self.session.add(record)
+                written = True
+            tracker.status = 'success'
+            tracker.retry_count = 0
+            tracker.error_log = None
+            if check is not None:
+                record_check(tracker, *check)
+        else:
+            tracker.retry_count = (tracker.retry_count or 0) + 1
+            tracker.error_log = error
+            tracker.status = 'failed' if tracker.retry_count >= self.max_retries else 'pending'
+        return written
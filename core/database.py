@@ -3,20 +3,24 @@ import os
 import logging
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from core.models.legal_document import LegalDocument
+from core.models.legal_document import LegalDocument, dedup_key
 from core.models.legal_qa import LegalQA
 from core.models.judgment import Judgment
 from core.models.judgment_document_relation import JudgmentDocumentRelation
 from core.models.crawl_tracker import CrawlTracker
 from core.models.process_tracker import ProcessTracker
 
+import io
 import os
 import csv
+import gzip
 import json
+import time
 import logging
 from datetime import datetime
 from typing import Generator, Any
-from sqlalchemy import create_engine, text, func
+from sqlalchemy import create_engine, select, update, exists, literal, literal_column, text, func, Date, String, Integer, JSON, cast, or_
+from sqlalchemy.dialects.postgresql import insert, JSONB
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
@@ -24,6 +28,7 @@ from dateutil.parser import parse
 import random
 from sqlalchemy.orm import declarative_base
 from core.models.base import Base 
+from core.cache import notify_changed, notify_keys, CACHE_KEYS
 
 load_dotenv()
 
@@ -46,6 +51,113 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 def init_db():
     Base.metadata.create_all(bind=engine)
 
+# Giá trị NULL trong file CSV import/export (như định dạng text của COPY), để phân biệt
+# NULL với chuỗi rỗng '' - trong CSV mặc định của COPY cả hai đều thành ô trống khi đọc bằng pandas
+CSV_NULL = r'\N'
+
+# Cột do database quản lý (search_vector do trigger tính), không ghi đè khi upsert
+UPSERT_SKIP_COLUMNS = {'id', 'created_at', 'updated_at', 'search_vector'}
+
+def upsert_statement(record, key: str = 'source_id'):
+    """INSERT ... ON CONFLICT (key) DO UPDATE cho một bản ghi ORM chưa lưu
+
+    Chỉ UPDATE khi có ít nhất một cột khác giá trị đang lưu (IS DISTINCT FROM),
+    nên lưu lại một document không đổi không tạo row version mới và không đổi updated_at.
+    """
+    table = record.__table__
+    values = {
+        column.name: getattr(record, column.key)
+        for column in table.columns
+        if column.name not in UPSERT_SKIP_COLUMNS
+    }
+    stmt = insert(table).values(**values)
+
+    def _comparable(column):
+        # json không có toán tử so sánh, so sánh qua jsonb
+        return cast(column, JSONB) if isinstance(column.type, JSON) else column
+
+    updatable = [name for name in values if name != key]
+    changed = or_(*[
+        _comparable(table.c[name]).is_distinct_from(_comparable(stmt.excluded[name]))
+        for name in updatable
+    ])
+    set_ = {name: stmt.excluded[name] for name in updatable}
+    if 'updated_at' in table.c:
+        set_['updated_at'] = func.now()
+
+    stmt = stmt.on_conflict_do_update(index_elements=[key], set_=set_, where=changed)
+    cache_column = CACHE_KEYS.get(table.name)
+    if cache_column:
+        # Subquery trong RETURNING đọc snapshot trước câu lệnh: giá trị khóa cache cũ
+        # (NULL nếu là dòng mới), để báo API bỏ cả khóa cũ khi văn bản đổi số hiệu
+        stored = table.alias()
+        # SQLAlchemy không correlate subquery trong RETURNING nên tham chiếu dòng đích bằng tên
+        target_id = literal_column(f"{table.name}.id")
+        previous = select(stored.c[cache_column]).where(stored.c.id == target_id).scalar_subquery()
+        return stmt.returning(previous.label('previous_key'))
+    return stmt.returning(table.c.id)
+
+def _legacy_match(table, record) -> list:
+    """Điều kiện nhận ra bản ghi lưu trước khi có source_id là cùng văn bản/bản án với record"""
+    if table.name == 'legal_documents':
+        # So theo dedup_key để dùng index ix_legal_documents_dedup_key
+        stored = dedup_key(table.c.document_number, table.c.issue_date, table.c.issuing_authority)
+        incoming = dedup_key(
+            literal(record.document_number, String),
+            cast(literal(record.issue_date), Date),
+            literal(record.issuing_authority, String)
+        )
+        return [a == b for a, b in zip(stored, incoming)]
+    if table.name == 'judgments':
+        return [
+            table.c.case_number == record.case_number,
+            table.c.judgment_date.is_not_distinct_from(cast(literal(record.judgment_date), Date)),
+        ]
+    return []
+
+def claim_statement(record):
+    """UPDATE gán source_id của record cho bản ghi cũ (source_id NULL) trùng với nó
+
+    Bản ghi lưu trước migration d4a8c3f1b920 không có source_id và trang nguồn
+    không lưu ID, nên không gán được lúc migrate. Chạy câu này trước upsert_statement
+    để lần lưu đầu tiên cập nhật bản ghi cũ thay vì thêm bản ghi thứ hai.
+    Trả về None nếu bảng không có bản ghi cũ cần nhận.
+    """
+    table = record.__table__
+    match = _legacy_match(table, record)
+    if not match or not record.source_id:
+        return None
+    other = table.alias()
+    legacy_id = (
+        select(table.c.id)
+        .where(table.c.source_id.is_(None), *match)
+        .order_by(table.c.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return (
+        update(table)
+        .where(table.c.id == legacy_id, ~exists().where(other.c.source_id == record.source_id))
+        .values(source_id=record.source_id)
+    )
+
+def upsert_record(session, record) -> bool:
+    """Nhận bản ghi cũ (claim_statement) rồi upsert theo source_id, trả về True nếu có ghi
+
+    Nếu khóa cache (VD: số hiệu) đổi giá trị, gửi NOTIFY cho khóa cũ; khóa mới do
+    người gọi báo qua notify_changed như mọi bản ghi vừa ghi.
+    """
+    claim = claim_statement(record)
+    if claim is not None:
+        session.execute(claim)
+    row = session.execute(upsert_statement(record)).first()
+    if row is None:
+        return False
+    cache_column = CACHE_KEYS.get(record.__tablename__)
+    if cache_column and row.previous_key not in (None, getattr(record, cache_column)):
+        notify_keys(session, record.__tablename__, [row.previous_key])
+    return True
+
 class DatabaseManager:
     def __init__(self):
         self.session = SessionLocal()
@@ -75,10 +187,26 @@ class DatabaseManager:
         self.session.rollback()
         logger.info("Transaction rolled back")
             
+    def upsert_data(self, data_object):
+        """Thêm hoặc cập nhật theo source_id (xem upsert_statement), trả về True nếu có ghi"""
+        try:
+            written = upsert_record(self.session, data_object)
+            if written:
+                # Báo API bỏ bản cache cũ (thông báo được gửi khi commit)
+                notify_changed(self.session, [data_object])
+            self.session.commit()
+            logger.info(f"Upserted into {data_object.__tablename__} ({'written' if written else 'unchanged'})")
+            return written
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            logger.error(f"Database error: {str(e)}")
+            raise
+
     def insert_data(self, data_object):
         """Thêm dữ liệu sử dụng ORM"""
         try:
             self.session.add(data_object)
+            notify_changed(self.session, [data_object])
             self.session.commit()
             self.session.refresh(data_object)
             logger.info(f"Inserted into {data_object.__tablename__} successfully")
@@ -89,40 +217,225 @@ class DatabaseManager:
             raise
         
 
-    def export_data(self, table_name: str, file_path: str):
-        """Xuất dữ liệu ra CSV sử dụng raw SQL"""
+    def export_data(self, table_name: str, file_path: str, columns: list = None,
+                    compress: bool = None, chunk_size: int = 10000):
+        """Xuất dữ liệu ra CSV theo kiểu streaming (bộ nhớ không phụ thuộc kích thước bảng)
+
+        Với PostgreSQL dùng `COPY ... TO STDOUT`, các dialect khác dùng
+        server-side cursor đọc từng `chunk_size` dòng. File được nén gzip
+        khi `compress=True` hoặc đường dẫn kết thúc bằng `.gz`.
+        """
         try:
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                with engine.connect() as connection:
-                    result = connection.execute(text(f"SELECT * FROM {table_name}"))
-                    writer.writerow(result.keys())
-                    writer.writerows(result.fetchall())
-            logger.info(f"Exported {table_name} to {file_path}")
+            table = self._get_table(table_name)
+            column_names = self._resolve_columns(table, columns)
+            if compress is None:
+                compress = file_path.endswith('.gz')
+
+            opener = gzip.open if compress else open
+            with opener(file_path, 'wt', newline='', encoding='utf-8') as f:
+                if engine.dialect.name == 'postgresql':
+                    rowcount = self._copy_to_csv(table.name, column_names, f)
+                else:
+                    rowcount = self._stream_to_csv(table.name, column_names, f, chunk_size)
+            logger.info(f"Exported {rowcount} rows from {table_name} to {file_path}")
+            return rowcount
         except Exception as e:
             logger.error(f"Export failed: {str(e)}")
             raise
 
-    def import_data(self, table_name: str, file_path: str):
-        """Nhập dữ liệu từ CSV sử dụng bulk insert"""
+    @staticmethod
+    def _get_table(table_name: str):
+        """Lấy Table từ metadata, tránh đưa tên bảng tùy ý vào câu SQL"""
+        table = Base.metadata.tables.get(table_name)
+        if table is None:
+            raise ValueError(f"Unknown table: {table_name}")
+        return table
+
+    @staticmethod
+    def _resolve_columns(table, columns: list = None) -> list:
+        if not columns:
+            return [c.name for c in table.columns]
+        unknown = [c for c in columns if c not in table.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns for {table.name}: {', '.join(unknown)}")
+        return list(columns)
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return engine.dialect.identifier_preparer.quote(name)
+
+    def _copy_to_csv(self, table_name: str, column_names: list, f) -> int:
+        select_sql = f"SELECT {', '.join(self._quote(c) for c in column_names)} FROM {self._quote(table_name)}"
+        raw_conn = engine.raw_connection()
+        try:
+            with raw_conn.cursor() as cursor:
+                cursor.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, HEADER true, NULL '{CSV_NULL}')", f)
+                return cursor.rowcount
+        finally:
+            raw_conn.close()
+
+    def _stream_to_csv(self, table_name: str, column_names: list, f, chunk_size: int) -> int:
+        writer = csv.writer(f)
+        writer.writerow(column_names)
+        rowcount = 0
+        select_sql = f"SELECT {', '.join(self._quote(c) for c in column_names)} FROM {self._quote(table_name)}"
+        with engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True,
+                max_row_buffer=chunk_size
+            ).execute(text(select_sql))
+            for rows in result.partitions(chunk_size):
+                writer.writerows([CSV_NULL if value is None else value for value in row] for row in rows)
+                rowcount += len(rows)
+        return rowcount
+
+    def import_data(self, table_name: str, file_path: str, chunk_size: int = 50000,
+                    on_conflict: str = 'update', method: str = None, null: str = CSV_NULL):
+        """Nhập dữ liệu từ CSV theo lô, upsert theo khóa chính
+
+        Với PostgreSQL, mỗi lô được `COPY FROM STDIN` vào bảng staging tạm rồi
+        `INSERT ... SELECT ... ON CONFLICT` vào bảng đích (method='copy').
+        method='executemany' dùng INSERT theo lô (mặc định cho dialect khác).
+        on_conflict: 'update' ghi đè bản ghi trùng khóa, 'nothing' bỏ qua.
+        null: giá trị NULL trong file (mặc định CSV_NULL như export_data); ô trống của
+        cột chuỗi được giữ là ''. Dùng null='' cho file coi ô trống là NULL.
+
+        Raises:
+            ValueError: Có ngày tháng không đọc được (các lô trước đó đã được ghi)
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                with engine.connect() as connection:
-                    with connection.begin():
-                        for row in reader:
-                            cleaned_row = {
-                                k: parse(v).date() if 'date' in k.lower() and v else v 
-                                for k, v in row.items()
-                            }
-                            connection.execute(
-                                text(f"INSERT INTO {table_name} ({','.join(row.keys())}) VALUES ({','.join([':'+k for k in row.keys()])})"),
-                                cleaned_row
-                            )
-            logger.info(f"Imported {file_path} to {table_name}")
+            table = self._get_table(table_name)
+            method = method or ('copy' if engine.dialect.name == 'postgresql' else 'executemany')
+            started = time.monotonic()
+            total = 0
+            raw_conn = engine.raw_connection() if method == 'copy' else None
+            try:
+                for column_names, chunk in self._read_chunks(table, file_path, chunk_size, null):
+                    if method == 'copy':
+                        self._copy_chunk(raw_conn, table, column_names, chunk, on_conflict)
+                    else:
+                        self._executemany_chunk(table, column_names, chunk, on_conflict)
+
+                    total += len(chunk)
+                    elapsed = time.monotonic() - started
+                    logger.info(f"Imported {total} rows into {table_name} ({total / elapsed:.0f} rows/s)")
+
+                if method == 'copy' and total:
+                    self._sync_pk_sequence(raw_conn, table)
+            finally:
+                if raw_conn is not None:
+                    raw_conn.close()
+
+            logger.info(f"Imported {file_path} to {table_name}: {total} rows in {time.monotonic() - started:.1f}s")
+            return total
         except Exception as e:
             logger.error(f"Import failed: {str(e)}")
             raise
+
+    def _read_chunks(self, table, file_path: str, chunk_size: int, null: str):
+        """Đọc CSV theo lô, trả về (cột, DataFrame) đã chuẩn hóa: NULL là NaN, ngày dạng YYYY-MM-DD
+
+        Raises:
+            ValueError: Có giá trị ngày tháng không đọc được
+        """
+        import pandas as pd
+
+        date_columns = {c.name for c in table.columns if isinstance(c.type, Date)}
+        text_columns = {c.name for c in table.columns if isinstance(c.type, String)}
+        reader = pd.read_csv(
+            file_path,
+            chunksize=chunk_size,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[null] if null else [''],
+            compression='infer'
+        )
+        first_row = 1
+        for chunk in reader:
+            column_names = self._resolve_columns(table, list(chunk.columns))
+            # Ô trống chỉ có nghĩa là chuỗi rỗng với cột chuỗi, cột khác coi là NULL
+            for col in set(column_names) - text_columns:
+                chunk[col] = chunk[col].mask(chunk[col] == '')
+            # Chuẩn hóa ngày tháng cho cả cột một lần thay vì parse từng giá trị
+            for col in date_columns.intersection(column_names):
+                parsed = pd.to_datetime(chunk[col], errors='coerce', format='mixed')
+                invalid = chunk[col][parsed.isna() & chunk[col].notna()]
+                if len(invalid):
+                    raise ValueError(
+                        f"{len(invalid)} unparseable dates in column {col} between rows "
+                        f"{first_row} and {first_row + len(chunk) - 1} (e.g. {invalid.head(3).tolist()}); "
+                        f"rows before {first_row} were already imported"
+                    )
+                chunk[col] = parsed.dt.strftime('%Y-%m-%d')
+            yield column_names, chunk
+            first_row += len(chunk)
+
+    def _upsert_clause(self, table, column_names: list, on_conflict: str) -> str:
+        pk_columns = [c.name for c in table.primary_key.columns]
+        if on_conflict != 'update' or not set(pk_columns).issubset(column_names):
+            return "ON CONFLICT DO NOTHING"
+        update_columns = [c for c in column_names if c not in pk_columns]
+        if not update_columns:
+            return "ON CONFLICT DO NOTHING"
+        return (
+            f"ON CONFLICT ({', '.join(self._quote(c) for c in pk_columns)}) DO UPDATE SET "
+            + ', '.join(f"{self._quote(c)} = EXCLUDED.{self._quote(c)}" for c in update_columns)
+        )
+
+    def _copy_chunk(self, raw_conn, table, column_names: list, chunk, on_conflict: str):
+        """COPY một lô vào bảng staging rồi upsert sang bảng đích trong một transaction"""
+        staging = self._quote(f"staging_{table.name}")
+        columns_sql = ', '.join(self._quote(c) for c in column_names)
+        buffer = io.StringIO()
+        # NULL ghi thành CSV_NULL để COPY giữ ô trống là chuỗi rỗng ''
+        chunk.to_csv(buffer, index=False, header=False, na_rep=CSV_NULL)
+        buffer.seek(0)
+
+        try:
+            with raw_conn.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+                    f"(LIKE {self._quote(table.name)} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                )
+                cursor.copy_expert(f"COPY {staging} ({columns_sql}) FROM STDIN WITH (FORMAT csv, NULL '{CSV_NULL}')", buffer)
+                cursor.execute(
+                    f"INSERT INTO {self._quote(table.name)} ({columns_sql}) "
+                    f"SELECT {columns_sql} FROM {staging} "
+                    + self._upsert_clause(table, column_names, on_conflict)
+                )
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+
+    def _executemany_chunk(self, table, column_names: list, chunk, on_conflict: str):
+        """Fallback: INSERT theo lô bằng executemany"""
+        records = [
+            {k: (v if v == v else None) for k, v in row.items()}
+            for row in chunk[column_names].to_dict('records')
+        ]
+        columns_sql = ', '.join(self._quote(c) for c in column_names)
+        values_sql = ', '.join(f":{c}" for c in column_names)
+        sql = f"INSERT INTO {self._quote(table.name)} ({columns_sql}) VALUES ({values_sql})"
+        if engine.dialect.name == 'postgresql':
+            sql += " " + self._upsert_clause(table, column_names, on_conflict)
+        with engine.begin() as connection:
+            connection.execute(text(sql), records)
+
+    def _sync_pk_sequence(self, raw_conn, table):
+        """Đồng bộ sequence của khóa chính sau khi import id tường minh"""
+        pk_columns = list(table.primary_key.columns)
+        if len(pk_columns) != 1 or not isinstance(pk_columns[0].type, Integer):
+            return
+        pk = pk_columns[0].name
+        with raw_conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, %s), "
+                f"COALESCE((SELECT MAX({self._quote(pk)}) FROM {self._quote(table.name)}), 1))",
+                (table.name, pk)
+            )
+        raw_conn.commit()
+
     def get_random_samples(self):
         """Lấy 3 mẫu ngẫu nhiên từ tất cả các bảng liên quan"""
         results = {}
@@ -165,7 +478,8 @@ class DatabaseManager:
         try:
             tables = [LegalDocument, LegalQA, Judgment, JudgmentDocumentRelation]
             for table in tables:
-                count = self.session.query(table).count()
+                # SELECT count(*) trực tiếp, không bọc subquery chọn mọi cột như Query.count()
+                count = self.session.execute(select(func.count()).select_from(table)).scalar()
                 table_status[table.__tablename__] = {
                     'count': count,
                     'status': 'Có dữ liệu' if count > 0 else 'Trống'
@@ -2,8 +2,9 @@ from .legal_document import LegalDocument
 from .legal_qa import LegalQA
 from .judgment import Judgment
 from .judgment_document_relation import JudgmentDocumentRelation
-from .base import Base
+from .base import Base, CONTENT_COLUMNS, with_content
 from .crawl_tracker import CrawlTracker
+from .crawl_state import CrawlState
 from .process_tracker import ProcessTracker
 from .processed_articles import ProcessedArticle
 
@@ -13,6 +14,9 @@ __all__ = [
     "Judgment",
     "JudgmentDocumentRelation",
     "CrawlTracker",
+    "CrawlState",
     "ProcessTracker",
     "ProcessedArticle",
+    "CONTENT_COLUMNS",
+    "with_content",
 ]
\ No newline at end of file
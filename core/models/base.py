@@ -1,3 +1,19 @@
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Load
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# Cột HTML/văn bản gốc (mỗi dòng có thể vài MB): deferred trên LegalDocument và
+# Judgment, chỉ được đọc khi truy cập thuộc tính hoặc khi query dùng with_content()
+CONTENT_COLUMNS = ('metadata_html', 'content_html', 'content_text')
+
+def with_content(model, *names):
+    """Loader option đọc luôn các cột nội dung trong cùng câu SELECT
+
+    VD: session.query(LegalDocument).options(with_content(LegalDocument, 'content_html')).
+    Không truyền `names` thì đọc cả ba cột trong CONTENT_COLUMNS.
+    """
+    option = Load(model)
+    for name in names or CONTENT_COLUMNS:
+        option = option.undefer(getattr(model, name))
+    return option
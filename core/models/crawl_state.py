@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, Enum
+from core.models.base import Base
+from datetime import datetime
+
+class CrawlState(Base):
+    """High-water mark của lần crawl danh sách gần nhất cho mỗi loại văn bản"""
+    __tablename__ = 'crawl_state'
+
+    document_type = Column(Enum('law', 'judgment', name='doc_type'), primary_key=True)
+    last_seen_id = Column(String(255), nullable=False, comment="ID mới nhất ở đầu danh sách")
+    last_crawled_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<CrawlState {self.document_type} {self.last_seen_id} @ {self.last_crawled_at}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, Enum
+from sqlalchemy import Column, String, DateTime, Integer, Enum, Index
 from core.models.base import Base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,13 +9,35 @@ class CrawlTracker(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     document_id = Column(String(255), nullable=False)
     document_type = Column(Enum('law', 'judgment', name='doc_type'), nullable=False)
-    status = Column(Enum('pending', 'success', 'failed', name='crawl_status'), default='pending')
+    status = Column(Enum('pending', 'processing', 'success', 'failed', name='crawl_status'), default='pending')
     created_at = Column(DateTime, default=datetime.now)
     last_attempt = Column(DateTime)
     retry_count = Column(Integer, default=0)
     error_log = Column(String(500))
+    # Phát hiện thay đổi và lịch crawl lại
+    content_hash = Column(String(64), comment="SHA-256 của nội dung/metadata đã chuẩn hóa")
+    last_checked_at = Column(DateTime)
+    next_check_at = Column(DateTime)
+    change_count = Column(Integer, default=0)
     
     process_records = relationship("ProcessTracker", back_populates="crawl_record")
     
+    __table_args__ = (
+        # Mỗi document chỉ có một tracker, dùng cho tra cứu theo (document_type, document_id)
+        Index('ux_crawl_tracker_type_doc_id', 'document_type', 'document_id', unique=True),
+        # Chỉ index các bản ghi còn cần xử lý, sắp theo thứ tự lấy việc
+        Index(
+            'ix_crawl_tracker_pending',
+            'document_type', 'created_at', 'retry_count',
+            postgresql_where=status.in_(['pending', 'failed', 'processing'])
+        ),
+        # Document đã crawl xong, sắp theo lịch kiểm tra lại
+        Index(
+            'ix_crawl_tracker_next_check',
+            'document_type', 'next_check_at',
+            postgresql_where=status == 'success'
+        ),
+    )
+    
     def __repr__(self):
-        return f"<CrawlTracker {self.document_type}-{self.document_id} [{self.status}]>"
\ No newline at end of file
+        return f"<CrawlTracker {self.document_type}-{self.document_id} [{self.status}]>"
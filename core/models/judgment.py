@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Date, Text, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Date, Text, JSON, DateTime, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from core.models.base import Base
 from datetime import datetime as dt, date
 
@@ -8,6 +9,7 @@ class Judgment(Base):
     __tablename__ = "judgments"
     
     id = Column(Integer, primary_key=True, index=True)
+    source_id = Column(String(255), comment="ID bản án trên trang nguồn (CrawlTracker.document_id)")
     case_name = Column(String(255))  # Thêm trường tên bản án
     case_number = Column(String(255))
     issuing_authority = Column(String(255))  # Đổi tên từ court
@@ -15,12 +17,15 @@ class Judgment(Base):
     field = Column(String(100))  # Thêm lĩnh vực
     judgment_date = Column(Date)
     keywords = Column(JSON)  # Thêm trường từ khóa
-    metadata_html = Column(Text)  # Thêm trường này
-    content_html = Column(Text)   # Thêm trường này
-    content_text = Column(Text)
+    # Cột nội dung lớn, không đọc khi query cả object (xem with_content)
+    metadata_html = deferred(Column(Text))
+    content_html = deferred(Column(Text))
+    content_text = deferred(Column(Text))
     related_parties = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Do trigger trg_judgments_search_vector tính (xem core/search.py), không đọc/ghi từ ORM
+    search_vector = deferred(Column(TSVECTOR))
 
     # Relationships
     related_documents = relationship(
@@ -28,6 +33,17 @@ class Judgment(Base):
         secondary="judgment_document_relations",
         back_populates="related_judgments"
     )
+
+    __table_args__ = (
+        # Khóa tự nhiên để lưu bằng upsert, crawl lại không sinh bản ghi trùng
+        Index('ux_judgments_source_id', 'source_id', unique=True),
+        # Tìm theo số bản án: kết quả tìm kiếm khớp đúng số bản án (core/search.py) và
+        # bản án lưu trước khi có source_id để nhận lại khi crawl lại (xem claim_statement)
+        Index('ix_judgments_case_number', 'case_number'),
+        # Tìm kiếm toàn văn
+        Index('ix_judgments_search_vector', search_vector, postgresql_using='gin'),
+        Index('ix_judgments_judgment_date', 'judgment_date'),
+    )
     
     def to_dict(self):
         return {
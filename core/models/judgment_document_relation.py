@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from core.models.base import Base
 
 class JudgmentDocumentRelation(Base):
@@ -8,6 +8,10 @@ class JudgmentDocumentRelation(Base):
     judgment_id = Column(Integer, ForeignKey("judgments.id"))
     document_id = Column(Integer, ForeignKey("legal_documents.id"))
     relation_type = Column(String(100))
+
+    __table_args__ = (
+        Index('ix_judgment_doc_rel_document_id', 'document_id'),
+    )
     
     def to_dict(self):
         return {
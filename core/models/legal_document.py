@@ -1,13 +1,40 @@
-from sqlalchemy import Column, Integer, String, Date, Text, DateTime
+from sqlalchemy import Column, Integer, String, Date, Text, DateTime, Index, literal_column
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from core.models.base import Base
 from datetime import datetime as dt, date
 
+def dedup_key(document_number, issue_date, issuing_authority) -> tuple:
+    """Khóa nhận diện văn bản trùng: số hiệu (bỏ khoảng trắng, viết hoa), ngày ban hành, nơi ban hành
+
+    Dùng chung cho index ix_legal_documents_dedup_key và truy vấn trong
+    scripts/check_duplicated.py để planner dùng được index. Giá trị NULL được
+    thay bằng hằng số để so sánh theo bộ (row comparison) khi phân trang.
+    """
+    return (
+        func.upper(func.regexp_replace(document_number, literal_column(r"'\s+'"), literal_column("''"), literal_column("'g'"))),
+        func.coalesce(issue_date, literal_column("DATE '1900-01-01'")),
+        func.coalesce(
+            func.lower(func.regexp_replace(func.btrim(issuing_authority), literal_column(r"'\s+'"), literal_column("' '"), literal_column("'g'"))),
+            literal_column("''")
+        ),
+    )
+
+def canonical_order(source_id, content_text, id) -> tuple:
+    """Thứ tự chọn bản ghi đại diện trong các văn bản trùng: có source_id (được upsert
+    khi crawl lại), có nội dung, rồi id nhỏ nhất
+
+    Dùng chung cho scripts/check_duplicated.py (bản được giữ khi gộp) và
+    GET /documents/{doc_id} (bản trả về khi số hiệu trùng) để hai nơi chọn cùng một dòng.
+    """
+    return (source_id.is_(None), content_text.is_(None), id)
+
 class LegalDocument(Base):
     __tablename__ = "legal_documents"
     
     id = Column(Integer, primary_key=True, index=True)
+    source_id = Column(String(255), comment="ID văn bản trên trang nguồn (CrawlTracker.document_id)")
     document_number = Column(String(255), nullable=False)
     document_type = Column(String(255))
     issuing_authority = Column(String(255))
@@ -17,11 +44,14 @@ class LegalDocument(Base):
     gazette_date = Column(Date)
     gazette_number = Column(String(100))
     status = Column(String(100))
-    metadata_html = Column(Text)
-    content_html = Column(Text)  
-    content_text = Column(Text)
+    # Cột nội dung lớn, không đọc khi query cả object (xem with_content)
+    metadata_html = deferred(Column(Text))
+    content_html = deferred(Column(Text))
+    content_text = deferred(Column(Text))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Do trigger trg_legal_documents_search_vector tính (xem core/search.py), không đọc/ghi từ ORM
+    search_vector = deferred(Column(TSVECTOR))
 
     # Relationships
     related_judgments = relationship(
@@ -32,6 +62,18 @@ class LegalDocument(Base):
     
     process_trackers = relationship("ProcessTracker", back_populates="document")
     processed_articles = relationship("ProcessedArticle", back_populates="document")
+
+    __table_args__ = (
+        # Khóa tự nhiên để lưu bằng upsert, crawl lại không sinh bản ghi trùng
+        Index('ux_legal_documents_source_id', 'source_id', unique=True),
+        # GET /documents/{doc_id} tra cứu theo số hiệu
+        Index('ix_legal_documents_document_number', 'document_number'),
+        # Duyệt bảng theo thứ tự khóa trùng lặp (xem dedup_key)
+        Index('ix_legal_documents_dedup_key', *dedup_key(document_number, issue_date, issuing_authority), id),
+        # Tìm kiếm toàn văn
+        Index('ix_legal_documents_search_vector', search_vector, postgresql_using='gin'),
+        Index('ix_legal_documents_issue_date', 'issue_date'),
+    )
     
     def to_dict(self):
         return {
@@ -27,6 +27,8 @@ class ProcessTracker(Base):
         Index('ix_proc_tracker_doc_id', 'document_id'),
         Index('ix_proc_tracker_status', 'status'),
         Index('ix_proc_tracker_type', 'document_type'),
+        # Một tracker cho mỗi văn bản, là khóa ON CONFLICT khi ghi kết quả xử lý theo lô
+        Index('ux_process_tracker_doc_id_type', 'document_id', 'document_type', unique=True),
     )
 
     def __repr__(self):
@@ -39,6 +39,8 @@ class ProcessedArticle(Base):
         Index('ix_article_hierarchy', structural_metadata, postgresql_using='gin'),
         # Index trên thời gian xử lý
         Index('ix_processed_at', 'processed_at'),
+        # Tra cứu/trỏ lại các điều khoản theo văn bản
+        Index('ix_processed_articles_document_id', 'document_id'),
     )
 
     def __repr__(self):
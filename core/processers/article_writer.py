@@ -0,0 +1,120 @@
+import logging
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import delete, case, func
+from sqlalchemy.dialects.postgresql import insert
+from core.models import ProcessTracker, ProcessedArticle
+
+logger = logging.getLogger(__name__)
+
+class ArticleWriter:
+    """Gom kết quả tách điều khoản của nhiều văn bản và ghi trong một transaction
+
+    Mỗi văn bản có một ProcessTracker (document_type='law', unique theo
+    document_id + document_type): 'success' khi đã ghi điều khoản, 'failed' kèm
+    error_log nếu parse lỗi. Tracker 'success' là mốc để pipeline bỏ qua văn bản
+    đó khi chạy lại (resume).
+
+    Mỗi lần flush chỉ gồm vài câu lệnh cho cả lô: upsert nhiều dòng tracker,
+    xóa điều khoản cũ không còn trong kết quả mới, và upsert nhiều dòng
+    ProcessedArticle theo article_id.
+    """
+
+    def __init__(self, session, flush_size: int = 50):
+        self.session = session
+        self.flush_size = flush_size
+        self.documents = 0
+        self.articles = 0
+        self._pending: Dict[int, tuple] = {}
+
+    def add(self, document_id: int, articles: List[Dict], started_at: datetime = None):
+        self._add(document_id, articles, None, started_at)
+
+    def add_failure(self, document_id: int, error: str, started_at: datetime = None):
+        self._add(document_id, None, error, started_at)
+
+    def _add(self, document_id, articles, error, started_at):
+        # Một văn bản chỉ xuất hiện một lần trong lô (ON CONFLICT không cho cập nhật một dòng hai lần)
+        self._pending[document_id] = (articles, error, started_at)
+        if len(self._pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        now = datetime.now()
+        try:
+            tracker_ids = self._upsert_trackers(batch, now)
+
+            rows = [
+                dict(article, document_id=document_id, process_tracker_id=tracker_ids[document_id], processed_at=now)
+                for document_id, (articles, _, _) in batch.items()
+                for article in articles or []
+            ]
+            # Xử lý lại: bỏ điều khoản cũ không còn trong kết quả mới. Văn bản lỗi
+            # không có kết quả mới nên giữ nguyên điều khoản của lần xử lý thành công trước
+            succeeded = [document_id for document_id, (_, error, _) in batch.items() if error is None]
+            if succeeded:
+                self.session.execute(
+                    delete(ProcessedArticle)
+                    .where(
+                        ProcessedArticle.document_id.in_(succeeded),
+                        ProcessedArticle.article_id.notin_([row['article_id'] for row in rows])
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            if rows:
+                self.session.execute(self._article_upsert(rows))
+
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        self.documents += len(batch)
+        self.articles += len(rows)
+        logger.info(f"Saved {len(rows)} articles of {len(batch)} documents")
+
+    def _upsert_trackers(self, batch: Dict[int, tuple], now: datetime) -> Dict[int, int]:
+        """Upsert tracker của cả lô, trả về {document_id: tracker id}"""
+        stmt = insert(ProcessTracker).values([
+            {
+                'document_id': document_id,
+                'document_type': 'law',
+                'status': 'success' if error is None else 'failed',
+                'created_at': now,
+                'started_at': started_at or now,
+                'finished_at': now,
+                'retry_count': 0 if error is None else 1,
+                'error_log': error,
+            }
+            for document_id, (_, error, started_at) in batch.items()
+        ])
+        failed = stmt.excluded.status == 'failed'
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['document_id', 'document_type'],
+            set_={
+                'status': stmt.excluded.status,
+                'started_at': stmt.excluded.started_at,
+                'finished_at': stmt.excluded.finished_at,
+                'error_log': stmt.excluded.error_log,
+                'retry_count': case(
+                    (failed, func.coalesce(ProcessTracker.retry_count, 0) + 1),
+                    else_=0
+                ),
+            }
+        ).returning(ProcessTracker.document_id, ProcessTracker.id)
+        return dict(self.session.execute(stmt).all())
+
+    @staticmethod
+    def _article_upsert(rows: List[Dict]):
+        stmt = insert(ProcessedArticle).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=['article_id'],
+            set_={
+                name: stmt.excluded[name]
+                for name in ('document_id', 'content', 'structural_metadata', 'process_tracker_id', 'processed_at')
+            }
+        )
@@ -1,43 +1,47 @@
-from bs4 import BeautifulSoup
-import re
-from sqlalchemy.orm import Session
+from core.utils.html_parser import make_soup
+from core.processers.structure_tokenizer import tokenize, clean_line, CONTENT
+import logging
+from collections import namedtuple
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+from sqlalchemy import select, exists
 from typing import List, Dict, Optional
-from core.models import LegalDocument, ProcessTracker, ProcessedArticle
+from core.models import LegalDocument, ProcessTracker
 from core.database import SessionLocal
+from core.processers.article_writer import ArticleWriter
 from datetime import datetime
-from core.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Thông tin tối thiểu của văn bản để tách điều khoản (không cần ORM/session)
+DocumentRef = namedtuple('DocumentRef', ['id', 'document_number'])
 
 class LawDocumentProcessor:
-    def __init__(self, doc: LegalDocument):
+    def __init__(self, doc):
+        """`doc` là LegalDocument hoặc DocumentRef (chỉ cần id, document_number)"""
         self.doc = doc
-        self.session = SessionLocal()
-        self.structure_rules = self._load_structure_rules()
 
-    def process(self):
-        try:
-            parsed_structure = self._parse_html_structure(self.doc.content_html)
-            normalized = self._normalize_structure(parsed_structure)
-            articles = self._extract_articles(normalized)
-            self._save_articles(articles)
-            self._update_process_tracker("success")
-        except Exception as e:
-            self._handle_processing_error(e)
-        finally:
-            self.session.close()
+    def process(self, html: str = None):
+        """Tách và lưu điều khoản của một văn bản (dùng process_all_documents cho cả corpus)"""
+        started_at = datetime.now()
+        with SessionLocal() as session:
+            writer = ArticleWriter(session)
+            try:
+                writer.add(self.doc.id, self.extract(html or self.doc.content_html), started_at)
+            except Exception as e:
+                writer.add_failure(self.doc.id, _error_message(self.doc.id, e), started_at)
+            writer.flush()
+
+    def extract(self, html: str) -> List[Dict]:
+        """HTML -> danh sách dict cột của ProcessedArticle, không truy cập DB"""
+        parsed_structure = self._parse_html_structure(html)
+        normalized = self._normalize_structure(parsed_structure)
+        return self._build_rows(self._extract_articles(normalized))
 
     def _parse_html_structure(self, html: str) -> List[Dict]:
-        soup = BeautifulSoup(html.replace('\r\n', " "), 'html.parser')
+        soup = make_soup(html.replace('\r\n', " "))
         root = {"type": "root", "children": []}
 
-        structure_patterns = {
-            "PHẦN": r"^PHẦN\s+[A-Z]+",
-            "CHƯƠNG": r"^Chương\s+[IVXLCDM]+",
-            "MỤC": r"^Mục\s+\d+",
-            "ĐIỀU": r"^Điều\s+\d+[\.:]?",  # Cải tiến regex để chỉ bắt đầu bằng Điều
-            "KHOẢN": r"^\d+\.",  
-            "ĐIỂM": r"^[a-z]\)" 
-        }
-
         stack = [root]
 
         for element in soup.find_all(["p"]):
@@ -45,24 +49,21 @@ class LawDocumentProcessor:
             if not text:
                 continue
             
-            found_structure = False
-            for key, pattern in structure_patterns.items():
-                if re.match(pattern, text, re.IGNORECASE):
-                    node = {
-                        "type": key,
-                        "number": self._extract_number(text, key),
-                        "content": text,
-                        "children": []
-                    }
-                    # Kiểm tra phân cấp
-                    while len(stack) > 1 and not self._is_valid_parent(stack[-1]["type"], key):
-                        stack.pop()
-                    stack[-1]["children"].append(node)
-                    stack.append(node)
-                    found_structure = True
-                    break
-                    
-            if not found_structure:
+            # Phân loại dòng và lấy số thứ tự bằng một regex (xem structure_tokenizer)
+            key, number = tokenize(text)
+            if key != CONTENT:
+                node = {
+                    "type": key,
+                    "number": number,
+                    "content": text,
+                    "children": []
+                }
+                # Kiểm tra phân cấp
+                while len(stack) > 1 and not self._is_valid_parent(stack[-1]["type"], key):
+                    stack.pop()
+                stack[-1]["children"].append(node)
+                stack.append(node)
+            else:
                 content_node = {
                     "type": "CONTENT",
                     "content": text,
@@ -77,14 +78,14 @@ class LawDocumentProcessor:
         articles = []
         current_article = None
 
-        def _traverse(node):
+        def _traverse(node, hierarchy):
             nonlocal current_article
             if node["type"] == "ĐIỀU":
                 # Tạo article mới
                 current_article = {
-                    "article_id": f"{self.doc.document_number}-ART-{node['number']}",
                     "number": node["number"],
                     "full_text": node["content"],
+                    "hierarchy": hierarchy,
                     "content": [],
                 }
                 articles.append(current_article)
@@ -94,28 +95,43 @@ class LawDocumentProcessor:
                     content = node["content"]
                     current_article["content"].append(content)
 
+            if node["type"] in ["PHẦN", "CHƯƠNG", "MỤC"]:
+                hierarchy = hierarchy + [node["content"]]
             for child in node.get("children", []):
-                _traverse(child)
+                _traverse(child, hierarchy)
 
         for node in structure:
-            _traverse(node)
+            _traverse(node, [])
             
         return articles
+
+    def _build_rows(self, articles: List[Dict]) -> List[Dict]:
+        """Tạo dữ liệu ProcessedArticle, article_id theo dạng LAW-<document id>-ART-<số điều>"""
+        rows = []
+        seen = {}
+        for article in articles:
+            article_id = f"LAW-{self.doc.id}-ART-{article['number']}"
+            # Điều trùng số (VD: điều được trích dẫn trong văn bản sửa đổi) được đánh hậu tố
+            seen[article_id] = seen.get(article_id, 0) + 1
+            if seen[article_id] > 1:
+                article_id = f"{article_id}-{seen[article_id]}"
+
+            rows.append({
+                "article_id": article_id,
+                "content": self._clean_content([article["full_text"]] + article["content"]),
+                "structural_metadata": {
+                    "hierarchy": article["hierarchy"],
+                    "prefix": "".join(f"{level}/" for level in article["hierarchy"]),
+                    "article_number": f"Điều {article['number']}",
+                },
+            })
+        return rows
     
     def _infer_type(self, text: str) -> Optional[str]:
         """Infer cấu trúc type dựa trên nội dung text."""
-        type_patterns = {
-            "PHẦN": r"^PHẦN\s+[A-Z]+",
-            "CHƯƠNG": r"^Chương\s+[IVXLCDM]+",
-            "MỤC": r"^Mục\s+\d+",
-            # "ĐIỀU": r"^Điều\s+\d+[\.:]?",  #  "ĐIỀU" should already be identified in parsing
-            # "KHOẢN": r"^\d+\.",          # "KHOẢN" and "ĐIỂM" are usually within "ĐIỀU"
-            # "ĐIỂM": r"^[a-z]\)"
-        }
-        for key, pattern in type_patterns.items():
-            if re.match(pattern, text, re.IGNORECASE):
-                return key
-        return "CONTENT"  # Default to CONTENT if no structure type is inferred
+        # "ĐIỀU", "KHOẢN", "ĐIỂM" đã được nhận diện khi parse
+        key, _ = tokenize(text)
+        return key if key in ("PHẦN", "CHƯƠNG", "MỤC") else CONTENT
     
     def _normalize_structure(self, raw_structure: List) -> List:
         """Chuẩn hóa cấu trúc theo Nghị định 34/2016 và 154/2020"""
@@ -157,46 +173,7 @@ class LawDocumentProcessor:
         
         return normalized
 
-    def _save_articles(self, articles: List[Dict]):
-        for article in articles:
-            existing = self.session.query(ProcessedArticle).filter_by(
-                id=article["article_id"]
-            ).first()
-            
-            if not existing:
-                processed = ProcessedArticle(
-                    id=article["article_id"],
-                    document_id=self.doc.id,
-                    article_number=article["number"],
-                    original_text='\n'.join(article["content"]),
-                    clean_text=self._clean_content(article["content"]),
-                    processing_history=[
-                        {"step": "parse", "timestamp": datetime.now().isoformat()}
-                    ]
-                )
-                self.session.add(processed)
-
-                tracker = ProcessTracker(
-                    document_id=self.doc.id,
-                    article_id=article["article_id"],
-                    status='success',
-                    completed_steps={"parsing": datetime.now().isoformat()},
-                )
-                self.session.add(tracker)
-        
-        self.session.commit()
-
     # Các hàm hỗ trợ giữ nguyên
-    def _extract_number(self, text: str, element_type: str) -> str:
-        patterns = {
-            "ĐIỀU": r"Điều\s+(\d+)",
-            "KHOẢN": r"^(\d+)\.",
-            "CHƯƠNG": r"Chương\s+([IVXLCDM]+)",
-            "ĐIỂM": r"^([a-z])\)"
-        }
-        match = re.search(patterns.get(element_type, r"(\d+)"), text)
-        return match.group(1) if match else ""
-
     def _is_valid_parent(self, parent_type: str, current_type: str) -> bool:
         hierarchy = ["PHẦN", "CHƯƠNG", "MỤC", "ĐIỀU", "KHOẢN", "ĐIỂM"]
         try:
@@ -205,47 +182,69 @@ class LawDocumentProcessor:
             return False
 
     def _clean_content(self, content: List[str]) -> str:
-        cleaned = []
-        for text in content:
-            text = re.sub(r"\s+", " ", text)
-            text = re.sub(r"(?i)(điều\s+\d+)(?=\s)", r"[REF:\1]", text)  # Đánh dấu các tham chiếu
-            cleaned.append(text.strip())
-        return '\n'.join(cleaned)
-
-    def _update_process_tracker(self, status: str):
-        """Cập nhật trạng thái tổng thể"""
-        tracker = self.session.query(ProcessTracker).filter_by(
-            document_id=self.doc.id
-        ).first()
-        
-        if tracker:
-            tracker.status = status
-            tracker.last_attempt = datetime.now()
+        return '\n'.join(clean_line(text) for text in content)
 
-    def _handle_processing_error(self, error: Exception):
-        """Xử lý lỗi và ghi log"""
-        error_msg = f"[{datetime.now()}] Error processing {self.doc.id}: {str(error)}"
-        
-        tracker = ProcessTracker(
-            document_id=self.doc.id,
-            status='failed',
-            error_log=error_msg,
-            retry_count=1
-        )
-        self.session.add(tracker)
-        self.session.commit()
-
-# Sử dụng thuật toán
-def process_all_documents():
-    session = SessionLocal()
+def _error_message(document_id, error: Exception) -> str:
+    return f"[{datetime.now()}] Error processing {document_id}: {str(error)}"
+
+def _parse_document(item):
+    """Chạy trong process con: chỉ nhận (id, số hiệu, HTML), không truy cập DB"""
+    document_id, document_number, html = item
+    started_at = datetime.now()
     try:
-        documents = session.query(LegalDocument).filter(
-            LegalDocument.content_html.isnot(None)
-        ).all()
-        
-        for doc in documents:
-            processor = LawDocumentProcessor(doc)
-            processor.process()
-            
-    finally:
-        session.close()
\ No newline at end of file
+        articles = LawDocumentProcessor(DocumentRef(document_id, document_number)).extract(html)
+        return document_id, articles, None, started_at
+    except Exception as e:
+        return document_id, None, _error_message(document_id, e), started_at
+
+def _iter_document_ids(session, reprocess: bool = False):
+    """Stream id văn bản cần xử lý; bỏ qua văn bản đã có ProcessTracker 'success' (resume)"""
+    stmt = select(LegalDocument.id).where(LegalDocument.content_html.isnot(None))
+    if not reprocess:
+        stmt = stmt.where(~exists().where(
+            ProcessTracker.document_id == LegalDocument.id,
+            ProcessTracker.document_type == 'law',
+            ProcessTracker.status == 'success'
+        ))
+    return session.execute(
+        stmt.order_by(LegalDocument.id).execution_options(yield_per=1000)
+    ).scalars()
+
+def process_all_documents(num_processes: int = None, batch_size: int = 200, flush_size: int = 50,
+                          reprocess: bool = False):
+    """Tách điều khoản cho toàn bộ văn bản bằng process pool
+
+    Id văn bản được stream bằng yield_per, HTML được đọc theo lô `batch_size`
+    nên bộ nhớ không phụ thuộc kích thước corpus. Process con chỉ parse HTML,
+    toàn bộ việc ghi đi qua một ArticleWriter ở process chính.
+    """
+    num_processes = num_processes or cpu_count()
+    logger.info(f"Processing legal documents with {num_processes} processes")
+
+    # Tạo pool trước khi mở kết nối DB để process con không kế thừa kết nối
+    with Pool(processes=num_processes) as pool, SessionLocal() as id_session, SessionLocal() as session:
+        writer = ArticleWriter(session, flush_size=flush_size)
+        document_ids = _iter_document_ids(id_session, reprocess)
+
+        while True:
+            ids = list(islice(document_ids, batch_size))
+            if not ids:
+                break
+
+            items = [
+                tuple(row) for row in session.execute(
+                    select(LegalDocument.id, LegalDocument.document_number, LegalDocument.content_html)
+                    .where(LegalDocument.id.in_(ids))
+                )
+            ]
+            for document_id, articles, error, started_at in pool.imap_unordered(_parse_document, items):
+                if error is None:
+                    writer.add(document_id, articles, started_at)
+                else:
+                    logger.error(error)
+                    writer.add_failure(document_id, error, started_at)
+
+        writer.flush()
+
+    logger.info(f"Processing completed: {writer.documents} documents, {writer.articles} articles")
+    return writer.documents
@@ -0,0 +1,45 @@
+import re
+from typing import Tuple
+
+# Một regex duy nhất cho mọi loại dòng cấu trúc, thứ tự nhánh là thứ tự ưu tiên.
+# Nhóm ngoài cho biết loại dòng, nhóm *_no là số thứ tự lấy ngay trong cùng lần match.
+STRUCTURE_RE = re.compile(r"""
+      (?P<PHAN>PHẦN\s+(?P<phan_no>THỨ\s+\w+|[A-Z]\w*))
+    | (?P<CHUONG>Chương\s+(?P<chuong_no>[IVXLCDM]+))
+    | (?P<MUC>Mục\s+(?P<muc_no>\d+))
+    | (?P<DIEU>Điều\s+(?P<dieu_no>\d+)[.:]?)
+    | (?P<KHOAN>(?P<khoan_no>\d+)\.)
+    | (?P<DIEM>(?P<diem_no>[a-z])\))
+""", re.IGNORECASE | re.VERBOSE)
+
+# Tên nhóm -> (loại cấu trúc, nhóm chứa số thứ tự)
+GROUPS = {
+    'PHAN': ("PHẦN", 'phan_no'),
+    'CHUONG': ("CHƯƠNG", 'chuong_no'),
+    'MUC': ("MỤC", 'muc_no'),
+    'DIEU': ("ĐIỀU", 'dieu_no'),
+    'KHOAN': ("KHOẢN", 'khoan_no'),
+    'DIEM': ("ĐIỂM", 'diem_no'),
+}
+
+CONTENT = "CONTENT"
+
+WHITESPACE_RE = re.compile(r"\s+")
+REFERENCE_RE = re.compile(r"(điều\s+\d+)(?=\s)", re.IGNORECASE)
+
+def tokenize(text: str) -> Tuple[str, str]:
+    """Phân loại một dòng văn bản và lấy số thứ tự trong một lần match
+
+    Trả về (loại, số), VD: ("ĐIỀU", "12"), ("CHƯƠNG", "IV"), ("PHẦN", "THỨ NHẤT"),
+    hoặc ("CONTENT", "") nếu dòng không phải tiêu đề cấu trúc.
+    """
+    match = STRUCTURE_RE.match(text)
+    if match is None:
+        return CONTENT, ""
+    # Nhóm ngoài đóng sau nhóm số nên lastgroup luôn là tên loại
+    kind, number_group = GROUPS[match.lastgroup]
+    return kind, match.group(number_group)
+
+def clean_line(text: str) -> str:
+    """Gộp khoảng trắng và đánh dấu tham chiếu "Điều N" thành [REF:Điều N]"""
+    return REFERENCE_RE.sub(r"[REF:\1]", WHITESPACE_RE.sub(" ", text)).strip()
@@ -0,0 +1,215 @@
+import os
+import logging
+from datetime import date
+from typing import Optional
+from sqlalchemy import select, literal, func, cast, union_all, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from core.models import LegalDocument, Judgment
+
+logger = logging.getLogger(__name__)
+
+# Cấu hình text search dùng khi tạo search_vector (xem migration a6c4e0f2b815):
+# 'simple' + vn_unaccent() để tìm được cả khi gõ không dấu ("quoc hoi" ~ "Quốc hội")
+SEARCH_CONFIG = 'simple'
+KINDS = ('law', 'judgment')
+MAX_PAGE_SIZE = 100
+# Giới hạn độ sâu phân trang: kết quả xếp theo độ liên quan nên người dùng
+# hiếm khi xem quá vài trang, và trang sâu buộc phải xếp hạng nhiều dòng hơn
+MAX_RESULTS = 1000
+# Số dòng khớp tối đa được xếp hạng trên mỗi bảng. ts_rank_cd phải đọc cả tsvector
+# của từng dòng, nên với từ phổ biến (khớp gần hết bảng) chỉ xếp hạng một tập con
+# để độ trễ không tăng theo kích thước corpus. Tập con này là các dòng index trả về
+# trước, không phải các dòng liên quan nhất, nên kết quả khi đó được đánh dấu
+# "approximate". 0 = xếp hạng mọi dòng khớp (chỉ bị giới hạn bởi SEARCH_TIMEOUT_MS)
+RANK_CANDIDATES = int(os.getenv('SEARCH_RANK_CANDIDATES', 5000))
+# Truy vấn không khớp mà vẫn phải kiểm tra nhiều dòng (VD: cụm từ "..." gồm các
+# từ phổ biến) có thể chạy lâu, nên bị hủy sau SEARCH_TIMEOUT_MS
+SEARCH_TIMEOUT_MS = int(os.getenv('SEARCH_TIMEOUT_MS', 3000))
+SET_TIMEOUT = text(f"SET LOCAL statement_timeout = {SEARCH_TIMEOUT_MS}")
+
+def to_tsquery(q: str):
+    """Cú pháp kiểu web search ("cụm từ", OR, -loại trừ) trên chuỗi đã bỏ dấu"""
+    return func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), func.vn_unaccent(q))
+
+def _matches_authority(column, authority: str):
+    return func.vn_unaccent(column).ilike(func.vn_unaccent(f"%{authority}%"))
+
+def _candidates(matched, number_column, q: str):
+    """Tập dòng được xếp hạng: mọi dòng có số hiệu đúng bằng `q` cùng tối đa
+    RANK_CANDIDATES dòng khớp khác
+
+    Cột `scanned` = 1 cho các dòng lấy theo giới hạn, để biết giới hạn có bị chạm không.
+    """
+    if not RANK_CANDIDATES:
+        return matched.add_columns(literal(0).label('scanned'))
+    exact = matched.add_columns(literal(0).label('scanned')).where(number_column == q.strip())
+    scanned = (
+        matched.add_columns(literal(1).label('scanned'))
+        .where(number_column.is_distinct_from(q.strip()))
+        .limit(RANK_CANDIDATES)
+    )
+    return union_all(exact, scanned.subquery().select())
+
+def _ranked(kind: str, candidates, number, title, date_column, tsquery, limit):
+    """Xếp hạng tập ứng viên và lấy top `limit`, cột chung cho UNION ALL"""
+    hits = candidates.subquery()
+    rank = func.ts_rank_cd(hits.c.search_vector, tsquery)
+    # Tính trên mọi ứng viên trước LIMIT: True nếu bảng còn dòng khớp chưa được xếp hạng
+    if RANK_CANDIDATES:
+        approximate = func.sum(hits.c.scanned).over() >= RANK_CANDIDATES
+    else:
+        approximate = literal(False)
+    return select(
+        literal(kind).label('kind'),
+        hits.c.id,
+        hits.c[number].label('number'),
+        hits.c[title].label('title'),
+        hits.c.issuing_authority,
+        hits.c[date_column].label('date'),
+        rank.label('rank'),
+        approximate.label('approximate')
+    ).order_by(rank.desc(), hits.c.id).limit(limit)
+
+def _law_select(q, tsquery, document_type, authority, date_from, date_to, limit):
+    stmt = select(
+        LegalDocument.id,
+        LegalDocument.document_number,
+        LegalDocument.document_type,
+        LegalDocument.issuing_authority,
+        LegalDocument.issue_date,
+        LegalDocument.search_vector
+    ).where(LegalDocument.search_vector.op('@@')(tsquery))
+    if document_type:
+        stmt = stmt.where(LegalDocument.document_type == document_type)
+    if authority:
+        stmt = stmt.where(_matches_authority(LegalDocument.issuing_authority, authority))
+    if date_from:
+        stmt = stmt.where(LegalDocument.issue_date >= date_from)
+    if date_to:
+        stmt = stmt.where(LegalDocument.issue_date <= date_to)
+    candidates = _candidates(stmt, LegalDocument.document_number, q)
+    return _ranked('law', candidates, 'document_number', 'document_type', 'issue_date', tsquery, limit)
+
+def _judgment_select(q, tsquery, authority, date_from, date_to, limit):
+    stmt = select(
+        Judgment.id,
+        Judgment.case_number,
+        Judgment.case_name,
+        Judgment.issuing_authority,
+        Judgment.judgment_date,
+        Judgment.search_vector
+    ).where(Judgment.search_vector.op('@@')(tsquery))
+    if authority:
+        stmt = stmt.where(_matches_authority(Judgment.issuing_authority, authority))
+    if date_from:
+        stmt = stmt.where(Judgment.judgment_date >= date_from)
+    if date_to:
+        stmt = stmt.where(Judgment.judgment_date <= date_to)
+    candidates = _candidates(stmt, Judgment.case_number, q)
+    return _ranked('judgment', candidates, 'case_number', 'case_name', 'judgment_date', tsquery, limit)
+
+def search_statement(q: str, kind: Optional[str] = None, document_type: Optional[str] = None,
+                     authority: Optional[str] = None, date_from: Optional[date] = None,
+                     date_to: Optional[date] = None, page: int = 1, page_size: int = 20):
+    """Câu SELECT tìm kiếm toàn văn trên legal_documents và judgments, xếp theo ts_rank_cd
+
+    Với truy vấn khớp hơn RANK_CANDIDATES dòng của một bảng, chỉ RANK_CANDIDATES
+    dòng đầu tiên tìm được (cùng các dòng có số hiệu đúng bằng `q`) được xếp hạng
+    và các dòng kết quả có cột approximate = True.
+
+    Args:
+        q: Chuỗi tìm kiếm, có dấu hoặc không dấu
+        kind: 'law', 'judgment' hoặc None (cả hai)
+        document_type: Loại văn bản (chỉ áp dụng cho legal_documents, khi có thì bỏ qua bản án)
+        authority: Một phần tên cơ quan ban hành / tòa án, không phân biệt dấu
+        date_from, date_to: Khoảng ngày ban hành / ngày tuyên án
+        page, page_size: Phân trang (page bắt đầu từ 1, page_size tối đa MAX_PAGE_SIZE)
+
+    Returns:
+        Câu SELECT lấy page_size + 1 dòng (để biết còn trang sau), hoặc None nếu
+        bộ lọc loại trừ mọi bảng
+
+    Raises:
+        ValueError: Tham số không hợp lệ
+    """
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"Unknown kind: {kind}")
+    page_size = min(page_size, MAX_PAGE_SIZE)
+    offset = (page - 1) * page_size
+    if offset + page_size > MAX_RESULTS:
+        raise ValueError(f"Only the first {MAX_RESULTS} results can be paged through")
+
+    # Mỗi nhánh chỉ cần top (offset + page_size + 1) dòng của riêng nó
+    limit = offset + page_size + 1
+    tsquery = to_tsquery(q)
+    branches = []
+    if kind in (None, 'law'):
+        branches.append(_law_select(q, tsquery, document_type, authority, date_from, date_to, limit))
+    if kind in (None, 'judgment') and not document_type:
+        branches.append(_judgment_select(q, tsquery, authority, date_from, date_to, limit))
+    if not branches:
+        return None
+
+    hits = union_all(*[branch.subquery().select() for branch in branches]).subquery()
+    return (
+        select(hits)
+        .order_by(hits.c.rank.desc(), hits.c.kind, hits.c.id)
+        .offset(offset)
+        .limit(page_size + 1)
+    )
+
+def _search_page(rows, page: int, page_size: int) -> dict:
+    page_size = min(page_size, MAX_PAGE_SIZE)
+    results = []
+    for row in rows[:page_size]:
+        result = dict(row._mapping, date=row.date.isoformat() if row.date else None)
+        del result['approximate']
+        results.append(result)
+    return {
+        "results": results,
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(rows) > page_size,
+        # Thứ hạng chỉ tính trên RANK_CANDIDATES dòng khớp đầu tiên của ít nhất một bảng
+        "approximate": any(row.approximate for row in rows),
+    }
+
+def _timeout_error(e: DBAPIError) -> Optional[TimeoutError]:
+    if 'statement timeout' in str(e):
+        return TimeoutError(f"Search took longer than {SEARCH_TIMEOUT_MS} ms")
+    return None
+
+def search(session, q: str, page: int = 1, page_size: int = 20, **filters) -> dict:
+    """Chạy search_statement trên Session đồng bộ
+
+    Returns:
+        dict: {"results": [...], "page", "page_size", "has_more", "approximate"}
+
+    Raises:
+        ValueError: Tham số không hợp lệ
+        TimeoutError: Truy vấn vượt quá SEARCH_TIMEOUT_MS
+    """
+    stmt = search_statement(q, page=page, page_size=page_size, **filters)
+    if stmt is None:
+        return _search_page([], page, page_size)
+    try:
+        session.execute(SET_TIMEOUT)
+        rows = session.execute(stmt).all()
+    except DBAPIError as e:
+        session.rollback()
+        raise _timeout_error(e) or e
+    return _search_page(rows, page, page_size)
+
+async def search_async(session, q: str, page: int = 1, page_size: int = 20, **filters) -> dict:
+    """Như search() nhưng trên AsyncSession (API)"""
+    stmt = search_statement(q, page=page, page_size=page_size, **filters)
+    if stmt is None:
+        return _search_page([], page, page_size)
+    try:
+        await session.execute(SET_TIMEOUT)
+        rows = (await session.execute(stmt)).all()
+    except DBAPIError as e:
+        await session.rollback()
+        raise _timeout_error(e) or e
+    return _search_page(rows, page, page_size)
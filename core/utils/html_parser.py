@@ -0,0 +1,43 @@
+import os
+import importlib.util
+from functools import lru_cache
+from bs4 import BeautifulSoup
+
+# Backend -> module cần có để dùng được backend đó
+PARSER_BACKENDS = {
+    'lxml': 'lxml',              # libxml2 (C), nhanh nhất
+    'html.parser': None,         # thuần Python, luôn có sẵn
+    'html5lib': 'html5lib',      # thuần Python, chậm nhưng sát trình duyệt nhất
+}
+
+@lru_cache(maxsize=None)
+def available_backends() -> tuple:
+    """Danh sách backend cài đặt được trong môi trường hiện tại"""
+    return tuple(
+        name for name, module in PARSER_BACKENDS.items()
+        if module is None or importlib.util.find_spec(module) is not None
+    )
+
+def get_parser_backend(name: str = None) -> str:
+    """Chọn backend parse HTML
+
+    Thứ tự ưu tiên: tham số `name`, biến môi trường HTML_PARSER_BACKEND,
+    rồi 'lxml' nếu đã cài, cuối cùng là 'html.parser'.
+    """
+    name = name or os.getenv('HTML_PARSER_BACKEND')
+    backends = available_backends()
+    if name:
+        if name not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend: {name}")
+        if name not in backends:
+            raise ValueError(f"Parser backend {name} is not installed")
+        return name
+    return 'lxml' if 'lxml' in backends else 'html.parser'
+
+def make_soup(markup, backend: str = None) -> BeautifulSoup:
+    """Tạo cây BeautifulSoup với backend đã chọn
+
+    Mọi backend đều trả về cây bs4 nên các hàm trích xuất dùng chung API
+    find/find_parent/find_next_sibling không phải thay đổi.
+    """
+    return BeautifulSoup(markup, get_parser_backend(backend))
@@ -2,7 +2,7 @@ import argparse
 import logging
 import sys
 from typing import Optional
-from core.database import DatabaseManager, engine
+from core.database import DatabaseManager, engine, CSV_NULL
 import subprocess
 from core.models import LegalDocument, LegalQA, Judgment, Base, CrawlTracker, ProcessTracker, ProcessedArticle
 from datetime import datetime
@@ -99,6 +99,37 @@ def main():
         required=True,
         help='Đường dẫn file dữ liệu'
     )
+    io_parser.add_argument(
+        '--table',
+        required=True,
+        help='Tên bảng cần import/export (VD: legal_documents)'
+    )
+    io_parser.add_argument(
+        '--columns',
+        help='Danh sách cột cần export, phân tách bằng dấu phẩy (mặc định: tất cả)'
+    )
+    io_parser.add_argument(
+        '--on-conflict',
+        choices=['update', 'nothing'],
+        default='update',
+        help='Xử lý bản ghi trùng khóa khi import (mặc định: update)'
+    )
+    io_parser.add_argument(
+        '--method',
+        choices=['copy', 'executemany'],
+        default=None,
+        help='Cách import: copy (COPY qua bảng staging) hoặc executemany (mặc định: copy với PostgreSQL)'
+    )
+    io_parser.add_argument(
+        '--null',
+        default=CSV_NULL,
+        help='Giá trị NULL trong file import (mặc định: \\N như file export; dùng "" nếu ô trống là NULL)'
+    )
+    io_parser.add_argument(
+        '--gzip',
+        action='store_true',
+        help='Nén file export bằng gzip (tự bật khi file có đuôi .gz)'
+    )
 
     # Lệnh migration
     migrate_parser = subparsers.add_parser(
@@ -228,9 +259,20 @@ def main():
                         
                 elif args.command == 'io':
                     if args.action == 'export':
-                        db.export_data(args.table, args.file)
+                        db.export_data(
+                            args.table,
+                            args.file,
+                            columns=args.columns.split(',') if args.columns else None,
+                            compress=True if args.gzip else None
+                        )
                     else:
-                        db.import_data(args.table, args.file)
+                        db.import_data(
+                            args.table,
+                            args.file,
+                            on_conflict=args.on_conflict,
+                            method=args.method,
+                            null=args.null
+                        )
 
     except Exception as e:
         logger.error(f"Operation failed: {str(e)}", exc_info=True)
@@ -0,0 +1,128 @@
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text, func
+from core.database import SessionLocal
+from core.models import LegalDocument, Judgment, with_content
+
+logger = logging.getLogger(__name__)
+
+# Văn bản giả được đánh dấu bằng source_id để xóa sau khi đo
+SOURCE_PREFIX = 'bench-content-'
+
+# Nội dung sinh từ md5 để không bị TOAST nén quá mức như chuỗi lặp
+GENERATE_SQL = text("""
+    INSERT INTO legal_documents (source_id, document_number, document_type, issuing_authority, issue_date,
+                                 metadata_html, content_html, content_text)
+    SELECT
+        :prefix || g,
+        g || '/2026/CONTENT',
+        'Luật',
+        'Quốc hội',
+        current_date - (g % 365),
+        (SELECT string_agg('<td>' || md5(random()::text) || '</td>', '') FROM generate_series(1, :kb * 26 / 10 + 0 * g)),
+        (SELECT string_agg('<p>' || md5(random()::text) || '</p>', '') FROM generate_series(1, :kb * 26 + 0 * g)),
+        (SELECT string_agg(md5(random()::text), ' ') FROM generate_series(1, :kb * 15 + 0 * g))
+    FROM generate_series(:start, :stop) g
+""")
+
+def queries():
+    """Các truy vấn danh sách thường gặp (nhãn, Query builder nhận session)"""
+    since = date.today() - timedelta(days=365)
+    return [
+        ("newest 100", lambda s: s.query(LegalDocument).order_by(LegalDocument.id.desc()).limit(100)),
+        ("issued last year", lambda s: s.query(LegalDocument).filter(LegalDocument.issue_date >= since)
+            .order_by(LegalDocument.issue_date.desc(), LegalDocument.id.desc()).limit(100)),
+        ("random samples", lambda s: s.query(LegalDocument).order_by(func.random()).limit(3)),
+        ("judgments 100", lambda s: s.query(Judgment).order_by(Judgment.id.desc()).limit(100)),
+    ]
+
+def generate(session, count: int, batch: int, kb: int):
+    """Sinh `count` văn bản có content_html khoảng `kb` KB"""
+    start = session.execute(
+        text("SELECT count(*) FROM legal_documents WHERE source_id LIKE :prefix || '%'"),
+        {'prefix': SOURCE_PREFIX}
+    ).scalar()
+    started = time.perf_counter()
+    for first in range(start + 1, start + count + 1, batch):
+        session.execute(GENERATE_SQL, {
+            'prefix': SOURCE_PREFIX, 'kb': kb,
+            'start': first, 'stop': min(first + batch - 1, start + count)
+        })
+        session.commit()
+        done = min(first + batch - 1, start + count) - start
+        logger.warning(f"Generated {done}/{count} documents ({time.perf_counter() - started:.0f}s)")
+    session.execute(text("ANALYZE legal_documents"))
+    session.commit()
+
+def cleanup(session):
+    session.execute(text("DELETE FROM legal_documents WHERE source_id LIKE :prefix || '%'"), {'prefix': SOURCE_PREFIX})
+    session.commit()
+    session.execute(text("ANALYZE legal_documents"))
+    session.commit()
+
+def payload_bytes(session, query) -> tuple:
+    """(số dòng, số byte) của kết quả ở dạng text - xấp xỉ dữ liệu Postgres gửi cho client"""
+    sql = query.statement.compile(dialect=session.bind.dialect, compile_kwargs={'literal_binds': True})
+    row = session.execute(text(f"SELECT count(*), coalesce(sum(octet_length(t::text)), 0) FROM ({sql}) t")).one()
+    session.rollback()
+    return row[0], row[1]
+
+def measure(session, query, repeat: int) -> list:
+    """Thời gian (ms) chạy query và dựng object ORM, mỗi lần với identity map trống"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query.with_session(session).all()
+        timings.append((time.perf_counter() - started) * 1000)
+        session.rollback()
+        session.expunge_all()
+    return timings
+
+def percentile(values, p: float) -> float:
+    return statistics.quantiles(values, n=100, method='inclusive')[int(p) - 1] if len(values) > 1 else values[0]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='So sánh query ORM đọc cả cột nội dung (with_content) với mặc định deferred: số byte và độ trễ'
+    )
+    parser.add_argument('--generate', type=int, default=0, metavar='N',
+                        help='Sinh thêm N văn bản giả có nội dung lớn trước khi đo (VD: 2000)')
+    parser.add_argument('--kb', type=int, default=200, help='Kích thước content_html mỗi văn bản giả (KB, mặc định: 200)')
+    parser.add_argument('--batch', type=int, default=200, help='Số văn bản sinh mỗi transaction')
+    parser.add_argument('--repeat', type=int, default=10, help='Số lần chạy mỗi truy vấn (mặc định: 10)')
+    parser.add_argument('--cleanup', action='store_true', help='Xóa văn bản giả sau khi đo')
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        if args.generate:
+            generate(session, args.generate, args.batch, args.kb)
+
+        print(f"{'query':<18}{'loading':<10}{'rows':>6}{'MB':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for label, build in queries():
+            model = build(session).column_descriptions[0]['entity']
+            for loading, query in (("content", build(session).options(with_content(model))),
+                                   ("deferred", build(session))):
+                rows, size = payload_bytes(session, query)
+                measure(session, query, 1)  # làm nóng cache
+                timings = measure(session, query, args.repeat)
+                print(
+                    f"{label:<18}{loading:<10}{rows:>6}{size / 1024 / 1024:>10.2f}"
+                    f"{percentile(timings, 50):>10.1f}{percentile(timings, 95):>10.1f}"
+                )
+
+        if args.cleanup:
+            cleanup(session)
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+import zlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.crawlers.law_crawler import LawCrawler
+from core.crawlers.judgment_crawler import JudgmentCrawler
+from core.utils.html_parser import available_backends
+
+logger = logging.getLogger(__name__)
+
+# HTML thô được serialize lại khác nhau giữa các backend nên không so sánh
+RAW_FIELDS = {'content_html', 'metadata_html'}
+
+def load_corpus(corpus_dir: str, limit: int = None) -> list:
+    """Đọc corpus HTML: file *.html hoặc thư mục cache HTTP (*.z)"""
+    paths = sorted(glob.glob(os.path.join(corpus_dir, '**', '*.html'), recursive=True))
+    docs = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            docs.append((path, f.read()))
+
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '**', '*.z'), recursive=True)):
+        with open(path, 'rb') as f:
+            docs.append((path, zlib.decompress(f.read())))
+
+    return docs[:limit] if limit else docs
+
+def run_extractors(crawler, html) -> dict:
+    try:
+        data = crawler.parse(html)
+        return {k: v for k, v in data.items() if k not in RAW_FIELDS}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark các backend parse HTML (docs/sec) và kiểm tra kết quả trích xuất')
+    parser.add_argument('type', choices=['law', 'judgment'])
+    parser.add_argument('--corpus', default='cache/http',
+                        help='Thư mục chứa HTML đã lưu (*.html hoặc cache HTTP *.z) (mặc định: cache/http)')
+    parser.add_argument('--backends', nargs='+', default=None,
+                        help='Các backend cần đo (mặc định: tất cả backend đã cài)')
+    parser.add_argument('--baseline', default='html.parser',
+                        help='Backend làm chuẩn để so sánh kết quả (mặc định: html.parser)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    docs = load_corpus(args.corpus, args.limit)
+    if not docs:
+        logger.error(f"Không tìm thấy HTML nào trong {args.corpus}")
+        sys.exit(1)
+
+    # Backend chuẩn chạy trước để có kết quả so sánh
+    backends = [args.baseline] + [
+        b for b in (args.backends or available_backends()) if b != args.baseline
+    ]
+
+    crawler = LawCrawler() if args.type == 'law' else JudgmentCrawler()
+    outputs = {}
+
+    print(f"Corpus: {len(docs)} documents from {args.corpus}")
+    print(f"{'backend':<14}{'docs/sec':>12}{'mismatches':>12}")
+    for backend in backends:
+        crawler.parser_backend = backend
+        outputs[backend] = [run_extractors(crawler, html) for _, html in docs]
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            for _, html in docs:
+                run_extractors(crawler, html)
+        elapsed = time.perf_counter() - started
+
+        mismatches = [
+            path for (path, _), out, base in zip(docs, outputs[backend], outputs[args.baseline])
+            if out != base
+        ] if backend != args.baseline else []
+        print(f"{backend:<14}{len(docs) * args.repeat / elapsed:>12.1f}{len(mismatches):>12}")
+        for path in mismatches[:5]:
+            print(f"    differs from {args.baseline}: {path}")
+
+    if any(
+        out != base
+        for backend in backends
+        for out, base in zip(outputs[backend], outputs[args.baseline])
+    ):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import date
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from core.database import SessionLocal
+from core.search import search
+
+logger = logging.getLogger(__name__)
+
+# Văn bản giả được đánh dấu bằng source_id để xóa sau khi đo
+SOURCE_PREFIX = 'bench-'
+
+# Từ đầu danh sách xuất hiện nhiều, cuối danh sách hiếm (xem GENERATE_SQL)
+VOCABULARY = (
+    "quy định điều khoản luật này các cơ quan tổ chức cá nhân có trách nhiệm thực hiện "
+    "theo của và được không phải trong đối với việc người nhà nước quyền nghĩa vụ "
+    "hợp đồng xử phạt vi phạm hành chính thuế đất đai lao động doanh nghiệp đầu tư "
+    "bảo hiểm xã hội y tế giáo dục môi trường tài nguyên khoáng sản giao thông "
+    "hình sự dân sự tố tụng tòa án viện kiểm sát thi hành án công chứng luật sư "
+    "sở hữu trí tuệ chuyển nhượng thừa kế hôn nhân gia đình nuôi con nuôi quốc tịch "
+    "xuất nhập cảnh hải quan chứng khoán ngân hàng tín dụng kiểm toán ngân sách "
+    "phí lệ phí đấu thầu xây dựng quy hoạch nhà ở kinh doanh bất động sản cạnh tranh "
+    "tiêu chuẩn quy chuẩn kỹ thuật đo lường chất lượng sản phẩm hàng hóa an toàn "
+    "thực phẩm dược phẩm trang thiết bị phòng cháy chữa cháy quốc phòng an ninh "
+    "biên giới lãnh hải thủy sản lâm nghiệp trồng trọt chăn nuôi thú y thủy lợi "
+    "đê điều khí tượng thủy văn viễn thông tần số vô tuyến điện báo chí xuất bản "
+    "di sản văn hóa điện ảnh quảng cáo thể dục thể thao du lịch tín ngưỡng tôn giáo"
+).split()
+
+# Số mã hiếm khác nhau: với 1 triệu văn bản x 3 mã, mỗi mã xuất hiện ở ~15 văn bản
+RARE_TOKENS = 200000
+
+DOCUMENT_TYPES = ['Luật', 'Nghị định', 'Thông tư', 'Quyết định', 'Nghị quyết', 'Chỉ thị']
+AUTHORITIES = ['Quốc hội', 'Chính phủ', 'Thủ tướng Chính phủ', 'Bộ Tài chính', 'Bộ Tư pháp',
+               'Bộ Công an', 'Ngân hàng Nhà nước Việt Nam', 'Ủy ban nhân dân thành phố Hà Nội']
+
+GENERATE_SQL = text("""
+    INSERT INTO legal_documents (source_id, document_number, document_type, issuing_authority, issue_date, content_text)
+    SELECT
+        :prefix || g,
+        g || '/' || (2000 + g % 25) || '/BENCH',
+        (:types)[1 + g % cardinality(:types)],
+        (:authorities)[1 + (g / 7) % cardinality(:authorities)],
+        DATE '2000-01-01' + (g % 9000),
+        -- random()^3: phân bố lệch, từ đầu VOCABULARY phổ biến hơn nhiều từ cuối.
+        -- Thêm vài mã hiếm (hs<n>) để có cả truy vấn chọn lọc cao như số hiệu, tên riêng
+        (SELECT string_agg(
+                    CASE WHEN i % 100 = 0 THEN 'hs' || floor(random() * :rare_tokens)::int
+                         ELSE (:vocabulary)[1 + floor(cardinality(:vocabulary) * random() ^ 3)::int] END,
+                    ' ')
+         FROM generate_series(1, :words + 0 * g) i)
+    FROM generate_series(:start, :stop) g
+""")
+
+QUERIES = [
+    ("common term", dict(q="quy định")),
+    ("rare code", dict(q="hs12345")),
+    ("rare word", dict(q=VOCABULARY[-1])),
+    ("two terms", dict(q="hợp đồng lao động")),
+    ("phrase", dict(q='"trách nhiệm hình sự"')),
+    ("no diacritics", dict(q="quyen so huu")),
+    ("type + authority", dict(q="thuế", document_type="Nghị định", authority="chinh phu")),
+    ("date range", dict(q="đất đai", date_from=date(2015, 1, 1), date_to=date(2016, 12, 31))),
+    ("deep page", dict(q="quy định", page=40, page_size=25)),
+]
+
+def generate(session, count: int, batch: int, words: int):
+    """Sinh `count` văn bản giả ngay trong Postgres (trigger tính search_vector như khi crawl)"""
+    start = session.execute(
+        text("SELECT count(*) FROM legal_documents WHERE source_id LIKE :prefix || '%'"),
+        {'prefix': SOURCE_PREFIX}
+    ).scalar()
+    started = time.perf_counter()
+    for first in range(start + 1, start + count + 1, batch):
+        session.execute(GENERATE_SQL, {
+            'prefix': SOURCE_PREFIX, 'types': DOCUMENT_TYPES, 'authorities': AUTHORITIES,
+            'vocabulary': VOCABULARY, 'words': words, 'rare_tokens': RARE_TOKENS,
+            'start': first, 'stop': min(first + batch - 1, start + count)
+        })
+        session.commit()
+        done = min(first + batch - 1, start + count) - start
+        logger.warning(f"Generated {done}/{count} documents ({time.perf_counter() - started:.0f}s)")
+    session.execute(text("ANALYZE legal_documents"))
+    session.commit()
+
+def cleanup(session, batch: int = 10000):
+    while session.execute(text("""
+        DELETE FROM legal_documents WHERE id IN (
+            SELECT id FROM legal_documents WHERE source_id LIKE :prefix || '%' LIMIT :batch
+        )
+    """), {'prefix': SOURCE_PREFIX, 'batch': batch}).rowcount:
+        session.commit()
+    session.commit()
+    session.execute(text("ANALYZE legal_documents"))
+    session.commit()
+
+def uses_index(session, params: dict) -> bool:
+    session.execute(text("SET LOCAL enable_seqscan = on"))
+    plan = session.execute(
+        text("EXPLAIN SELECT 1 FROM legal_documents WHERE search_vector @@ websearch_to_tsquery('simple', vn_unaccent(:q))"),
+        {'q': params['q']}
+    ).scalars().all()
+    session.rollback()
+    return any('ix_legal_documents_search_vector' in line for line in plan)
+
+def measure(session, params: dict, repeat: int):
+    """Trả về (thời gian từng lần chạy tính bằng ms, số kết quả hoặc 'timeout')"""
+    timings = []
+    hits = 'timeout'
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            hits = len(search(session, **params)['results'])
+        except TimeoutError:
+            hits = 'timeout'
+        timings.append((time.perf_counter() - started) * 1000)
+        session.rollback()
+    return timings, hits
+
+def percentile(values, p: float) -> float:
+    return statistics.quantiles(values, n=100, method='inclusive')[int(p) - 1] if len(values) > 1 else values[0]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark độ trễ tìm kiếm toàn văn (core/search.py) trên corpus giả')
+    parser.add_argument('--generate', type=int, default=0, metavar='N',
+                        help='Sinh thêm N văn bản giả trước khi đo (VD: 1000000)')
+    parser.add_argument('--words', type=int, default=300, help='Số từ trong mỗi văn bản giả (mặc định: 300)')
+    parser.add_argument('--batch', type=int, default=50000, help='Số văn bản sinh mỗi transaction')
+    parser.add_argument('--repeat', type=int, default=20, help='Số lần chạy mỗi truy vấn (mặc định: 20)')
+    parser.add_argument('--cleanup', action='store_true', help='Xóa văn bản giả sau khi đo')
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        if args.generate:
+            generate(session, args.generate, args.batch, args.words)
+
+        total = session.execute(text("SELECT count(*) FROM legal_documents")).scalar()
+        print(f"legal_documents: {total} rows")
+        print(f"{'query':<18}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'hits':>8}  plan")
+        for label, params in QUERIES:
+            measure(session, params, 1)  # làm nóng cache
+            timings, hits = measure(session, params, args.repeat)
+            print(
+                f"{label:<18}{percentile(timings, 50):>9.1f}{percentile(timings, 95):>9.1f}"
+                f"{percentile(timings, 99):>9.1f}{max(timings):>9.1f}{hits:>8}  "
+                f"{'gin' if uses_index(session, params) else 'seq'}"
+            )
+
+        if args.cleanup:
+            cleanup(session)
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    main()
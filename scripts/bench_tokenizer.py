@@ -0,0 +1,107 @@
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_parsers import load_corpus
+from core.processers.structure_tokenizer import tokenize
+from core.utils.html_parser import make_soup
+
+logger = logging.getLogger(__name__)
+
+# Cách phân loại cũ của LawDocumentProcessor: lặp qua từng pattern, re.match + _extract_number
+LEGACY_PATTERNS = {
+    "PHẦN": r"^PHẦN\s+[A-Z]+",
+    "CHƯƠNG": r"^Chương\s+[IVXLCDM]+",
+    "MỤC": r"^Mục\s+\d+",
+    "ĐIỀU": r"^Điều\s+\d+[\.:]?",
+    "KHOẢN": r"^\d+\.",
+    "ĐIỂM": r"^[a-z]\)"
+}
+LEGACY_NUMBER_PATTERNS = {
+    "ĐIỀU": r"Điều\s+(\d+)",
+    "KHOẢN": r"^(\d+)\.",
+    "CHƯƠNG": r"Chương\s+([IVXLCDM]+)",
+    "ĐIỂM": r"^([a-z])\)"
+}
+
+def legacy_tokenize(text: str):
+    for key, pattern in LEGACY_PATTERNS.items():
+        if re.match(pattern, text, re.IGNORECASE):
+            match = re.search(LEGACY_NUMBER_PATTERNS.get(key, r"(\d+)"), text)
+            return key, match.group(1) if match else ""
+    return "CONTENT", ""
+
+def load_lines_from_db(limit: int) -> list:
+    """Lấy HTML văn bản đã crawl trong bảng legal_documents"""
+    from sqlalchemy import select
+    from core.database import SessionLocal
+    from core.models import LegalDocument
+
+    with SessionLocal() as session:
+        rows = session.execute(
+            select(LegalDocument.id, LegalDocument.content_html)
+            .where(LegalDocument.content_html.isnot(None))
+            .order_by(LegalDocument.id).limit(limit)
+        ).all()
+    return [(f"legal_documents#{doc_id}", html) for doc_id, html in rows]
+
+def extract_lines(docs) -> list:
+    """Các dòng <p> khác rỗng, giống đầu vào của LawDocumentProcessor"""
+    lines = []
+    for _, html in docs:
+        if isinstance(html, bytes):
+            html = html.decode('utf-8', errors='replace')
+        soup = make_soup(html.replace('\r\n', " "))
+        lines.extend(text for text in (p.get_text().strip() for p in soup.find_all("p")) if text)
+    return lines
+
+def measure(func, lines, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            func(line)
+    return len(lines) * repeat / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark phân loại dòng cấu trúc văn bản luật (lines/sec)')
+    parser.add_argument('--corpus', default='cache/http',
+                        help='Thư mục chứa HTML đã lưu (*.html hoặc cache HTTP *.z) (mặc định: cache/http)')
+    parser.add_argument('--from-db', type=int, default=None, metavar='N',
+                        help='Lấy N văn bản từ bảng legal_documents thay vì đọc thư mục')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    docs = load_lines_from_db(args.from_db) if args.from_db else load_corpus(args.corpus, args.limit)
+    lines = extract_lines(docs)
+    if not lines:
+        logger.error("Không có dòng văn bản nào để đo")
+        sys.exit(1)
+
+    type_mismatches = [line for line in lines if tokenize(line)[0] != legacy_tokenize(line)[0]]
+    number_changes = sum(1 for line in lines if tokenize(line) != legacy_tokenize(line))
+
+    legacy_rate = measure(legacy_tokenize, lines, args.repeat)
+    rate = measure(tokenize, lines, args.repeat)
+
+    print(f"Corpus: {len(docs)} documents, {len(lines)} lines")
+    print(f"{'tokenizer':<12}{'lines/sec':>14}")
+    print(f"{'legacy':<12}{legacy_rate:>14.0f}")
+    print(f"{'single-regex':<12}{rate:>14.0f}   ({rate / legacy_rate:.1f}x)")
+    print(f"Type mismatches: {len(type_mismatches)}, lines with a different number: {number_changes}")
+    for line in type_mismatches[:5]:
+        print(f"    {line[:80]!r}: {legacy_tokenize(line)} -> {tokenize(line)}")
+
+    if type_mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    main()
@@ -1,70 +1,206 @@
 import sys
 import os
+import time
+import argparse
 import logging
-import pandas as pd
-from sqlalchemy import func, text
-from collections import Counter
+from itertools import groupby
+from sqlalchemy import select, update, delete, text, tuple_, column, values, Integer
+from sqlalchemy.exc import OperationalError, IntegrityError
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from core.database import DatabaseManager
-from core.models import LegalDocument
+from core.database import SessionLocal
+from core.cache import notify_keys
+from core.models import LegalDocument, JudgmentDocumentRelation, ProcessedArticle, ProcessTracker
+from core.models.legal_document import dedup_key, canonical_order
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def check_duplicate_document_numbers():
-    """Kiểm tra document_number xuất hiện nhiều lần trong bảng legal_documents"""
+KEY = dedup_key(LegalDocument.document_number, LegalDocument.issue_date, LegalDocument.issuing_authority)
+# Cột sắp xếp chọn bản giữ lại, đọc kèm mỗi dòng để pick_canonical so sánh như ORDER BY của API
+CANONICAL = [
+    expression.label(f'canonical_{i}')
+    for i, expression in enumerate(canonical_order(LegalDocument.source_id, LegalDocument.content_text, LegalDocument.id))
+]
+
+# Các cột FK trỏ đến legal_documents.id cần chuyển sang bản ghi được giữ lại
+REFERENCES = (
+    (JudgmentDocumentRelation, 'document_id'),
+)
+# Dữ liệu sinh ra từ chính bản ghi thừa (điều khoản LAW-<id>-ART-n, tracker xử lý):
+# không trỏ sang bản giữ lại (trùng điều khoản, vi phạm ux_process_tracker_doc_id_type)
+# mà xóa đi, bản giữ lại được xử lý lại nếu chưa có tracker 'success'
+DERIVED = (ProcessedArticle, ProcessTracker)
+
+def stream_rows(session, page_size: int):
+    """Duyệt legal_documents theo thứ tự khóa trùng lặp (index ix_legal_documents_dedup_key)
+
+    Phân trang keyset: mỗi trang là một truy vấn ngắn rồi kết thúc transaction,
+    nên không giữ snapshot hay khóa lâu trên bảng đang được crawler ghi.
+    """
+    last = None
+    while True:
+        stmt = select(
+            *KEY,
+            LegalDocument.id,
+            LegalDocument.document_number,
+            LegalDocument.source_id,
+            *CANONICAL
+        ).order_by(*KEY, LegalDocument.id).limit(page_size)
+        if last is not None:
+            stmt = stmt.where(tuple_(*KEY, LegalDocument.id) > tuple_(*last))
+
+        rows = session.execute(stmt).all()
+        session.commit()
+        if not rows:
+            return
+        yield from rows
+        last = tuple(rows[-1][:4])
+
+def duplicate_groups(rows):
+    """Gom các dòng liên tiếp cùng khóa, chỉ trả về nhóm có từ 2 bản ghi"""
+    for key, members in groupby(rows, key=lambda row: tuple(row[:3])):
+        members = list(members)
+        if len(members) > 1:
+            yield key, members
+
+def pick_canonical(members):
+    """Bản ghi đứng đầu theo canonical_order (bản GET /documents/{doc_id} trả về)"""
+    return min(members, key=lambda row: tuple(getattr(row, column.name) for column in CANONICAL))
+
+def merge_batch(session, pairs, lock_timeout_ms: int):
+    """Trỏ FK sang bản ghi giữ lại, xóa dữ liệu dẫn xuất và bản ghi thừa trong một transaction ngắn
+
+    Số hiệu của các bản ghi bị xóa được gửi NOTIFY để API bỏ cache (xem core/cache.py).
+    """
+    mapping = values(
+        column('loser_id', Integer), column('keep_id', Integer), name='merge_map'
+    ).data(pairs)
+    loser_ids = [loser for loser, _ in pairs]
+    keep_ids = list({keep for _, keep in pairs})
+
+    # Không chờ khóa lâu: lỗi thì thử lại lô sau
+    session.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+    for model, attr in REFERENCES:
+        fk = getattr(model, attr)
+        session.execute(
+            update(model)
+            .where(fk == mapping.c.loser_id)
+            .values({attr: mapping.c.keep_id})
+            .execution_options(synchronize_session=False)
+        )
+    for model in DERIVED:
+        session.execute(
+            delete(model)
+            .where(model.document_id.in_(loser_ids))
+            .execution_options(synchronize_session=False)
+        )
+    # Sau khi gộp có thể có quan hệ bản án - văn bản bị lặp
+    session.execute(text("""
+        DELETE FROM judgment_document_relations a
+        USING judgment_document_relations b
+        WHERE a.document_id = ANY(:keep_ids)
+          AND a.judgment_id = b.judgment_id
+          AND a.document_id = b.document_id
+          AND a.relation_type IS NOT DISTINCT FROM b.relation_type
+          AND a.id > b.id
+    """), {'keep_ids': keep_ids})
+    deleted_numbers = session.execute(
+        delete(LegalDocument)
+        .where(LegalDocument.id.in_(loser_ids))
+        .returning(LegalDocument.document_number)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    # API có thể đang cache bản ghi vừa xóa theo số hiệu: báo bỏ cache khi commit
+    notify_keys(session, LegalDocument.__tablename__, deleted_numbers)
+    session.commit()
+
+def flush_merges(session, pairs, lock_timeout_ms: int, retries: int = 3) -> int:
+    for attempt in range(1, retries + 1):
+        try:
+            merge_batch(session, pairs, lock_timeout_ms)
+            return len(pairs)
+        except OperationalError as e:
+            session.rollback()
+            logger.warning(f"Merge batch failed (attempt {attempt}/{retries}): {str(e).splitlines()[0]}")
+            time.sleep(attempt)
+        except IntegrityError as e:
+            # Lỗi dữ liệu không tự hết khi thử lại: bỏ qua lô, không dừng cả lần chạy
+            session.rollback()
+            logger.error(f"Merge batch violates a constraint, skipped: {str(e).splitlines()[0]}")
+            return 0
+    logger.error(f"Skipped batch of {len(pairs)} duplicates after {retries} attempts")
+    return 0
+
+def resolve_duplicates(apply=False, page_size=5000, batch_size=500, lock_timeout_ms=5000, show=20) -> dict:
+    """Tìm và (nếu apply=True) gộp văn bản trùng theo dedup_key"""
+    read_session = SessionLocal()
+    write_session = SessionLocal()
+    stats = {'groups': 0, 'duplicates': 0, 'conflicts': 0, 'deleted': 0}
+    pending = []
+
     try:
-        with DatabaseManager() as db:
-            # Cách 1: Sử dụng SQLAlchemy ORM
-            duplicates = db.session.query(
-                LegalDocument.document_number,
-                func.count(LegalDocument.id).label('count')
-            ).group_by(
-                LegalDocument.document_number
-            ).having(
-                func.count(LegalDocument.id) > 1
-            ).order_by(
-                func.count(LegalDocument.id).desc()
-            ).all()
-            
-            # Cách 2: Sử dụng raw SQL (nếu cách 1 có vấn đề)
-            # query = text("""
-            #     SELECT document_number, COUNT(id) as count
-            #     FROM legal_documents
-            #     GROUP BY document_number
-            #     HAVING COUNT(id) > 1
-            #     ORDER BY COUNT(id) DESC;
-            # """)
-            # duplicates = db.session.execute(query).fetchall()
-            
-            # In kết quả
-            if not duplicates:
-                logger.info("Không tìm thấy document_number trùng lặp")
-                return
-                
-            logger.info(f"Tìm thấy {len(duplicates)} document_number bị trùng lặp")
-            
-            # In top 10 document_number trùng lặp nhiều nhất
-            logger.info("Top 10 document_number trùng lặp nhiều nhất:")
-            for doc_num, count in duplicates:
-                logger.info(f"Document Number: {doc_num} - Số lần xuất hiện: {count}")
-                
-            '''# Lấy chi tiết về các bản ghi trùng lặp (Top 3 document number trùng lặp nhiều nhất)
-            logger.info("\nChi tiết về các bản ghi trùng lặp (Top 3):")
-            for doc_num, count in duplicates[:3]:
-                duplicate_docs = db.session.query(LegalDocument).filter(
-                    LegalDocument.document_number == doc_num
-                ).all()
-                
-                logger.info(f"\n=== Chi tiết cho document_number: {doc_num} ===")
-                for doc in duplicate_docs:
-                    logger.info(f"ID: {doc.id}, Document Number: {doc.document_number}, Type: {doc.document_type}, Authority: {doc.issuing_authority}, Issue Date: {doc.issue_date}")
-            ''' 
-    except Exception as e:
-        logger.error(f"Lỗi khi kiểm tra document_number trùng lặp: {str(e)}")
-        sys.exit(1)
+        for key, members in duplicate_groups(stream_rows(read_session, page_size)):
+            source_ids = {row.source_id for row in members if row.source_id}
+            if len(source_ids) > 1:
+                # Nhiều trang nguồn khác nhau: không tự gộp
+                stats['conflicts'] += 1
+                logger.warning(f"Skip {members[0].document_number}: different source ids {sorted(source_ids)}")
+                continue
+
+            keep = pick_canonical(members)
+            losers = [row.id for row in members if row.id != keep.id]
+            stats['groups'] += 1
+            stats['duplicates'] += len(losers)
+            if stats['groups'] <= show:
+                logger.info(
+                    f"{keep.document_number} | {key[1]} | {key[2]}: keep {keep.id}, "
+                    f"{'delete' if apply else 'would delete'} {losers}"
+                )
+
+            if apply:
+                pending.extend((loser, keep.id) for loser in losers)
+                if len(pending) >= batch_size:
+                    stats['deleted'] += flush_merges(write_session, pending, lock_timeout_ms)
+                    pending = []
+
+        if apply and pending:
+            stats['deleted'] += flush_merges(write_session, pending, lock_timeout_ms)
+    finally:
+        read_session.close()
+        write_session.close()
+
+    logger.info(
+        f"{'Merged' if apply else 'Dry run'}: {stats['groups']} duplicate groups, "
+        f"{stats['duplicates']} redundant rows, {stats['deleted']} deleted, "
+        f"{stats['conflicts']} groups skipped (conflicting source ids)"
+    )
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Tìm và gộp văn bản trùng (số hiệu + ngày ban hành + nơi ban hành) trong legal_documents'
+    )
+    parser.add_argument('--apply', action='store_true',
+                        help='Gộp và xóa bản ghi trùng (mặc định chỉ báo cáo - dry run)')
+    parser.add_argument('--page-size', type=int, default=5000,
+                        help='Số dòng đọc mỗi trang khi duyệt bảng (mặc định: 5000)')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Số bản ghi trùng xóa trong mỗi transaction (mặc định: 500)')
+    parser.add_argument('--lock-timeout', type=int, default=5000,
+                        help='lock_timeout (ms) cho mỗi transaction gộp (mặc định: 5000)')
+    parser.add_argument('--show', type=int, default=20,
+                        help='Số nhóm trùng in chi tiết (mặc định: 20)')
+    args = parser.parse_args()
+
+    resolve_duplicates(
+        apply=args.apply,
+        page_size=args.page_size,
+        batch_size=args.batch_size,
+        lock_timeout_ms=args.lock_timeout,
+        show=args.show
+    )
 
 if __name__ == "__main__":
-    check_duplicate_document_numbers()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    main()
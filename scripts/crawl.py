@@ -3,7 +3,9 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from core.crawlers.search_crawler import SearchCrawler
+from core.crawlers.page_scheduler import DEFAULT_MAX_PAGES
 from core.crawlers.crawl_manager import CrawlProcessingService
+from core.crawlers.recrawl_scheduler import RecrawlScheduler
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,8 +23,20 @@ def main():
                                 help='Trang kết thúc (nếu không chỉ định sẽ crawl đến khi hết)')
     crawl_ids_parser.add_argument('--max-empty', type=int, default=3,
                                 help='Số trang trống liên tiếp tối đa (mặc định: 3)')
+    crawl_ids_parser.add_argument('--max-pages', type=int, default=DEFAULT_MAX_PAGES,
+                                help=f'Số trang tối đa khi không có --end-page (mặc định: {DEFAULT_MAX_PAGES})')
     crawl_ids_parser.add_argument('--num-worker', type=int, default=4,
                                 help='Số processor (mặc định: 4)')
+    crawl_ids_parser.add_argument('--page-batch', type=int, default=2,
+                                help='Số trang mỗi worker nhận một lần ở chế độ pool (mặc định: 2)')
+    crawl_ids_parser.add_argument('--mode', choices=['pool', 'async'], default='pool',
+                                help='Chế độ crawl: pool (multiprocessing) hoặc async (asyncio) (mặc định: pool)')
+    crawl_ids_parser.add_argument('--concurrency', type=int, default=8,
+                                help='Số request đồng thời ở chế độ async (mặc định: 8)')
+    crawl_ids_parser.add_argument('--rate', type=float, default=None,
+                                help='Số request/giây tối đa cho mỗi host ở chế độ async (mặc định: concurrency / 2)')
+    crawl_ids_parser.add_argument('--incremental', action='store_true',
+                                help='Chỉ lấy ID mới kể từ lần chạy trước: dừng ở trang đầu tiên toàn ID đã biết')
 
     # Process command
     process_parser = subparsers.add_parser('process', help='Process pending documents')
@@ -30,25 +44,75 @@ def main():
     process_parser.add_argument('--batch-size', type=int, default=100)
     process_parser.add_argument('--max-retries', type=int, default=3)
     process_parser.add_argument('--num-worker', type=int, default=8)
+    process_parser.add_argument('--flush-size', type=int, default=50,
+                                help='Số document gom lại trước khi ghi DB (mặc định: 50)')
+    process_parser.add_argument('--flush-interval', type=float, default=30.0,
+                                help='Số giây tối đa giữa hai lần ghi DB (mặc định: 30)')
+    process_parser.add_argument('--queue', action='store_true',
+                                help='Chế độ hàng đợi: claim từng lô bằng SKIP LOCKED và chạy đến khi hết backlog')
+
+    # Recrawl command
+    recrawl_parser = subparsers.add_parser('recrawl', help='Re-check crawled documents that are due and save changes')
+    recrawl_parser.add_argument('type', choices=['law', 'judgment'])
+    recrawl_parser.add_argument('--limit', type=int, default=None,
+                                help='Số document tối đa cần kiểm tra (mặc định: tất cả document đến hạn)')
+    recrawl_parser.add_argument('--batch-size', type=int, default=100)
+    recrawl_parser.add_argument('--flush-size', type=int, default=50,
+                                help='Số document thay đổi gom lại trước khi ghi DB (mặc định: 50)')
+    recrawl_parser.add_argument('--delay', type=float, default=1.0,
+                                help='Số giây chờ giữa hai request (mặc định: 1)')
+
+    for sub in (crawl_ids_parser, process_parser, recrawl_parser):
+        sub.add_argument('--cache-mode', choices=['revalidate', 'offline', 'off'], default=None,
+                         help='Cache HTTP trên đĩa: revalidate (conditional GET), offline (không gọi mạng nếu đã có cache), off')
 
     args = parser.parse_args()
+    if args.cache_mode:
+        # Worker process đọc cấu hình cache từ biến môi trường
+        os.environ['HTTP_CACHE_MODE'] = args.cache_mode
 
     if args.command == 'crawl-ids':
         crawler = SearchCrawler(args.type)
-        crawler.crawl_ids(
-            start_page=args.start_page,
-            end_page=args.end_page, 
-            max_empty_pages=args.max_empty,
-            num_processes=args.num_worker
-        )
+        if args.mode == 'async':
+            crawler.crawl_ids_async(
+                start_page=args.start_page,
+                end_page=args.end_page,
+                max_empty_pages=args.max_empty,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                incremental=args.incremental,
+                max_pages=args.max_pages
+            )
+        else:
+            crawler.crawl_ids(
+                start_page=args.start_page,
+                end_page=args.end_page, 
+                max_empty_pages=args.max_empty,
+                num_processes=args.num_worker,
+                batch_size=args.page_batch,
+                incremental=args.incremental,
+                max_pages=args.max_pages
+            )
     elif args.command == 'process':
         processor = CrawlProcessingService(
             doc_type=args.type,
             batch_size=args.batch_size,
             max_retries=args.max_retries,
             num_processes=args.num_worker,
+            flush_size=args.flush_size,
+            flush_interval=args.flush_interval,
         )
-        processor.process_pending()
+        if args.queue:
+            processor.consume()
+        else:
+            processor.process_pending()
+    elif args.command == 'recrawl':
+        RecrawlScheduler(
+            args.type,
+            batch_size=args.batch_size,
+            flush_size=args.flush_size,
+            delay=args.delay
+        ).run(limit=args.limit)
 
 if __name__ == "__main__":
     logging.basicConfig(
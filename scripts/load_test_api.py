@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import quote
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = ('detail', 'list', 'search')
+SEARCH_QUERIES = ["quy định", "hợp đồng lao động", "quyen so huu", "thuế", "đất đai", "xử phạt vi phạm hành chính"]
+
+async def collect_document_numbers(session, base_url: str, pages: int) -> list:
+    """Lấy một số document_number qua /documents để dùng cho request chi tiết"""
+    numbers, cursor = [], None
+    for _ in range(pages):
+        url = f"{base_url}/documents?limit=100" + (f"&cursor={cursor}" if cursor else "")
+        async with session.get(url) as response:
+            response.raise_for_status()
+            page = await response.json()
+        numbers.extend(item['document_number'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    return numbers
+
+def parse_mix(mix: str) -> dict:
+    """"detail:5,list:3,search:2" -> {'detail': 5.0, 'list': 3.0, 'search': 2.0}"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition(':')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}, expected one of {ENDPOINTS}")
+        weights[name] = float(weight or 1)
+    return weights
+
+def make_request(base_url: str, mix: dict, numbers: list, max_cursor: int):
+    """Chọn ngẫu nhiên một request theo tỉ lệ trong `mix`"""
+    name = random.choices(list(mix), weights=list(mix.values()))[0]
+    if name == 'detail':
+        return name, f"{base_url}/documents/{quote(random.choice(numbers))}"
+    if name == 'list':
+        return name, f"{base_url}/documents?limit=50&cursor={random.randint(0, max_cursor)}"
+    return name, f"{base_url}/search?q={quote(random.choice(SEARCH_QUERIES))}&page_size=20"
+
+async def user(session, base_url, mix, numbers, max_cursor, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        name, url = make_request(base_url, mix, numbers, max_cursor)
+        started = time.perf_counter()
+        try:
+            async with session.get(url) as response:
+                await response.read()
+                if response.status >= 400:
+                    errors[name] += 1
+                    continue
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            errors[name] += 1
+            continue
+        latencies[name].append((time.perf_counter() - started) * 1000)
+
+def percentile(values, p: int) -> float:
+    return statistics.quantiles(values, n=100, method='inclusive')[p - 1] if len(values) > 1 else values[0]
+
+async def run(args):
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        mix = parse_mix(args.mix)
+        numbers = await collect_document_numbers(session, args.base_url, args.sample_pages) if 'detail' in mix else []
+        latencies, errors = defaultdict(list), defaultdict(int)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            user(session, args.base_url, mix, numbers, args.max_cursor, deadline, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.concurrency} concurrent users, {elapsed:.0f}s, {total / elapsed:.0f} req/s")
+    print(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name in ENDPOINTS:
+        values = latencies.get(name)
+        if not values:
+            continue
+        print(
+            f"{name:<10}{len(values):>10}{errors[name]:>8}{percentile(values, 50):>10.1f}"
+            f"{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}"
+        )
+    all_values = [value for values in latencies.values() for value in values]
+    if all_values:
+        print(f"{'all':<10}{len(all_values):>10}{sum(errors.values()):>8}{percentile(all_values, 50):>10.1f}"
+              f"{percentile(all_values, 95):>10.1f}{percentile(all_values, 99):>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test API (/documents, /documents/{id}, /search), báo cáo p50/p95/p99')
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--concurrency', type=int, default=50, help='Số người dùng đồng thời (mặc định: 50)')
+    parser.add_argument('--duration', type=float, default=30, help='Thời gian chạy (giây, mặc định: 30)')
+    parser.add_argument('--mix', default='detail:5,list:3,search:2',
+                        help='Tỉ lệ request theo endpoint (mặc định: detail:5,list:3,search:2)')
+    parser.add_argument('--max-cursor', type=int, default=1000,
+                        help='Cursor lớn nhất khi chọn ngẫu nhiên trang /documents (thường là id lớn nhất)')
+    parser.add_argument('--sample-pages', type=int, default=10,
+                        help='Số trang /documents dùng để lấy document_number cho request chi tiết')
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout mỗi request (giây)')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    except ValueError as e:
+        parser.error(str(e))
+    except aiohttp.ClientError as e:
+        logger.error(f"Không kết nối được API {args.base_url}: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    main()
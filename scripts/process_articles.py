@@ -0,0 +1,33 @@
+import argparse
+import logging
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.processers.legal_processor import process_all_documents
+
+def main():
+    parser = argparse.ArgumentParser(description='Tách điều khoản (ProcessedArticle) cho các văn bản đã crawl')
+    parser.add_argument('--num-worker', type=int, default=None,
+                        help='Số process parse HTML (mặc định: số CPU)')
+    parser.add_argument('--batch-size', type=int, default=200,
+                        help='Số văn bản đọc HTML mỗi lô (mặc định: 200)')
+    parser.add_argument('--flush-size', type=int, default=50,
+                        help='Số văn bản gom lại trước khi ghi DB (mặc định: 50)')
+    parser.add_argument('--reprocess', action='store_true',
+                        help='Xử lý lại cả văn bản đã có ProcessTracker success')
+    args = parser.parse_args()
+
+    process_all_documents(
+        num_processes=args.num_worker,
+        batch_size=args.batch_size,
+        flush_size=args.flush_size,
+        reprocess=args.reprocess
+    )
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    main()
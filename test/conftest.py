@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import OperationalError
+
+from core.database import engine
+from core.models import Base
+
+# Schema tạm cho các test cần PostgreSQL (theo cấu hình .env). Bảng được tạo từ
+# model và đặt đầu search_path, nên cả query ORM lẫn SQL thuần đều dùng schema này.
+SCHEMA = 'pytest_tmp'
+
+@pytest.fixture
+def pg_session():
+    try:
+        connection = engine.connect()
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL không khả dụng: {e}")
+
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    connection.execute(text(f"SET search_path TO {SCHEMA}"))
+    connection.commit()
+    Base.metadata.create_all(connection)
+    connection.commit()
+
+    with Session(bind=connection) as session:
+        yield session
+
+    connection.rollback()
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text("RESET search_path"))
+    # Kết nối trở lại pool: bỏ LISTEN và thông báo chưa đọc của test
+    connection.execute(text("UNLISTEN *"))
+    connection.commit()
+    connection.connection.driver_connection.notifies.clear()
+    connection.close()
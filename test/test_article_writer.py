@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+
+from core.models import LegalDocument, ProcessTracker, ProcessedArticle
+from core.processers.article_writer import ArticleWriter
+
+# Cần PostgreSQL (fixture pg_session trong conftest.py)
+
+def article(document_id: int, number: int) -> dict:
+    return {
+        'article_id': f"LAW-{document_id}-ART-{number}",
+        'content': f"Điều {number}",
+        'structural_metadata': {'hierarchy': [], 'prefix': '', 'article_number': f"Điều {number}"},
+    }
+
+def stored(session):
+    return session.execute(select(ProcessedArticle.article_id).order_by(ProcessedArticle.article_id)).scalars().all()
+
+def test_failed_reprocess_keeps_previous_articles(pg_session):
+    first, second = LegalDocument(document_number='1/2020/QH14'), LegalDocument(document_number='2/2020/QH14')
+    pg_session.add_all([first, second])
+    pg_session.commit()
+
+    writer = ArticleWriter(pg_session)
+    writer.add(first.id, [article(first.id, 1), article(first.id, 2)])
+    writer.add(second.id, [article(second.id, 1)])
+    writer.flush()
+
+    # Lần chạy lại: văn bản đầu lỗi, văn bản sau còn một điều khác
+    writer.add_failure(first.id, 'timeout')
+    writer.add(second.id, [article(second.id, 3)])
+    writer.flush()
+
+    assert stored(pg_session) == [f"LAW-{first.id}-ART-1", f"LAW-{first.id}-ART-2", f"LAW-{second.id}-ART-3"]
+    trackers = dict(pg_session.execute(select(ProcessTracker.document_id, ProcessTracker.status)).all())
+    assert trackers == {first.id: 'failed', second.id: 'success'}
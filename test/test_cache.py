@@ -0,0 +1,92 @@
+import sys
+import os
+import json
+import time
+import asyncio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.cache import TTLCache, Invalidations, notify_changed, cache_key
+from core.api.main import etag_matches
+from core.models import LegalDocument, Judgment
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_ttl_cache_evicts_least_recently_used_by_size():
+    cache = TTLCache(max_bytes=10, ttl=60)
+    run(cache.set('a', b'1234'))
+    run(cache.set('b', b'1234'))
+    assert run(cache.get('a')) == b'1234'  # 'a' mới dùng, 'b' bị loại trước
+    run(cache.set('c', b'1234'))
+    assert run(cache.get('b')) is None
+    assert run(cache.get('a')) == b'1234'
+    assert cache.size == 8
+
+def test_ttl_cache_expiry_delete_and_oversized_values():
+    cache = TTLCache(max_bytes=10, ttl=0.01)
+    run(cache.set('a', b'x'))
+    run(cache.set('big', b'x' * 11))
+    assert run(cache.get('big')) is None
+    time.sleep(0.02)
+    assert run(cache.get('a')) is None
+    assert cache.size == 0
+
+    cache.ttl = 60
+    run(cache.set('a', b'xy'))
+    run(cache.delete('a', 'missing'))
+    assert run(cache.get('a')) is None
+    assert cache.size == 0
+
+def test_invalidation_after_read_marks_response_stale():
+    invalidations = Invalidations()
+    read_at = time.monotonic()
+    assert not invalidations.stale('legal_documents:1', read_at)
+    invalidations.mark('legal_documents:1')
+    assert invalidations.stale('legal_documents:1', read_at)
+    assert not invalidations.stale('legal_documents:2', read_at)
+    # Đọc lại sau thông báo thì được lưu
+    assert not invalidations.stale('legal_documents:1', time.monotonic())
+
+def test_invalidations_clear_and_horizon():
+    invalidations = Invalidations(horizon=0.01)
+    read_at = time.monotonic()
+    invalidations.mark_all()
+    assert invalidations.stale('any', read_at)
+    time.sleep(0.02)
+    # Lần đọc cũ hơn horizon không còn mốc để so: coi là stale
+    assert invalidations.stale('any', read_at)
+    invalidations.mark('other')
+    assert list(invalidations._times) == ['other']
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"abcd"', etag)
+    assert not etag_matches(None, etag)
+
+class RecordingSession:
+    def __init__(self):
+        self.payloads = []
+
+    def execute(self, stmt):
+        params = stmt.compile().params
+        self.payloads.append(json.loads(next(v for v in params.values() if v.startswith('{'))))
+
+def test_notify_changed_chunks_payloads_and_skips_uncached_tables():
+    session = RecordingSession()
+    numbers = [f"{i}/2020/NĐ-CP-" + 'x' * 100 for i in range(200)]
+    records = [LegalDocument(document_number=n) for n in numbers + numbers[:5]]
+    notify_changed(session, records + [Judgment(case_number='1/2020/HS-ST')])
+
+    assert len(session.payloads) > 1
+    assert all(len(json.dumps(p, ensure_ascii=False).encode()) < 8000 for p in session.payloads)
+    assert all(p['table'] == 'legal_documents' for p in session.payloads)
+    assert [key for p in session.payloads for key in p['keys']] == numbers
+    assert cache_key('legal_documents', numbers[0]) == f"legal_documents:{numbers[0]}"
+
+def test_notify_changed_without_changes_sends_nothing():
+    session = RecordingSession()
+    notify_changed(session, [])
+    assert session.payloads == []
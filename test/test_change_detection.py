@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from core.crawlers import crawl_manager
+from core.crawlers.law_crawler import LawCrawler
+from core.crawlers.recrawl_scheduler import RecrawlScheduler
+from core.crawlers.change_detection import (
+    refresh_interval, record_check, content_hash, MIN_INTERVAL_DAYS, MAX_INTERVAL_DAYS, DEFAULT_INTERVAL_DAYS
+)
+
+def test_first_interval_depends_on_document_age():
+    today = date.today()
+    assert refresh_interval(today - timedelta(days=3), None, False) == timedelta(days=1)
+    assert refresh_interval(today - timedelta(days=100), None, False) == timedelta(days=7)
+    assert refresh_interval(today - timedelta(days=1000), None, False) == timedelta(days=30)
+    assert refresh_interval(today - timedelta(days=4000), None, False) == timedelta(days=DEFAULT_INTERVAL_DAYS)
+    assert refresh_interval(None, None, False) == timedelta(days=DEFAULT_INTERVAL_DAYS)
+
+def test_interval_halves_on_change_doubles_otherwise_within_bounds():
+    assert refresh_interval(None, timedelta(days=8), True) == timedelta(days=4)
+    assert refresh_interval(None, timedelta(days=8), False) == timedelta(days=16)
+    assert refresh_interval(None, timedelta(days=MIN_INTERVAL_DAYS), True) == timedelta(days=MIN_INTERVAL_DAYS)
+    assert refresh_interval(None, timedelta(days=MAX_INTERVAL_DAYS), False) == timedelta(days=MAX_INTERVAL_DAYS)
+
+def tracker(interval_days=None):
+    now = datetime.now()
+    if interval_days is None:
+        return SimpleNamespace(content_hash=None, change_count=0, last_checked_at=None, next_check_at=None)
+    return SimpleNamespace(content_hash='old', change_count=0, last_checked_at=now - timedelta(days=1),
+                           next_check_at=now - timedelta(days=1) + timedelta(days=interval_days))
+
+def interval(t) -> float:
+    return round((t.next_check_at - t.last_checked_at).total_seconds() / 86400, 3)
+
+def test_record_check_updates_hash_and_schedule():
+    t = tracker(8)
+    record_check(t, 'new', changed=True)
+    assert (t.content_hash, t.change_count, interval(t)) == ('new', 1, 4)
+
+    t = tracker(8)
+    record_check(t, None)
+    assert (t.content_hash, t.change_count, interval(t)) == ('old', 0, 16)
+
+def test_failed_check_keeps_interval():
+    t = tracker(8)
+    record_check(t, None, failed=True)
+    assert (t.content_hash, interval(t)) == ('old', 8)
+
+    t = tracker()
+    record_check(t, None, failed=True)
+    assert interval(t) == MIN_INTERVAL_DAYS
+
+def test_content_hash_ignores_html_and_whitespace():
+    data = {'document_number': '12/2020/QH14', 'content_text': 'Điều 1.  Phạm vi\n', 'content_html': '<p>a</p>',
+            'issue_date': datetime(2020, 6, 1)}
+    same = dict(data, content_text=' Điều 1. Phạm vi', content_html='<div>b</div>')
+    assert content_hash(data) == content_hash(same)
+    assert content_hash(data) != content_hash(dict(data, content_text='Điều 2'))
+
+def test_first_crawl_hash_matches_recheck(monkeypatch):
+    with open(os.path.join(os.path.dirname(__file__), 'fixtures', 'html', 'law_luat_xay_dung.html'), 'rb') as f:
+        html = f.read()
+    crawler = LawCrawler()
+    crawler.crawl = lambda document_id: dict(crawler.parse(html), source_id=document_id)
+    crawler.http = SimpleNamespace(get=lambda url: SimpleNamespace(content=html, raise_for_status=lambda: None))
+
+    # Lần crawl đầu: hash được đưa vào write buffer cùng bản ghi
+    added = {}
+    buffer = SimpleNamespace(add_success=lambda tracker, record, new_hash=None, published=None, changed=False:
+                             added.update(new_hash=new_hash, published=published),
+                             add_failure=lambda tracker, error: added.update(error=error))
+    monkeypatch.setattr(crawl_manager, 'worker_crawler', crawler, raising=False)
+    monkeypatch.setattr(crawl_manager, 'worker_buffer', buffer, raising=False)
+    crawl_manager.CrawlProcessingService._crawl_into_buffer(
+        SimpleNamespace(document_id='259770', retry_count=0), 'law'
+    )
+    assert 'error' not in added and added['published'] == date(2014, 6, 18)
+
+    # Kiểm tra lại cùng trang: không được coi là thay đổi
+    scheduler = RecrawlScheduler('law')
+    scheduler.crawler = crawler
+    t = tracker(8)
+    t.content_hash, t.document_id = added['new_hash'], '259770'
+    assert scheduler._check(t, buffer) == 'unchanged'
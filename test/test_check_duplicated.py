@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+from datetime import date
+from sqlalchemy import select, text
+
+from core.models import LegalDocument, ProcessTracker, ProcessedArticle
+from core.cache import CHANNEL
+from core.models.legal_document import canonical_order
+from scripts.check_duplicated import merge_batch, stream_rows, duplicate_groups, pick_canonical
+
+# Cần PostgreSQL (fixture pg_session trong conftest.py)
+
+def add_processed(session, document: LegalDocument, status: str = 'success') -> ProcessTracker:
+    tracker = ProcessTracker(document_id=document.id, document_type='law', status=status)
+    session.add(tracker)
+    session.flush()
+    session.add(ProcessedArticle(
+        article_id=f"LAW-{document.id}-ART-1", document_id=document.id,
+        content='Điều 1', process_tracker_id=tracker.id
+    ))
+    return tracker
+
+def test_merge_with_process_trackers_on_both_documents(pg_session):
+    keep = LegalDocument(source_id='100', document_number='12/2020/QH14', issue_date=date(2020, 6, 1),
+                         issuing_authority='Quốc hội', content_text='...')
+    loser = LegalDocument(document_number='12/2020/QH14', issue_date=date(2020, 6, 1),
+                          issuing_authority='Quốc hội', content_text='...')
+    pg_session.add_all([keep, loser])
+    pg_session.flush()
+    keep_tracker = add_processed(pg_session, keep)
+    add_processed(pg_session, loser, status='failed')
+    pg_session.execute(text(f"LISTEN {CHANNEL}"))
+    pg_session.commit()
+
+    merge_batch(pg_session, [(loser.id, keep.id)], lock_timeout_ms=5000)
+
+    # API bỏ cache theo số hiệu của bản ghi bị xóa
+    connection = pg_session.connection().connection.driver_connection
+    connection.poll()
+    assert [json.loads(n.payload) for n in connection.notifies] == [
+        {'table': 'legal_documents', 'keys': ['12/2020/QH14']}
+    ]
+
+    assert pg_session.execute(select(LegalDocument.id)).scalars().all() == [keep.id]
+    assert pg_session.execute(select(ProcessTracker.id)).scalars().all() == [keep_tracker.id]
+    assert pg_session.execute(select(ProcessedArticle.article_id)).scalars().all() == [f"LAW-{keep.id}-ART-1"]
+
+def test_pick_canonical_matches_api_order(pg_session):
+    # Không bản nào có source_id: id nhỏ nhất không có nội dung, bản có nội dung được chọn
+    rows = [
+        LegalDocument(document_number='5/2019/TT-BTC', issue_date=date(2019, 1, 2), issuing_authority='Bộ Tài chính'),
+        LegalDocument(document_number='5/2019/TT-BTC', issue_date=date(2019, 1, 2), issuing_authority='Bộ Tài chính',
+                      content_text='Điều 1'),
+        LegalDocument(document_number='5/2019/TT-BTC', issue_date=date(2019, 1, 2), issuing_authority='Bộ Tài chính',
+                      content_text='Điều 1'),
+    ]
+    pg_session.add_all(rows)
+    pg_session.commit()
+
+    [(_, members)] = list(duplicate_groups(stream_rows(pg_session, page_size=2)))
+    # Cùng ORDER BY với GET /documents/{doc_id}
+    api_pick = pg_session.execute(
+        select(LegalDocument.id)
+        .where(LegalDocument.document_number == '5/2019/TT-BTC')
+        .order_by(*canonical_order(LegalDocument.source_id, LegalDocument.content_text, LegalDocument.id))
+        .limit(1)
+    ).scalar()
+    assert pick_canonical(members).id == api_pick == rows[1].id
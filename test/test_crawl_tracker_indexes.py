@@ -0,0 +1,88 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import text, select
+from sqlalchemy.exc import OperationalError
+
+from core.database import engine
+from core.models import CrawlTracker
+
+# Kiểm tra query plan của các truy vấn crawl_tracker trên bảng lớn.
+# Cần PostgreSQL theo cấu hình .env; số dòng chỉnh bằng PLAN_TEST_ROWS.
+# Mặc định 50k dòng (dưới ~35k planner chọn Seq Scan cho lô 200 document_id vì bảng
+# quá nhỏ); chạy như production với PLAN_TEST_ROWS=1000000.
+SCHEMA = 'plan_test'
+ROWS = int(os.getenv('PLAN_TEST_ROWS', 50_000))
+
+@pytest.fixture(scope='module')
+def conn():
+    try:
+        connection = engine.connect()
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL không khả dụng: {e}")
+
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    connection.commit()
+
+    # Tạo bảng từ model (kèm index) trong schema riêng
+    translated = connection.execution_options(schema_translate_map={None: SCHEMA})
+    CrawlTracker.__table__.create(translated)
+    # ~2% bản ghi còn chờ xử lý, phần còn lại đã crawl xong
+    connection.execute(text(f"""
+        INSERT INTO {SCHEMA}.crawl_tracker (document_id, document_type, status, created_at, retry_count)
+        SELECT g::text,
+               (CASE WHEN g % 3 = 0 THEN 'judgment' ELSE 'law' END)::{SCHEMA}.doc_type,
+               (CASE WHEN g % 50 = 0 THEN 'pending' WHEN g % 97 = 0 THEN 'failed' ELSE 'success' END)::{SCHEMA}.crawl_status,
+               now() - (g || ' seconds')::interval,
+               g % 4
+        FROM generate_series(1, :rows) g
+    """), {'rows': ROWS})
+    connection.execute(text(f"ANALYZE {SCHEMA}.crawl_tracker"))
+    connection.commit()
+
+    yield translated
+
+    connection.rollback()
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.commit()
+    connection.close()
+
+def explain(conn, stmt) -> str:
+    compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})
+    translated = str(compiled).replace('crawl_tracker', f'{SCHEMA}.crawl_tracker')
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {translated}")).scalar()
+    return json.dumps(plan)
+
+def test_lookup_by_document_id_uses_unique_index(conn):
+    stmt = select(CrawlTracker.id).where(
+        CrawlTracker.document_id == '12345',
+        CrawlTracker.document_type == 'law'
+    )
+    plan = explain(conn, stmt)
+    assert 'ux_crawl_tracker_type_doc_id' in plan
+    assert 'Seq Scan' not in plan
+
+def test_existing_ids_lookup_uses_unique_index(conn):
+    ids = [str(i) for i in range(1000, 1200)]
+    stmt = select(CrawlTracker.document_id).where(
+        CrawlTracker.document_id.in_(ids),
+        CrawlTracker.document_type == 'law'
+    )
+    plan = explain(conn, stmt)
+    assert 'ux_crawl_tracker_type_doc_id' in plan
+    assert 'Seq Scan' not in plan
+
+def test_pending_scan_uses_partial_index(conn):
+    stmt = select(CrawlTracker.document_id).where(
+        CrawlTracker.document_type == 'law',
+        CrawlTracker.status.in_(['pending', 'failed']),
+        CrawlTracker.retry_count < 3
+    ).order_by(CrawlTracker.created_at).limit(100)
+    plan = explain(conn, stmt)
+    assert 'ix_crawl_tracker_pending' in plan
+    assert 'Seq Scan' not in plan
+    assert '"Node Type": "Sort"' not in plan
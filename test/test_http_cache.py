@@ -0,0 +1,81 @@
+import sys
+import os
+import time
+import asyncio
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.crawlers.http_cache import DiskCache
+from core.crawlers.async_fetcher import AsyncFetcher
+
+URL = 'https://thuvienphapluat.vn/van-ban/Xay-dung-Do-thi/x-259770.aspx'
+
+def body_path(cache: DiskCache, url: str) -> str:
+    return cache._paths(url)[1]
+
+def test_put_get_round_trip(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+    assert cache.get(URL) is None
+
+    cache.put(URL, 'Luật Xây dựng'.encode('utf-8'), {'ETag': '"v1"', 'Content-Type': 'text/html'}, encoding='utf-8')
+    entry = cache.get(URL)
+    assert entry.body.decode('utf-8') == 'Luật Xây dựng'
+    assert entry.etag == '"v1"' and entry.last_modified is None
+    assert entry.meta['encoding'] == 'utf-8'
+    assert DiskCache.conditional_headers(entry) == {'If-None-Match': '"v1"'}
+    # Không để lại file tạm
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith('.tmp')]
+
+def test_touch_keeps_body_and_updates_validators(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.put(URL, b'<html></html>', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jun 2020 00:00:00 GMT'})
+    cache.touch(URL, {'ETag': '"v2"'})
+
+    entry = cache.get(URL)
+    assert entry.body == b'<html></html>'
+    assert DiskCache.conditional_headers(entry) == {
+        'If-None-Match': '"v2"', 'If-Modified-Since': 'Mon, 01 Jun 2020 00:00:00 GMT'
+    }
+    assert 'validated_at' in entry.meta
+
+def test_corrupt_body_is_a_miss(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.put(URL, b'<html></html>', {})
+    with open(body_path(cache, URL), 'wb') as f:
+        f.write(b'not zlib')
+    assert cache.get(URL) is None
+
+def test_evicts_least_recently_used(tmp_path):
+    # Body ngẫu nhiên gần như không nén được: mỗi entry ~4 KB trên đĩa
+    cache = DiskCache(str(tmp_path), max_bytes=15 * 1024)
+    urls = [f"{URL}?page={i}" for i in range(3)]
+    for age, url in zip((300, 200, 100), urls):
+        cache.put(url, os.urandom(4000), {})
+        accessed = time.time() - age
+        os.utime(body_path(cache, url), (accessed, accessed))
+    # Dùng lại entry cũ nhất nên entry thứ hai thành ít dùng nhất
+    assert cache.get(urls[0]) is not None
+
+    cache.put(f"{URL}?page=3", os.urandom(4000), {})
+    assert cache.get(urls[1]) is None
+    assert cache.get(urls[0]) is not None and cache.get(urls[2]) is not None
+    assert cache._size <= cache.max_bytes
+
+def test_size_is_rebuilt_from_disk(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.put(URL, os.urandom(2000), {})
+    assert DiskCache(str(tmp_path), max_bytes=1024 * 1024)._size == cache._size == os.path.getsize(body_path(cache, URL))
+
+def test_async_fetcher_reads_cache_off_the_event_loop(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put(URL, 'Luật Xây dựng'.encode('utf-8'), {}, 'utf-8')
+    threads = []
+    get = cache.get
+    cache.get = lambda url: threads.append(threading.get_ident()) or get(url)
+
+    async def fetch():
+        return await AsyncFetcher(cache=cache, cache_mode='offline').fetch_text(URL), threading.get_ident()
+
+    text, loop_thread = asyncio.run(fetch())
+    assert text == 'Luật Xây dựng'
+    assert threads and loop_thread not in threads
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import select
+
+from core.database import DatabaseManager
+from core.models import LegalDocument
+
+CSV = (
+    "id,document_number,signer,issue_date\n"
+    "1,01/2020/QH14,,2020-01-02\n"
+    "2,02/2020/QH14,\\N,\\N\n"
+    "3,03/2020/QH14,Nguyễn Văn A,\n"
+)
+
+def read_chunks(tmp_path, content, **kwargs):
+    path = tmp_path / 'input.csv'
+    path.write_text(content, encoding='utf-8')
+    db = DatabaseManager()
+    table = db._get_table('legal_documents')
+    return db, table, list(db._read_chunks(table, str(path), kwargs.pop('chunk_size', 50000), **kwargs))
+
+def test_empty_string_and_null_stay_distinct(tmp_path):
+    _, _, [(_, chunk)] = read_chunks(tmp_path, CSV, null='\\N')
+    assert chunk['signer'].iloc[0] == ''
+    assert chunk['signer'].isna().tolist() == [False, True, False]
+    # Cột ngày không có chuỗi rỗng: ô trống là NULL
+    assert chunk['issue_date'].isna().tolist() == [False, True, True]
+
+def test_empty_null_marker_reads_empty_fields_as_null(tmp_path):
+    content = CSV.replace('\\N,\\N', '\\N,')
+    _, _, [(_, chunk)] = read_chunks(tmp_path, content, null='')
+    assert chunk['signer'].isna().tolist() == [True, False, False]
+    assert chunk['signer'].iloc[1] == '\\N'
+
+def test_unparseable_dates_fail(tmp_path):
+    content = CSV + "4,04/2020/QH14,,not a date\n"
+    with pytest.raises(ValueError, match=r"1 unparseable dates in column issue_date between rows 3 and 4"):
+        read_chunks(tmp_path, content, null='\\N', chunk_size=2)
+
+def test_copy_keeps_empty_string(pg_session, tmp_path):
+    db, table, chunks = read_chunks(tmp_path, CSV, null='\\N')
+    raw_conn = pg_session.connection().connection.dbapi_connection
+    for column_names, chunk in chunks:
+        db._copy_chunk(raw_conn, table, column_names, chunk, 'update')
+
+    rows = pg_session.execute(
+        select(LegalDocument.id, LegalDocument.signer, LegalDocument.issue_date).order_by(LegalDocument.id)
+    ).all()
+    assert [(r.signer, r.issue_date and r.issue_date.isoformat()) for r in rows] == [
+        ('', '2020-01-02'),
+        (None, None),
+        ('Nguyễn Văn A', None),
+    ]
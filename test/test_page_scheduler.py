@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.crawlers.page_scheduler import PageScheduler
+
+def drain(scheduler) -> list:
+    pages = []
+    while True:
+        batch = scheduler.next_batch()
+        if not batch:
+            return pages
+        pages.extend(batch)
+
+def test_batches_stop_at_end_page():
+    scheduler = PageScheduler(start_page=3, end_page=7, batch_size=2)
+    assert scheduler.next_batch() == [3, 4]
+    assert scheduler.next_batch() == [5, 6]
+    assert scheduler.next_batch() == [7]
+    assert scheduler.next_batch() == []
+    assert scheduler.last_page == 7
+
+def test_empty_run_stops_crawl():
+    scheduler = PageScheduler(max_empty_pages=3, batch_size=1)
+    for page in range(1, 6):
+        assert scheduler.next_batch() == [page]
+        scheduler.mark_found(page)
+    # Các trang trống được xử lý không theo thứ tự
+    for page in (7, 6, 8):
+        scheduler.mark_empty(page)
+    assert scheduler.is_stopped(9)
+    assert not scheduler.is_stopped(8)
+
+def test_isolated_empty_pages_do_not_stop():
+    scheduler = PageScheduler(max_empty_pages=3)
+    for page in (2, 4, 6):
+        scheduler.mark_empty(page)
+    assert not scheduler.is_stopped(100)
+
+def test_errors_past_frontier_count_as_empty():
+    scheduler = PageScheduler(max_empty_pages=3)
+    scheduler.mark_found(10)
+    # Quá cuối danh sách: 404 xen giữa trang trống không làm đứt chuỗi
+    scheduler.mark_empty(11)
+    scheduler.mark_failed(12)
+    scheduler.mark_empty(13)
+    assert scheduler.is_stopped(14)
+
+def test_errors_before_frontier_are_ignored():
+    scheduler = PageScheduler(max_empty_pages=3)
+    scheduler.mark_found(20)
+    for page in (5, 6, 7):
+        scheduler.mark_failed(page)
+    assert not scheduler.is_stopped(21)
+
+def test_max_pages_bounds_open_ended_crawl():
+    scheduler = PageScheduler(start_page=1, end_page=None, batch_size=4, max_pages=10)
+    assert drain(scheduler) == list(range(1, 11))
+
+def test_stop_after_keeps_earliest_stop():
+    scheduler = PageScheduler(end_page=50)
+    scheduler.stop_after(30)
+    scheduler.stop_after(40)
+    assert scheduler.is_stopped(31)
+    assert not scheduler.is_stopped(30)
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import date
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+
+from core.search import search_statement, _search_page, RANK_CANDIDATES
+
+def compiled(stmt):
+    return stmt.compile(dialect=postgresql.dialect())
+
+def row(id, approximate=False):
+    return SimpleNamespace(
+        _mapping={'kind': 'law', 'id': id, 'number': f"{id}/2020/QH14", 'title': 'Luật',
+                  'issuing_authority': 'Quốc hội', 'date': date(2020, 6, 1), 'rank': 0.5,
+                  'approximate': approximate},
+        date=date(2020, 6, 1), approximate=approximate
+    )
+
+def test_exact_number_is_ranked_besides_capped_candidates():
+    stmt = compiled(search_statement(' 12/2020/QH14 ', kind='law'))
+    sql = str(stmt)
+    assert "legal_documents.document_number = %(document_number_1)s" in sql
+    assert "legal_documents.document_number IS DISTINCT FROM %(document_number_2)s" in sql
+    assert stmt.params['document_number_1'] == stmt.params['document_number_2'] == '12/2020/QH14'
+    assert RANK_CANDIDATES in stmt.params.values()
+
+def test_both_tables_flag_truncation():
+    sql = str(compiled(search_statement('hợp đồng')))
+    assert "judgments.case_number = %(case_number_1)s" in sql
+    assert sql.count(".scanned) OVER () >=") == 2
+
+def test_page_reports_approximate_without_leaking_column():
+    page = _search_page([row(1), row(2, approximate=True), row(3)], page=1, page_size=2)
+    assert page['approximate'] is True
+    assert page['has_more'] is True
+    assert [result['id'] for result in page['results']] == [1, 2]
+    assert all('approximate' not in result for result in page['results'])
+    assert page['results'][0]['date'] == '2020-06-01'
+
+def test_page_is_exact_when_no_table_was_capped():
+    assert _search_page([row(1)], page=1, page_size=20)['approximate'] is False
+    assert _search_page([], page=1, page_size=20)['approximate'] is False
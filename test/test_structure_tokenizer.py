@@ -0,0 +1,68 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+import pytest
+
+from core.processers.structure_tokenizer import tokenize, clean_line, CONTENT
+
+# (dòng, loại, số thứ tự)
+CASES = [
+    ("PHẦN THỨ NHẤT", "PHẦN", "THỨ NHẤT"),
+    ("Phần thứ hai. QUY ĐỊNH CHUNG", "PHẦN", "thứ hai"),
+    ("PHẦN I", "PHẦN", "I"),
+    ("PHẦN II. NHỮNG QUY ĐỊNH CHUNG", "PHẦN", "II"),
+    ("Chương I", "CHƯƠNG", "I"),
+    ("Chương XIV QUY ĐỊNH CHUYỂN TIẾP", "CHƯƠNG", "XIV"),
+    ("CHƯƠNG II", "CHƯƠNG", "II"),
+    ("Mục 1. QUY ĐỊNH CHUNG", "MỤC", "1"),
+    ("MỤC 2", "MỤC", "2"),
+    ("Điều 1. Phạm vi điều chỉnh", "ĐIỀU", "1"),
+    ("Điều 12: Giải thích từ ngữ", "ĐIỀU", "12"),
+    ("Điều 3 Đối tượng áp dụng", "ĐIỀU", "3"),
+    ("ĐIỀU 5. Hiệu lực thi hành", "ĐIỀU", "5"),
+    ("điều 7.", "ĐIỀU", "7"),
+    ("1. Quy hoạch xây dựng được lập cho các vùng.", "KHOẢN", "1"),
+    ("12.Hồ sơ gồm:", "KHOẢN", "12"),
+    ("a) Công trình dân dụng;", "ĐIỂM", "a"),
+    ("đ) Công trình khác;", CONTENT, ""),
+    ("Luật này quy định về hoạt động đầu tư xây dựng.", CONTENT, ""),
+    ("Căn cứ Điều 5 của Luật này;", CONTENT, ""),
+    # Giữ nguyên như mẫu cũ: "Phần" + từ bất kỳ ở đầu dòng được coi là tiêu đề PHẦN
+    ("Phần lớn các công trình", "PHẦN", "lớn"),
+    ("Chương trình mục tiêu quốc gia", CONTENT, ""),
+    ("Mục tiêu của quy hoạch", CONTENT, ""),
+    ("Điều kiện kinh doanh", CONTENT, ""),
+    ("2014 là năm", CONTENT, ""),
+    ("1/25.000 - 1/500.000", CONTENT, ""),
+    ("QUỐC HỘI", CONTENT, ""),
+]
+
+# Các mẫu trước khi gộp thành STRUCTURE_RE: tokenize() phải phân loại giống hệt
+LEGACY_PATTERNS = {
+    "PHẦN": r"^PHẦN\s+[A-Z]+",
+    "CHƯƠNG": r"^Chương\s+[IVXLCDM]+",
+    "MỤC": r"^Mục\s+\d+",
+    "ĐIỀU": r"^Điều\s+\d+[\.:]?",
+    "KHOẢN": r"^\d+\.",
+    "ĐIỂM": r"^[a-z]\)",
+}
+
+def legacy_kind(text: str) -> str:
+    for key, pattern in LEGACY_PATTERNS.items():
+        if re.match(pattern, text, re.IGNORECASE):
+            return key
+    return CONTENT
+
+@pytest.mark.parametrize('text, kind, number', CASES)
+def test_tokenize(text, kind, number):
+    assert tokenize(text) == (kind, number)
+
+@pytest.mark.parametrize('text', [text for text, _, _ in CASES])
+def test_classification_matches_legacy_patterns(text):
+    assert tokenize(text)[0] == legacy_kind(text)
+
+def test_clean_line_marks_references():
+    assert clean_line("  Theo  quy định tại điều 5 và Điều 12\tcủa Luật này ") == \
+        "Theo quy định tại [REF:điều 5] và [REF:Điều 12] của Luật này"
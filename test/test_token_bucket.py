@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import time
+
+from core.crawlers.async_fetcher import TokenBucket
+
+def acquire_times(bucket: TokenBucket, count: int, concurrent: bool = False) -> list:
+    """Thời điểm (giây, tính từ lúc bắt đầu) mỗi lần acquire() thành công"""
+    async def run():
+        started = time.monotonic()
+        times = []
+
+        async def acquire():
+            await bucket.acquire()
+            times.append(time.monotonic() - started)
+
+        if concurrent:
+            await asyncio.gather(*[acquire() for _ in range(count)])
+        else:
+            for _ in range(count):
+                await acquire()
+        return times
+    return asyncio.run(run())
+
+def test_capacity_defaults_to_one_second_of_tokens():
+    assert TokenBucket(0.5).capacity == 1.0
+    assert TokenBucket(20).capacity == 20
+    assert TokenBucket(20, capacity=3).capacity == 3
+
+def test_burst_up_to_capacity_then_rate():
+    times = acquire_times(TokenBucket(rate=20, capacity=3), 5)
+    # 3 token có sẵn, 2 lần sau mỗi lần chờ 1/20 giây
+    assert times[2] < 0.03
+    assert times[3] >= 0.04 and times[4] >= 0.09
+    assert times[4] < 0.5
+
+def test_concurrent_waiters_share_the_rate():
+    times = acquire_times(TokenBucket(rate=50, capacity=1), 6, concurrent=True)
+    assert sorted(times) == times
+    # 1 token có sẵn + 5 lần chờ 1/50 giây
+    assert times[-1] >= 0.09
+    assert times[-1] < 0.5
+
+def test_idle_time_refills_only_up_to_capacity():
+    bucket = TokenBucket(rate=20, capacity=2)
+    acquire_times(bucket, 2)
+    # Nghỉ đủ lâu cho 4 token nhưng bucket chỉ giữ tối đa 2
+    time.sleep(0.2)
+    times = acquire_times(bucket, 3)
+    assert times[1] < 0.03
+    assert times[2] >= 0.04
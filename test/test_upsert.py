@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+from datetime import date, datetime
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from core.database import upsert_record, upsert_statement, claim_statement
+from core.models import LegalDocument, Judgment
+from core.cache import CHANNEL
+
+def compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+def test_upsert_statement_updates_only_changed_rows():
+    sql = compiled(upsert_statement(LegalDocument(source_id='1001', document_number='12/2020/QH14')))
+    insert, update = sql.split(' ON CONFLICT ')
+    columns = insert.split('(', 1)[1].split(')', 1)[0].split(', ')
+    assert 'source_id' in columns
+    assert not {'id', 'created_at', 'updated_at', 'search_vector'} & set(columns)
+    assert update.startswith('(source_id) DO UPDATE SET ')
+    set_, where = update.split(' WHERE ')
+    assert 'source_id =' not in set_
+    assert 'document_number = excluded.document_number' in set_
+    assert set_.endswith('updated_at = now()')
+    assert 'legal_documents.document_number IS DISTINCT FROM excluded.document_number' in where
+    assert 'updated_at' not in where
+
+def test_upsert_statement_compares_json_as_jsonb():
+    sql = compiled(upsert_statement(Judgment(source_id='77', case_number='05/2021/DS-PT', keywords=['Dân sự'])))
+    assert 'CAST(judgments.keywords AS JSONB) IS DISTINCT FROM CAST(excluded.keywords AS JSONB)' in sql
+    assert 'CAST(judgments.related_parties AS JSONB)' in sql
+
+def test_claim_statement_needs_source_id():
+    assert claim_statement(LegalDocument(document_number='12/2020/QH14')) is None
+    sql = compiled(claim_statement(Judgment(source_id='77', case_number='05/2021/DS-PT')))
+    assert sql.startswith('UPDATE judgments SET source_id=')
+    assert 'judgments.source_id IS NULL' in sql
+    assert 'judgments.judgment_date IS NOT DISTINCT FROM' in sql
+
+# Các test dưới cần PostgreSQL (fixture pg_session trong conftest.py)
+
+def test_first_save_claims_legacy_document(pg_session):
+    # Bản ghi lưu trước khi có cột source_id
+    legacy = LegalDocument(document_number='12/2020/QH14', issue_date=date(2020, 6, 1),
+                           issuing_authority='Quốc hội', status='valid')
+    other = LegalDocument(document_number='13/2020/QH14', issue_date=date(2020, 6, 1),
+                          issuing_authority='Quốc hội')
+    pg_session.add_all([legacy, other])
+    pg_session.commit()
+
+    # Crawl lại: số hiệu khác khoảng trắng/hoa thường, ngày dạng datetime như build_record
+    crawled = LegalDocument(source_id='1001', document_number='12/2020/qh14 ', issue_date=datetime(2020, 6, 1),
+                            issuing_authority=' Quốc  hội', status='expired')
+    assert upsert_record(pg_session, crawled)
+    pg_session.commit()
+
+    rows = pg_session.execute(
+        select(LegalDocument.id, LegalDocument.source_id, LegalDocument.status).order_by(LegalDocument.id)
+    ).all()
+    assert [tuple(row) for row in rows] == [(legacy.id, '1001', 'expired'), (other.id, None, None)]
+
+    # Lần lưu sau đi thẳng vào upsert, không thêm dòng
+    assert not upsert_record(pg_session, LegalDocument(
+        source_id='1001', document_number='12/2020/qh14 ', issue_date=datetime(2020, 6, 1),
+        issuing_authority=' Quốc  hội', status='expired'
+    ))
+    pg_session.commit()
+    assert len(pg_session.execute(select(LegalDocument.id)).all()) == 2
+
+def test_first_save_claims_legacy_judgment(pg_session):
+    legacy = Judgment(case_number='05/2021/DS-PT', judgment_date=date(2021, 3, 4))
+    pg_session.add(legacy)
+    pg_session.commit()
+
+    assert upsert_record(pg_session, Judgment(source_id='77', case_number='05/2021/DS-PT',
+                                              judgment_date=date(2021, 3, 4), field='Dân sự'))
+    pg_session.commit()
+
+    rows = pg_session.execute(select(Judgment.id, Judgment.source_id, Judgment.field)).all()
+    assert [tuple(row) for row in rows] == [(legacy.id, '77', 'Dân sự')]
+
+def notified_keys(session) -> list:
+    """Khóa trong các NOTIFY đã nhận (session phải LISTEN CHANNEL trước)"""
+    connection = session.connection().connection.driver_connection
+    connection.poll()
+    keys = [key for notify in connection.notifies for key in json.loads(notify.payload)['keys']]
+    connection.notifies.clear()
+    return keys
+
+def test_renumbered_document_invalidates_old_number(pg_session):
+    pg_session.execute(text(f"LISTEN {CHANNEL}"))
+    pg_session.commit()
+
+    assert upsert_record(pg_session, LegalDocument(source_id='1001', document_number='12/2020/QH14'))
+    pg_session.commit()
+    # Dòng mới: không có khóa cũ (khóa mới do notify_changed của người gọi báo)
+    assert notified_keys(pg_session) == []
+
+    assert upsert_record(pg_session, LegalDocument(source_id='1001', document_number='12/2020/QH14', status='valid'))
+    pg_session.commit()
+    assert notified_keys(pg_session) == []
+
+    assert upsert_record(pg_session, LegalDocument(source_id='1001', document_number='12/2020/QH15'))
+    pg_session.commit()
+    assert notified_keys(pg_session) == ['12/2020/QH14']
@@ -0,0 +1,29 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import date
+from sqlalchemy import select
+
+from core.models import CrawlTracker, LegalDocument
+from core.crawlers.write_buffer import WriteBehindBuffer
+
+# Cần PostgreSQL (fixture pg_session trong conftest.py)
+
+def test_check_is_applied_again_when_batch_falls_back_to_one_by_one(pg_session):
+    good, bad = CrawlTracker(document_id='1', document_type='law'), CrawlTracker(document_id='2', document_type='law')
+    pg_session.add_all([good, bad])
+    pg_session.commit()
+
+    buffer = WriteBehindBuffer(pg_session, flush_size=10)
+    buffer.add_success(good, LegalDocument(source_id='1', document_number='1/2020/QH14'),
+                       'a' * 64, date(2020, 1, 1))
+    # Thiếu document_number (NOT NULL): cả lô bị rollback rồi ghi lại từng cái
+    buffer.add_success(bad, LegalDocument(source_id='2', document_number=None), 'b' * 64, date(2020, 1, 1))
+    assert buffer.flush() == 1
+
+    pg_session.expire_all()
+    assert (good.status, good.content_hash) == ('success', 'a' * 64)
+    assert good.next_check_at is not None and good.last_checked_at is not None
+    assert bad.status == 'pending' and bad.content_hash is None and bad.retry_count == 1
+    assert pg_session.execute(select(LegalDocument.source_id)).scalars().all() == ['1']